@@ -0,0 +1,168 @@
+"""
+Benchmarks of the simulation hot paths: circuit building, sampler compilation, sampling, decoding and
+a full data point, over round counts, encoding modes and noise levels.
+
+    python benchmarks/bench_hot_paths.py --out results.json
+    python benchmarks/bench_hot_paths.py --save-baseline        # on the commit to compare against
+    python benchmarks/bench_hot_paths.py                        # later: compares with the baseline
+
+Results are JSON. Every timing is the best of --repeats runs. Exits with status 1 if a benchmark is
+slower than the baseline by more than --tolerance.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+# Run as a script from a checkout, without installing the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tesseract_sim.common.profiling import version_info  # noqa: E402
+from tesseract_sim.error_correction.decoder_manual import decode_shots  # noqa: E402
+from tesseract_sim.estimation.threshold import ec_noise_cfg  # noqa: E402
+from tesseract_sim.run import build_circuit_ec_experiment, clear_circuit_fragments, \
+    run_simulation_ec_experiment  # noqa: E402
+
+DEFAULT_ROUNDS = (1, 10, 50, 200)
+DEFAULT_ENCODING_MODES = ('9a', '9b')
+DEFAULT_NOISE_LEVELS = (0.0, 1e-3, 5e-3)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Per metric, whether larger values are better
+METRICS = {
+    'build_seconds': False,
+    'compile_seconds': False,
+    'sample_shots_per_second': True,
+    'decode_shots_per_second': True,
+    'end_to_end_seconds': False,
+}
+
+
+def best_time(fn: Callable[[], object], repeats: int) -> float:
+    """The shortest wall time of repeats calls of fn."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark_point(rounds: int, encoding_mode: str, noise: float, shots: int, repeats: int = 3) -> Dict:
+    """Times every stage of one data point of the EC experiment with EC noise (see ec_noise_cfg)."""
+    cfg = ec_noise_cfg(noise)
+
+    def build():
+        clear_circuit_fragments()
+        return build_circuit_ec_experiment(rounds, cfg, encoding_mode)
+
+    circuit = build()
+    sampler = circuit.compile_sampler(seed=0)
+    shot_data = sampler.sample(shots)
+
+    def end_to_end():
+        # The experiment reports its counts, which would drown the benchmark output
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_simulation_ec_experiment(rounds, shots, cfg, encoding_mode=encoding_mode)
+
+    return {
+        'rounds': rounds,
+        'encoding_mode': encoding_mode,
+        'noise': noise,
+        'shots': shots,
+        'build_seconds': best_time(build, repeats),
+        'compile_seconds': best_time(circuit.compile_sampler, repeats),
+        'sample_shots_per_second': shots / best_time(lambda: sampler.sample(shots), repeats),
+        'decode_shots_per_second': shots / best_time(
+            lambda: decode_shots(shot_data, rounds, encoding_mode=encoding_mode), repeats),
+        'end_to_end_seconds': best_time(end_to_end, repeats),
+    }
+
+
+def run_benchmarks(rounds: Sequence[int] = DEFAULT_ROUNDS, encoding_modes: Sequence[str] = DEFAULT_ENCODING_MODES,
+                   noise_levels: Sequence[float] = DEFAULT_NOISE_LEVELS, shots: int = 10000,
+                   repeats: int = 3) -> Dict:
+    """Runs benchmark_point over the grid, returns the results with the versions they were measured with."""
+    results = []
+    for encoding_mode in encoding_modes:
+        for noise in noise_levels:
+            for r in rounds:
+                result = benchmark_point(r, encoding_mode, noise, shots, repeats)
+                print(f"rounds={r:>4} encoding={encoding_mode} noise={noise:<6g} "
+                      f"build={result['build_seconds'] * 1e3:8.2f} ms  "
+                      f"compile={result['compile_seconds'] * 1e3:8.2f} ms  "
+                      f"sample={result['sample_shots_per_second']:12.0f} shots/s  "
+                      f"decode={result['decode_shots_per_second']:12.0f} shots/s  "
+                      f"end-to-end={result['end_to_end_seconds'] * 1e3:9.2f} ms")
+                results.append(result)
+    return {'versions': version_info(), 'repeats': repeats, 'results': results}
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float = 0.25) -> List[str]:
+    """
+    Regressions of results against baseline, as readable lines.
+
+    Benchmarks are matched by rounds, encoding mode, noise and shots. A time more than (1 + tolerance)
+    times the baseline, or a throughput below the baseline divided by (1 + tolerance), is a regression.
+    """
+    def key(result):
+        return result['rounds'], result['encoding_mode'], result['noise'], result['shots']
+
+    reference = {key(result): result for result in baseline['results']}
+    regressions = []
+    for result in results['results']:
+        expected = reference.get(key(result))
+        if expected is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            ratio = expected[metric] / result[metric] if higher_is_better else result[metric] / expected[metric]
+            if ratio > 1 + tolerance:
+                regressions.append(f"rounds={result['rounds']} encoding={result['encoding_mode']} "
+                                   f"noise={result['noise']:g}: {metric} {expected[metric]:.4g} -> "
+                                   f"{result[metric]:.4g} ({ratio:.2f}x slower)")
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark circuit building, compilation, sampling and decoding.")
+    parser.add_argument('--rounds', type=int, nargs='+', default=list(DEFAULT_ROUNDS), help='Round counts')
+    parser.add_argument('--encoding-mode', type=str, nargs='+', choices=['9a', '9b'], default=list(DEFAULT_ENCODING_MODES), help='Encoding modes')
+    parser.add_argument('--noise', type=float, nargs='+', default=list(DEFAULT_NOISE_LEVELS), help='EC noise levels')
+    parser.add_argument('--shots', type=int, default=10000, help='Shots per data point')
+    parser.add_argument('--repeats', type=int, default=3, help='Runs per timing, the best one is kept')
+    parser.add_argument('--out', type=str, default=None, help='Write the results to this JSON file')
+    parser.add_argument('--baseline', type=str, default=DEFAULT_BASELINE, help='Baseline to compare with')
+    parser.add_argument('--save-baseline', action='store_true', help='Store the results as the baseline instead of comparing')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown before a benchmark counts as a regression')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.rounds, args.encoding_mode, args.noise, args.shots, args.repeats)
+    if args.out is not None:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.out}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --save-baseline to store one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    print(f"{len(regressions)} regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
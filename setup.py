@@ -4,4 +4,16 @@ setup(
     name="tesseract_sim",
     version="0.1.0",
     packages=find_packages(),
+    extras_require={
+        "jit": ["numba"],
+        "yaml": ["pyyaml"],
+    },
+    entry_points={
+        "console_scripts": [
+            "tesseract-simulate=tesseract_sim.run:main",
+            "tesseract-sweep=tesseract_sim.estimation.sweep:main",
+            "tesseract-plot=tesseract_sim.plotting.plot_acceptance_rates:main",
+            "tesseract-batch=tesseract_sim.plotting.batch:main",
+        ],
+    },
 ) 
\ No newline at end of file
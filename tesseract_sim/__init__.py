@@ -1,2 +1,9 @@
-from .run import run_simulation_ec_experiment
-__all__ = ["run_simulation_ec_experiment"]
\ No newline at end of file
+__all__ = ["run_simulation_ec_experiment"]
+
+
+def __getattr__(name):
+    # run.py loads stim, numpy and the circuit builders, so it's only imported when its export is used
+    if name == "run_simulation_ec_experiment":
+        from .run import run_simulation_ec_experiment
+        return run_simulation_ec_experiment
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
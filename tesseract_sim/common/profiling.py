@@ -0,0 +1,137 @@
+import cProfile
+import json
+import os
+import platform
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+import stim
+
+from tesseract_sim.storage.circuit_cache import code_version
+
+# The PipelineMetrics recording the current data point, see PipelineMetrics.point
+_active: Optional["PipelineMetrics"] = None
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Times a stage of the experiment pipeline (e.g. 'sample', 'decode') for the active PipelineMetrics.
+
+    Does nothing outside of PipelineMetrics.point. Stages don't nest: a stage entered within another one
+    counts towards the outer stage only.
+    """
+    metrics = _active
+    if metrics is None or metrics._stage is not None:
+        yield
+        return
+    metrics._stage = name
+    profiler = metrics._profiler(name)
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        stages = metrics._current['stages']
+        stages[name] = stages.get(name, 0.0) + time.perf_counter() - start
+        metrics._stage = None
+
+
+def version_info() -> Dict[str, str]:
+    """Versions identifying the code the metrics were measured with."""
+    return {
+        'code_version': code_version(),
+        'stim': stim.__version__,
+        'numpy': np.__version__,
+        'python': platform.python_version(),
+    }
+
+
+class PipelineMetrics:
+    """
+    Per-stage wall time, throughput and peak memory of every data point of an experiment.
+
+    Each data point is run within point(), and the pipeline marks its stages with stage(). With
+    profile_dir, every stage of every point also runs under cProfile, and its stats are written to
+    profile_dir/point<index>_<stage>.prof (read them with pstats or snakeviz). Peak memory is only
+    measured with trace_memory, as tracing every allocation slows the pipeline (and its timings) down
+    several times.
+    """
+
+    def __init__(self, profile_dir: Optional[str] = None, trace_memory: bool = False):
+        self.profile_dir = profile_dir
+        self.trace_memory = trace_memory
+        self.points: List[dict] = []
+        self._current: Optional[dict] = None
+        self._stage: Optional[str] = None
+        self._profilers: Dict[str, cProfile.Profile] = {}
+
+    def _profiler(self, name: str) -> Optional[cProfile.Profile]:
+        if self.profile_dir is None:
+            return None
+        return self._profilers.setdefault(name, cProfile.Profile())
+
+    @contextmanager
+    def point(self, **params):
+        """
+        Records the stages run within this block as one data point, described by params.
+
+        If params has shots, the point's throughput in shots per second is recorded as well. With
+        trace_memory, the point's peak memory is the most memory allocated at once within the block, as
+        traced by tracemalloc (NumPy reports its arrays to it), not counting memory already allocated on
+        entry. Otherwise it is None.
+        """
+        global _active
+        previous = _active
+        self._current = {'params': params, 'stages': {}}
+        self._profilers = {}
+        _active = self
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if self.trace_memory:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield self._current
+        finally:
+            _active = previous
+            point = self._current
+            total = time.perf_counter() - start
+            point['total_seconds'] = total
+            shots = params.get('shots')
+            point['shots_per_second'] = shots / total if shots and total > 0 else None
+            point['peak_memory_mb'] = ((tracemalloc.get_traced_memory()[1] - baseline) / 2 ** 20
+                                       if self.trace_memory else None)
+            if started_tracing:
+                tracemalloc.stop()
+            if self._profilers:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                point['profiles'] = {}
+                for name, profiler in self._profilers.items():
+                    path = os.path.join(self.profile_dir, f"point{len(self.points):03d}_{name}.prof")
+                    profiler.dump_stats(path)
+                    point['profiles'][name] = os.path.basename(path)
+            self.points.append(point)
+            self._current = None
+            self._profilers = {}
+
+    def stage_totals(self) -> Dict[str, float]:
+        """Seconds spent in every stage, summed over all points."""
+        totals: Dict[str, float] = {}
+        for point in self.points:
+            for name, seconds in point['stages'].items():
+                totals[name] = totals.get(name, 0.0) + seconds
+        return totals
+
+    def save(self, path: str) -> None:
+        """Writes the versions and all points as JSON."""
+        with open(path, "w") as f:
+            json.dump({'versions': version_info(), 'points': self.points}, f, indent=2)
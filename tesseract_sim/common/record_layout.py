@@ -0,0 +1,50 @@
+import json
+from dataclasses import asdict, dataclass, field
+from typing import List, Literal
+
+from tesseract_sim.noise.noise_cfg import NoiseCfg
+
+RECORD_FORMATS = ('b8', '01', 'r8')
+
+
+@dataclass
+class RecordChunk:
+    """One file of measurement records."""
+    file: str       # file name, relative to the directory of the layout
+    shots: int
+
+
+@dataclass
+class RecordLayout:
+    """
+    Describes a set of stored measurement records, written next to them as a JSON sidecar.
+
+    Every shot is the full measurement record of the EC experiment: measurement_offset encoding
+    measurements, 16 measurements per error correction round, and the 16 final measurements.
+    """
+    num_measurements: int
+    rounds: int
+    encoding_mode: Literal['9a', '9b']
+    measurement_offset: int
+    format: str
+    cfg: NoiseCfg
+    chunks: List[RecordChunk] = field(default_factory=list)
+
+    @property
+    def shots(self) -> int:
+        return sum(chunk.shots for chunk in self.chunks)
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        data['shots'] = self.shots
+        return json.dumps(data, indent=2)
+
+    @classmethod
+    def from_json(cls, text: str) -> "RecordLayout":
+        data = json.loads(text)
+        data.pop('shots', None)
+        if data['format'] not in RECORD_FORMATS:
+            raise ValueError(f"Unsupported record format {data['format']}, must be one of {RECORD_FORMATS}")
+        data['cfg'] = NoiseCfg(**data['cfg'])
+        data['chunks'] = [RecordChunk(**chunk) for chunk in data['chunks']]
+        return cls(**data)
@@ -1,4 +1,4 @@
-from tesseract_sim.noise.noise_utils import append_1q, append_2q
+from tesseract_sim.noise.noise_utils import append_1q, append_2q, append_final_measurement
 from tesseract_sim.noise.noise_cfg import NoiseCfg, NO_NOISE
 
 
@@ -24,8 +24,15 @@ def add_cnot_gates(circuit, start1, start2, num_gates=4, cfg: NoiseCfg = NO_NOIS
     for i in range(num_gates):
         append_2q(circuit, "CNOT", start1 + i, start2 + i, phase="enc", cfg=cfg)
 
-def encode_manual_fig9a(circuit, cfg: NoiseCfg = NO_NOISE):
+# Number of measurements encode_manual_fig9a adds with measure_flags=True
+NUM_FLAG_MEASUREMENTS_9A = 9
+
+
+def encode_manual_fig9a(circuit, cfg: NoiseCfg = NO_NOISE, measure_flags: bool = False):
     # Here we encode the state |++0000> as can be seen in Fig. 9a of that paper
+    # With measure_flags, the flag ancillas and the X0X1X2X3 check are measured (NUM_FLAG_MEASUREMENTS_9A
+    # measurements), so that faulty preparations can be preselected away (see encoding/preselection.py).
+    # Otherwise nothing is measured, as the encoding is assumed to be noiseless.
     # initialize qubits:
     append_1q(circuit, "H", 0, phase="enc", cfg=cfg)
     append_1q(circuit, "H", 1, phase="enc", cfg=cfg)
@@ -45,8 +52,9 @@ def encode_manual_fig9a(circuit, cfg: NoiseCfg = NO_NOISE):
     add_cnot_gates(circuit, 0, 12, cfg=cfg)
     add_cnot_gates(circuit, 0, 16, cfg=cfg) # working on ancilla qubits as flag qubits
 
-    append_1q(circuit, "R", 18, phase="enc", cfg=cfg)
-    append_1q(circuit, "R", 19, phase="enc", cfg=cfg) # Reset ancillas 18,19 since their role is done and we need them for the following
+    reset = "MR" if measure_flags else "R" # Measuring the flags of ancillas 18,19 before reusing them
+    append_1q(circuit, reset, 18, phase="enc", cfg=cfg)
+    append_1q(circuit, reset, 19, phase="enc", cfg=cfg) # Reset ancillas 18,19 since their role is done and we need them for the following
     append_1q(circuit, "H", 19, phase="enc", cfg=cfg)
     append_2q(circuit, "CNOT", 19, 18, phase="enc", cfg=cfg) # cnot to flag qubit
     append_2q(circuit, "CNOT", 19, 0, phase="enc", cfg=cfg) # measuring stabilizer
@@ -55,4 +63,19 @@ def encode_manual_fig9a(circuit, cfg: NoiseCfg = NO_NOISE):
     append_2q(circuit, "CNOT", 19, 3, phase="enc", cfg=cfg) # measuring stabilizer
     append_2q(circuit, "CNOT", 19, 18, phase="enc", cfg=cfg) # cnot to flag qubit
 
-    circuit.append_operation("TICK")
\ No newline at end of file
+    circuit.append_operation("TICK")
+
+    if measure_flags:
+        measure_encoding_flags(circuit, cfg=cfg)
+        circuit.append_operation("TICK")
+
+
+def measure_encoding_flags(circuit, cfg: NoiseCfg = NO_NOISE):
+    """
+    Measures the remaining flag ancillas of encode_manual_fig9a and the X0X1X2X3 check on ancilla 19.
+
+    Ancillas 16 and 17 are measured as well; the error correction rounds reset them before use.
+    """
+    for ancilla in [16, 17, 18, 19, 20, 21, 22]:
+        # Ancilla 19 holds the check in the X basis; 16 and 17 are reset before reuse, so all are final
+        append_final_measurement(circuit, 'X' if ancilla == 19 else 'Z', ancilla, phase="enc", cfg=cfg)
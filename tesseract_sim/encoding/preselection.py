@@ -0,0 +1,99 @@
+from typing import NamedTuple, Optional
+
+import numpy as np
+import stim
+
+from tesseract_sim.common.profiling import stage
+from tesseract_sim.encoding.encoding_manual_9a import NUM_FLAG_MEASUREMENTS_9A
+from tesseract_sim.error_correction.decoder_manual import decode_shots, summarize_decoded_shots
+from tesseract_sim.noise.fault_locations import gauge_records
+
+
+class PreselectionChecks(NamedTuple):
+    """The encoding measurements a preparation is checked against, see preselection_checks."""
+    columns: np.ndarray             # record indices of the deterministic encoding measurements
+    expected: np.ndarray            # their values without faults
+    num_encoding_measurements: int  # measurements of the encoding, the checks are among them
+
+
+class PreselectedResult(NamedTuple):
+    """
+    Counts of an EC experiment with preselection, the EC counts are over the preselected shots.
+
+    The first three fields are the counts of run_manual_error_correction; prep_accept is the number of
+    shots that passed preselection.
+    """
+    ec_accept: int
+    logical_shots_passed: int
+    average_percentage: Optional[float]
+    prep_accept: int
+
+
+def preselection_checks(encoding_circuit: stim.Circuit, max_samples: int = 4096) -> PreselectionChecks:
+    """
+    Finds the measurements of an encoding circuit whose outcome is fixed without faults.
+
+    These are the flags and stabilizer checks of the encoding (build_encoding_circuit with preselect=True);
+    measurements with random outcomes are skipped. The noiseless records are enumerated with gauge_records,
+    or sampled if there are more than max_samples of them.
+    """
+    records, _ = gauge_records(encoding_circuit, max_samples)
+    records = records.astype(bool)
+    columns = np.flatnonzero(np.all(records == records[:1], axis=0))
+    return PreselectionChecks(columns, records[0, columns], encoding_circuit.num_measurements)
+
+
+def preselection_mask(shot_data_all: np.ndarray, checks: PreselectionChecks) -> np.ndarray:
+    """Boolean array with one entry per shot, True where every encoding check has its expected value."""
+    return np.all(shot_data_all[:, checks.columns] == checks.expected, axis=1)
+
+
+def strip_flag_measurements(shot_data_all: np.ndarray, encoding_mode: str = '9b') -> np.ndarray:
+    """
+    Removes the flag measurements that only the preselecting encoding adds.
+
+    The rest of the record has the usual layout of the encoding mode (see get_decoding_parameters).
+    The 9b encoding measures its ancillas either way, so its records are returned as they are.
+    """
+    num_flags = NUM_FLAG_MEASUREMENTS_9A if encoding_mode == '9a' else 0
+    return shot_data_all[:, num_flags:]
+
+
+def run_preselected_error_correction(circuit, checks: PreselectionChecks, shots, rounds, apply_pauli_frame=True,
+                                     encoding_mode='9b', decoder=None, readout=None,
+                                     sampler=None) -> PreselectedResult:
+    """
+    Runs the EC experiment with a noisy encoding, discarding the preparations whose checks fail.
+
+    The preselection is one vectorized mask over the sampled records, so rejected preparations are never
+    decoded. The preparation acceptance is reported on its own; EC acceptance and logical success are
+    counted over the preselected shots, as in run_manual_error_correction.
+
+    Args:
+        circuit: The EC experiment circuit, built with preselect=True
+        checks: The encoding checks, see preselection_checks
+        shots: Number of shots to sample (before preselection)
+        rounds: Number of error correction rounds
+        apply_pauli_frame: Whether to apply Pauli frame corrections
+        encoding_mode: '9a' or '9b'
+        decoder: Name of a registered decoder (see decoders.py)
+        readout: How the final measurements are checked, see decode_shots
+        sampler: The circuit's compiled sampler, if it was already compiled (see share_circuits in run.py)
+
+    Returns:
+        PreselectedResult
+    """
+    if sampler is None:
+        with stage('compile_sampler'):
+            sampler = circuit.compile_sampler()
+    with stage('sample'):
+        shot_data_all = sampler.sample(shots=shots)
+    mask = preselection_mask(shot_data_all, checks)
+    prep_accept = int(mask.sum())
+    print(f"After preparation → {prep_accept}/{shots} accepted ({prep_accept / shots if shots else 0.0:.3f})")
+
+    preselected = strip_flag_measurements(shot_data_all[mask], encoding_mode)
+    accepted, successful_checks = decode_shots(preselected, rounds, apply_pauli_frame, encoding_mode, decoder=decoder,
+                                               readout=readout)
+    return PreselectedResult(*summarize_decoded_shots(accepted, successful_checks, apply_pauli_frame, encoding_mode),
+                             prep_accept)
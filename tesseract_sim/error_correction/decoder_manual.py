@@ -1,9 +1,65 @@
+from typing import NamedTuple
+
 import numpy as np
 
+from tesseract_sim.common.profiling import stage
 from tesseract_sim.error_correction.correction_rules import correct_row_Z, correct_row_X, correct_column_Z, \
     correct_column_X
 
 
+def process_round(shot_data, round_start_index, flagX, flagZ, frameX, frameZ):
+    """
+    Applies the error correction logic to a single round of a shot.
+
+    Args:
+        shot_data: The measurement data for a single shot
+        round_start_index: Index of the round's first measurement in shot_data
+        flagX, flagZ: Flags carried over from the previous round (-1 if nothing is flagged)
+        frameX, frameZ: Pauli frames, updated in place
+
+    Returns:
+        "reject", or the tuple (flagX, flagZ, frameX, frameZ) to carry to the next round
+    """
+    # --- Row Pass ---
+    # The first 8 measurements are from the 4 row-stabilizers
+    row_measurements = shot_data[round_start_index : round_start_index + 8]
+    # X results are at even indices, Z at odd indices
+    measX_rows = row_measurements[0::2]
+    measZ_rows = row_measurements[1::2]
+
+    # Correct Z errors based on X syndromes
+    result = correct_row_Z(flagX, measX_rows.tolist(), frameZ)
+    if isinstance(result, str) and result == "reject":
+        return "reject"
+    flagX, _, frameZ = result
+
+    # Correct X errors based on Z syndromes
+    result = correct_row_X(flagZ, measZ_rows.tolist(), frameX)
+    if isinstance(result, str) and result == "reject":
+        return "reject"
+    flagZ, _, frameX = result
+
+    # --- Column Pass ---
+    # The next 8 measurements are from the 4 col-stabilizers
+    col_measurements = shot_data[round_start_index + 8 : round_start_index + 16]
+    measX_cols = col_measurements[0::2]
+    measZ_cols = col_measurements[1::2]
+
+    # Correct Z errors based on X syndromes
+    result = correct_column_Z(flagX, measX_cols.tolist(), frameZ)
+    if isinstance(result, str) and result == "reject":
+        return "reject"
+    flagX, _, frameZ = result
+
+    # Correct X errors based on Z syndromes
+    result = correct_column_X(flagZ, measZ_cols.tolist(), frameX)
+    if isinstance(result, str) and result == "reject":
+        return "reject"
+    flagZ, _, frameX = result
+
+    return flagX, flagZ, frameX, frameZ
+
+
 def process_shot(shot_data, rounds, measurement_offset=0):
     """
     Processes the measurement data for a single shot to apply the error correction logic.
@@ -25,43 +81,10 @@ def process_shot(shot_data, rounds, measurement_offset=0):
     
     for r in range(rounds):
         round_start_index = r * measurements_per_round + measurement_offset
-        
-        # --- Row Pass ---
-        # The first 8 measurements are from the 4 row-stabilizers
-        row_measurements = shot_data[round_start_index : round_start_index + 8]
-        # X results are at even indices, Z at odd indices
-        measX_rows = row_measurements[0::2]
-        measZ_rows = row_measurements[1::2]
-
-        # Correct Z errors based on X syndromes
-        result = correct_row_Z(flagX, measX_rows.tolist(), frameZ)
-        if isinstance(result, str) and result == "reject":
-            return "reject", None, None
-        flagX, _, frameZ = result
-
-        # Correct X errors based on Z syndromes
-        result = correct_row_X(flagZ, measZ_rows.tolist(), frameX)
-        if isinstance(result, str) and result == "reject":
-            return "reject", None, None
-        flagZ, _, frameX = result
-
-        # --- Column Pass ---
-        # The next 8 measurements are from the 4 col-stabilizers
-        col_measurements = shot_data[round_start_index + 8 : round_start_index + 16]
-        measX_cols = col_measurements[0::2]
-        measZ_cols = col_measurements[1::2]
-        
-        # Correct Z errors based on X syndromes
-        result = correct_column_Z(flagX, measX_cols.tolist(), frameZ)
+        result = process_round(shot_data, round_start_index, flagX, flagZ, frameX, frameZ)
         if isinstance(result, str) and result == "reject":
             return "reject", None, None
-        flagX, _, frameZ = result
-
-        # Correct X errors based on Z syndromes
-        result = correct_column_X(flagZ, measZ_cols.tolist(), frameX)
-        if isinstance(result, str) and result == "reject":
-            return "reject", None, None
-        flagZ, _, frameX = result
+        flagX, flagZ, frameX, frameZ = result
         
     return "accept", frameX, frameZ
 
@@ -158,7 +181,207 @@ def verify_final_state(shot_tail, frameX=None, frameZ=None, apply_pauli_frame =
 
     return successful_checks
 
-def run_manual_error_correction(circuit, shots, rounds, apply_pauli_frame = True, encoding_mode ='9b'):
+def get_decoding_parameters(encoding_mode='9b'):
+    """
+    Returns the decoding parameters implied by the encoding mode.
+
+    Returns:
+        tuple: (measurement_offset, only_z_checks, max_checks)
+            - measurement_offset: index of the first error correction measurement in a shot
+            - only_z_checks: True for 9a encoding (|++0000>), where only Z₃, Z₅ are checked
+            - max_checks: number of parity checks performed per accepted shot
+    """
+    only_z_checks = (encoding_mode == '9a')
+    measurement_offset = 0 if encoding_mode == '9a' else 2
+    max_checks = 2 if only_z_checks else 4
+    return measurement_offset, only_z_checks, max_checks
+
+
+def apply_final_frame(shot_tails, frameX=None, frameZ=None):
+    """
+    Applies the Pauli frames of a batch of shots to their last 16 measurements, as verify_final_state does.
+
+    Returns:
+        np.ndarray: Corrected copy of shot_tails (uint8)
+    """
+    corrected = np.array(shot_tails, dtype=np.uint8)
+    if frameX is None or frameZ is None:
+        return corrected
+    frameX = np.asarray(frameX) & 1
+    frameZ = np.asarray(frameZ) & 1
+    # Top half measured in X basis - apply Z frame corrections
+    corrected[:, :8] ^= frameZ[:, :8]
+    # Bottom half measured in Z basis - apply X frame corrections, plus the CNOT propagation
+    # of X errors from row 1 (0-3) to row 4 (12-15) and from row 2 (4-7) to row 3 (8-11), see verify_final_state
+    corrected[:, 8:] ^= frameX[:, 8:]
+    corrected[:, 12:16] ^= frameX[:, 0:4]
+    corrected[:, 8:12] ^= frameX[:, 4:8]
+    return corrected
+
+
+def verify_final_states(shot_tails, frameX=None, frameZ=None, apply_pauli_frame = True, only_z_checks = False):
+    """
+    Vectorized verify_final_state for a batch of shots.
+
+    Args:
+        shot_tails: 2D array with the last 16 measurements of every shot
+        frameX: 2D array of X-basis Pauli frame corrections, one row per shot (None for no corrections)
+        frameZ: 2D array of Z-basis Pauli frame corrections, one row per shot (None for no corrections)
+        apply_pauli_frame: True if the Pauli frame corrections should be applied, False otherwise
+        only_z_checks: If True, only check Z₃ and Z₅ parity (for 9a encoding with |++0000>)
+    Returns:
+        np.ndarray: Number of successful parity checks per shot
+    """
+    corrected = apply_final_frame(shot_tails, frameX, frameZ) if apply_pauli_frame \
+        else np.array(shot_tails, dtype=np.uint8)
+
+    z3_parity = corrected[:, 13] ^ corrected[:, 14]
+    z5_parity = corrected[:, 13] ^ corrected[:, 12]
+    successful_checks = (z3_parity == 0).astype(np.int64) + (z5_parity == 0)
+    if not only_z_checks:
+        x4_parity = corrected[:, 0] ^ corrected[:, 3]
+        x6_parity = corrected[:, 0] ^ corrected[:, 1]
+        successful_checks += (x4_parity == 0).astype(np.int64) + (x6_parity == 0)
+    return successful_checks
+
+
+def canonical_syndromes(shot_data_all, rounds, measurement_offset=0):
+    """
+    Extracts the syndrome record of every shot in a form that keeps only what the decoder depends on.
+
+    Each round has four groups of four stabilizer outcomes (row X, row Z, column X, column Z). The
+    correction rules only depend on a group up to complementing all four outcomes: sums 1 and 3 locate
+    the same odd one out, 0011 and 1100 apply the same correction, and 0000 and 1111 are both trivial.
+    Every group is therefore XORed with its first outcome. Without faults the outcomes of a group agree,
+    so noiseless shots map to all-zero syndromes even though the raw outcomes are random.
+
+    Returns:
+        2D boolean array (shots, 16 * rounds), decoded by process_shot exactly like the raw records
+    """
+    syndromes = np.array(shot_data_all[:, measurement_offset:measurement_offset + 16 * rounds], dtype=bool)
+    # Per round: row outcomes at 0-7 and column outcomes at 8-15, X at even and Z at odd indices
+    groups = syndromes.reshape(len(syndromes), rounds, 2, 4, 2)
+    groups ^= groups[:, :, :, :1, :]
+    return syndromes
+
+
+def decode_rounds_deduplicated(shot_data_all, rounds, measurement_offset=0):
+    """
+    Runs the error correction rounds of every shot, decoding each distinct syndrome record only once.
+
+    The syndrome records (see canonical_syndromes) are deduplicated, process_shot runs once per distinct
+    record, and the resulting status and frames are scattered back to the shots. Shots with trivial
+    syndromes take a fast path: they are accepted without corrections. The cost therefore scales with
+    the number of distinct syndrome records rather than the number of shots.
+
+    Returns:
+        tuple: (accepted, frameX, frameZ) - boolean array and (shots, 16) frames, zero for rejected shots
+    """
+    accepted = np.ones(len(shot_data_all), dtype=bool)
+    frameX = np.zeros((len(shot_data_all), 16), dtype=np.uint8)
+    frameZ = np.zeros((len(shot_data_all), 16), dtype=np.uint8)
+    if len(shot_data_all) == 0:
+        return accepted, frameX, frameZ
+
+    syndromes = canonical_syndromes(shot_data_all, rounds, measurement_offset)
+    # Fast path: with trivial syndromes nothing is ever flagged or corrected
+    nontrivial = np.flatnonzero(syndromes.any(axis=1))
+
+    if len(nontrivial):
+        packed = np.packbits(syndromes[nontrivial], axis=1)
+        keys = np.ascontiguousarray(packed).view(f"V{packed.shape[1]}").ravel()
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+        unique_accepted = np.zeros(len(first), dtype=bool)
+        unique_frameX = np.zeros((len(first), 16), dtype=np.uint8)
+        unique_frameZ = np.zeros((len(first), 16), dtype=np.uint8)
+        for u, row in enumerate(syndromes[nontrivial[first]]):
+            status, fX, fZ = process_shot(row, rounds, measurement_offset=0)
+            if status == "accept":
+                unique_accepted[u] = True
+                unique_frameX[u] = fX & 1
+                unique_frameZ[u] = fZ & 1
+
+        inverse = inverse.ravel()
+        accepted[nontrivial] = unique_accepted[inverse]
+        frameX[nontrivial] = unique_frameX[inverse]
+        frameZ[nontrivial] = unique_frameZ[inverse]
+
+    return accepted, frameX, frameZ
+
+
+def decode_shots(shot_data_all, rounds, apply_pauli_frame = True, encoding_mode = '9b', deduplicate = True,
+                 only_z_checks = None, decoder = None, readout = None):
+    """
+    Decodes a batch of sampled shots, without any sampling or reporting.
+
+    With deduplicate=True, the error correction rounds are decoded once per distinct syndrome record
+    (see decode_rounds_deduplicated), and the final state of every shot is then verified in one
+    vectorized pass. deduplicate=False decodes every shot separately and gives identical results.
+    A decoder registered in decoders.py can be selected by name instead.
+
+    Args:
+        shot_data_all: 2D array of measurement records, one row per shot
+        rounds: Number of error correction rounds in each record
+        apply_pauli_frame: Whether to apply Pauli frame corrections
+        encoding_mode: '9a' or '9b' - determines measurement offset and which parity checks to perform
+        deduplicate: Whether to decode each distinct syndrome record only once
+        only_z_checks: Overrides the parity checks implied by encoding_mode (see get_decoding_parameters)
+        decoder: Name of a registered decoder (see decoders.py), overrides deduplicate
+        readout: None to check the final parities directly (verify_final_state), 'ml' to decode the two
+            [[8,3,2]] blocks with lookup tables first, or ReadoutTables built for a noise model (see readout_decoder.py)
+
+    Returns:
+        tuple: (accepted, successful_checks)
+            - accepted: boolean array, True for shots where all rounds of ec "accept"
+            - successful_checks: number of successful parity checks per shot (0 for rejected shots)
+    """
+    measurement_offset, default_only_z_checks, _ = get_decoding_parameters(encoding_mode)
+    only_z_checks = default_only_z_checks if only_z_checks is None else only_z_checks
+
+    if decoder is None and not deduplicate and readout is None:
+        accepted = np.zeros(len(shot_data_all), dtype=bool)
+        successful_checks = np.zeros(len(shot_data_all), dtype=np.int64)
+        # Shot by shot, so the final checks are timed as part of the decoding
+        with stage('decode'):
+            for i, shot_data in enumerate(shot_data_all):
+                # Process error correction rounds with appropriate measurement offset
+                status, frameX, frameZ = process_shot(shot_data, rounds, measurement_offset=measurement_offset)
+
+                if status == "accept":
+                    accepted[i] = True
+                    # For accepted shots, count successful parity checks
+                    successful_checks[i] = verify_final_state(shot_data[-16:], frameX, frameZ, apply_pauli_frame, only_z_checks)
+
+        return accepted, successful_checks
+
+    with stage('decode'):
+        if decoder is None and deduplicate:
+            accepted, frameX, frameZ = decode_rounds_deduplicated(shot_data_all, rounds, measurement_offset)
+        else:
+            # The registered decoders build on this module, so the registry is only imported when used
+            from tesseract_sim.error_correction.decoders import DecodingLayout, get_decoder
+            accepted, frameX, frameZ = get_decoder(decoder or 'manual').decode(
+                shot_data_all, DecodingLayout(rounds, measurement_offset))
+
+    verify = verify_final_states
+    if readout is not None:
+        # The readout tables are built from the circuit modules, imported here for the same reason
+        from tesseract_sim.error_correction.readout_decoder import ReadoutTables, default_readout_tables
+        if not isinstance(readout, ReadoutTables) and readout != 'ml':
+            raise ValueError(f"Unknown readout {readout}, must be None, 'ml' or ReadoutTables")
+        verify = (default_readout_tables() if readout == 'ml' else readout).successful_checks
+
+    successful_checks = np.zeros(len(shot_data_all), dtype=np.int64)
+    if len(shot_data_all):
+        with stage('verify'):
+            checks = verify(shot_data_all[:, -16:], frameX, frameZ, apply_pauli_frame, only_z_checks)
+        successful_checks[accepted] = checks[accepted]
+    return accepted, successful_checks
+
+
+def run_manual_error_correction(circuit, shots, rounds, apply_pauli_frame = True, encoding_mode ='9b', decoder = None,
+                                readout = None, workers = 1, sampler = None):
     """
     Runs the full manual error correction simulation with final logical state verification.
     
@@ -168,42 +391,76 @@ def run_manual_error_correction(circuit, shots, rounds, apply_pauli_frame = True
         rounds: Number of error correction rounds
         apply_pauli_frame: Whether to apply Pauli frame corrections
         encoding_mode: '9a' or '9b' - determines measurement offset and which parity checks to perform
+        decoder: Name of a registered decoder (see decoders.py), default decode_rounds_deduplicated
+        readout: How the final measurements are checked, see decode_shots
+        workers: Number of decoding processes sharing the sampled records, see parallel_decoding.py
+            (None for all cores)
+        sampler: The circuit's compiled sampler, if it was already compiled (see share_circuits in run.py)
     
     Returns:
         tuple: (ec_accept, logical_shots_passed, average_percentage)
             - ec_accept: number of successful experiments (i.e all rounds of ec "accept")
             - logical_shots_passed: number of experiments when the final logical qubits measured had all qubits in the ideal state
             - average_percentage: average percentage of qubits measured correctly across all shots
+        Results that carry more than these counts (PreselectedResult, AdaptiveResult, ReweightedEstimate) are
+        NamedTuples whose first three fields are this tuple, so they can be used anywhere it is expected
+        (e.g. in sweep_results).
+    """
+    if workers != 1:
+        # Imported here, as parallel_decoding.py builds on this module
+        from tesseract_sim.error_correction.parallel_decoding import run_parallel_error_correction
+        counts = run_parallel_error_correction(circuit, shots, rounds, apply_pauli_frame, encoding_mode, workers,
+                                               decoder=decoder, readout=readout)
+        _, only_z_checks, _ = get_decoding_parameters(encoding_mode)
+        return summarize_decoding_counts(*counts, apply_pauli_frame, only_z_checks)
+
+    if sampler is None:
+        with stage('compile_sampler'):
+            sampler = circuit.compile_sampler()
+    with stage('sample'):
+        shot_data_all = sampler.sample(shots=shots)
+
+    accepted, successful_checks = decode_shots(shot_data_all, rounds, apply_pauli_frame, encoding_mode, decoder=decoder,
+                                               readout=readout)
+    return summarize_decoded_shots(accepted, successful_checks, apply_pauli_frame, encoding_mode)
+
+
+class DecodingCounts(NamedTuple):
+    """A batch of decoded shots, reduced to counts so that slices can be added up."""
+    shots: int
+    ec_accept: int
+    logical_shots_passed: int
+    total_successful_checks: int
+
+    def __add__(self, other):
+        return DecodingCounts(*(a + b for a, b in zip(self, other)))
+
+
+def summarize_decoded_shots(accepted, successful_checks, apply_pauli_frame = True, encoding_mode = '9b'):
+    """
+    Reduces decoded shots (see decode_shots) to the counts reported by run_manual_error_correction, and prints them.
+
+    Returns:
+        tuple: (ec_accept, logical_shots_passed, average_percentage), as in run_manual_error_correction
+    """
+    _, only_z_checks, max_checks = get_decoding_parameters(encoding_mode)
+    # Count shots where all parity checks pass
+    logical_shots_passed = int((successful_checks == max_checks).sum())
+    return summarize_decoding_counts(len(accepted), int(accepted.sum()), logical_shots_passed,
+                                     int(successful_checks.sum()), apply_pauli_frame, only_z_checks)
+
+
+def summarize_decoding_counts(shots, ec_accept, logical_shots_passed, total_successful_checks,
+                              apply_pauli_frame = True, only_z_checks = False):
+    """
+    summarize_decoded_shots for shots that were already reduced to counts, e.g. in separate chunks.
+
+    Returns:
+        tuple: (ec_accept, logical_shots_passed, average_percentage), as in run_manual_error_correction
     """
-    # Calculate parameters based on encoding mode
-    only_z_checks = (encoding_mode == '9a')
-    measurement_offset = 0 if encoding_mode == '9a' else 2
     max_checks = 2 if only_z_checks else 4
-    
-    sampler = circuit.compile_sampler()
-    shot_data_all = sampler.sample(shots=shots)
-
-    ec_accept = 0
-    logical_shots_passed = 0
-    total_successful_checks = 0
-    fractional_logical_passed = 0.0
-
-    for shot_data in shot_data_all:
-        # Process error correction rounds with appropriate measurement offset
-        status, frameX, frameZ = process_shot(shot_data, rounds, measurement_offset=measurement_offset)
-
-        if status == "accept":
-            ec_accept += 1
-            # For accepted shots, count successful parity checks
-            successful_checks = verify_final_state(shot_data[-16:], frameX, frameZ, apply_pauli_frame, only_z_checks)
-            total_successful_checks += successful_checks
-            
-            # Count shots where all parity checks pass
-            if successful_checks == max_checks:
-                logical_shots_passed += 1
-            
-            # Add fractional contribution for average percentage calculation
-            fractional_logical_passed += successful_checks / max_checks
+    # Fractional contribution of each accepted shot for the average percentage calculation
+    fractional_logical_passed = total_successful_checks / max_checks
 
     # Calculate average percentage of qubits measured correctly
     average_percentage = fractional_logical_passed / ec_accept if ec_accept > 0 else None
@@ -218,4 +475,4 @@ def run_manual_error_correction(circuit, shots, rounds, apply_pauli_frame = True
         print(f"Average percentage of checks passed → N/A (no accepted shots)")
     print(f"Logical shots passed (all checks) → {logical_shots_passed}/{shots}")
 
-    return ec_accept, logical_shots_passed, average_percentage 
\ No newline at end of file
+    return ec_accept, logical_shots_passed, average_percentage
\ No newline at end of file
@@ -0,0 +1,183 @@
+import argparse
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+
+from tesseract_sim.error_correction.decoder_manual import decode_rounds_deduplicated, get_decoding_parameters, \
+    process_shot
+from tesseract_sim.error_correction.jit_decoder import jit_decode_rounds
+from tesseract_sim.error_correction.streaming import MEASUREMENTS_PER_ROUND, StreamingDecoder
+
+
+class DecodingLayout(NamedTuple):
+    """Where the error correction rounds are in a measurement record."""
+    rounds: int
+    measurement_offset: int = 0
+
+    @classmethod
+    def for_encoding(cls, rounds: int, encoding_mode: str = '9b') -> "DecodingLayout":
+        measurement_offset, _, _ = get_decoding_parameters(encoding_mode)
+        return cls(rounds, measurement_offset)
+
+
+class BatchDecoder(Protocol):
+    """
+    Decodes the error correction rounds of a batch of measurement records.
+
+    decode returns (accepted, frameX, frameZ): a boolean array with one entry per shot, and the (shots, 16)
+    Pauli frames mod 2 (zero for rejected shots). The final-state checks are shared by all decoders,
+    see decode_shots.
+    """
+    name: str
+
+    def decode(self, shot_data_all: np.ndarray, layout: DecodingLayout) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        ...
+
+
+DECODERS: Dict[str, Callable[[], BatchDecoder]] = {}
+
+
+def register_decoder(name: str):
+    """Class decorator adding a decoder to the registry under name."""
+    def register(cls):
+        if name in DECODERS:
+            raise ValueError(f"Decoder {name} is already registered")
+        cls.name = name
+        DECODERS[name] = cls
+        return cls
+    return register
+
+
+def get_decoder(name: str) -> BatchDecoder:
+    if name not in DECODERS:
+        raise ValueError(f"Unknown decoder {name}, must be one of {sorted(DECODERS)}")
+    return DECODERS[name]()
+
+
+@register_decoder('manual')
+class ManualDecoder:
+    """The correction rules applied shot by shot (process_shot), the reference implementation."""
+
+    def decode(self, shot_data_all, layout):
+        accepted = np.zeros(len(shot_data_all), dtype=bool)
+        frameX = np.zeros((len(shot_data_all), 16), dtype=np.uint8)
+        frameZ = np.zeros((len(shot_data_all), 16), dtype=np.uint8)
+        for i, shot_data in enumerate(shot_data_all):
+            status, fX, fZ = process_shot(shot_data, layout.rounds, measurement_offset=layout.measurement_offset)
+            if status == "accept":
+                accepted[i] = True
+                frameX[i] = fX & 1
+                frameZ[i] = fZ & 1
+        return accepted, frameX, frameZ
+
+
+@register_decoder('dedup')
+class DeduplicatingDecoder:
+    """process_shot once per distinct syndrome record (decode_rounds_deduplicated), the default."""
+
+    def decode(self, shot_data_all, layout):
+        return decode_rounds_deduplicated(shot_data_all, layout.rounds, layout.measurement_offset)
+
+
+@register_decoder('table')
+class TableDecoder:
+    """All shots advanced round by round through the tabulated correction rules (StreamingDecoder)."""
+
+    def decode(self, shot_data_all, layout):
+        decoder = StreamingDecoder(len(shot_data_all))
+        if len(shot_data_all) == 0:
+            return decoder.accepted, decoder.frameX, decoder.frameZ
+        for r in range(layout.rounds):
+            start = layout.measurement_offset + r * MEASUREMENTS_PER_ROUND
+            decoder.push_round(shot_data_all[:, start:start + MEASUREMENTS_PER_ROUND])
+        accepted = decoder.accepted
+        decoder.frameX[~accepted] = 0
+        decoder.frameZ[~accepted] = 0
+        return accepted, decoder.frameX, decoder.frameZ
+
+
+@register_decoder('jit')
+class JitDecoder:
+    """The tabulated correction rules in one loop over all shots (decode_kernel), compiled with Numba if installed."""
+
+    def decode(self, shot_data_all, layout):
+        accepted, frameX, frameZ, _ = jit_decode_rounds(shot_data_all, layout.rounds, layout.measurement_offset,
+                                                        apply_pauli_frame=False)
+        return accepted, frameX, frameZ
+
+
+class ConformanceResult(NamedTuple):
+    """One decoder compared with the reference decoder on the same records."""
+    decoder: str
+    encoding_mode: str
+    shots: int
+    mismatched_decisions: int
+    mismatched_frames: int          # accepted shots with different frames
+    seconds: float
+
+    @property
+    def conforms(self) -> bool:
+        return self.mismatched_decisions == 0 and self.mismatched_frames == 0
+
+    @property
+    def shots_per_second(self) -> float:
+        return self.shots / self.seconds if self.seconds > 0 else float('inf')
+
+
+def check_decoders(
+    names: Optional[Sequence[str]] = None,
+    encoding_modes: Sequence[str] = ('9a', '9b'),
+    rounds: int = 3,
+    shots: int = 10000,
+    noise: float = 1e-2,
+    reference: str = 'manual',
+    seed: Optional[int] = None
+) -> List[ConformanceResult]:
+    """
+    Conformance and throughput harness: decodes the same sampled records with every decoder.
+
+    Records are sampled from the EC experiment with EC noise (see ec_noise_cfg). Every decoder's
+    decisions and frames of accepted shots are compared with the reference decoder, and its decode
+    time is measured.
+    """
+    # Imported here, so that decoding doesn't depend on the experiment runner and its circuit builders
+    from tesseract_sim.estimation.threshold import ec_noise_cfg
+    from tesseract_sim.run import build_circuit_ec_experiment
+
+    names = sorted(DECODERS) if names is None else list(names)
+    results = []
+    for encoding_mode in encoding_modes:
+        circuit = build_circuit_ec_experiment(rounds, ec_noise_cfg(noise), encoding_mode=encoding_mode)
+        shot_data = circuit.compile_sampler(seed=seed).sample(shots=shots)
+        layout = DecodingLayout.for_encoding(rounds, encoding_mode)
+        expected_accepted, expected_frameX, expected_frameZ = get_decoder(reference).decode(shot_data, layout)
+        for name in names:
+            start = time.perf_counter()
+            accepted, frameX, frameZ = get_decoder(name).decode(shot_data, layout)
+            seconds = time.perf_counter() - start
+            both = accepted & expected_accepted
+            frames_differ = (np.any(frameX[both] != expected_frameX[both], axis=1)
+                             | np.any(frameZ[both] != expected_frameZ[both], axis=1))
+            results.append(ConformanceResult(name, encoding_mode, shots, int((accepted != expected_accepted).sum()),
+                                             int(frames_differ.sum()), seconds))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check every registered decoder against the reference decoder and time it.")
+    parser.add_argument('--decoders', type=str, nargs='+', default=None, help='Decoders to check (default: all)')
+    parser.add_argument('--rounds', type=int, default=3, help='Number of error correction rounds')
+    parser.add_argument('--shots', type=int, default=10000, help='Number of shots per encoding mode')
+    parser.add_argument('--noise', type=float, default=1e-2, help='EC noise rate of the sampled records')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for Stim\'s sampler')
+    args = parser.parse_args()
+
+    print("Decoder | encoding | mismatched decisions | mismatched frames | shots/s")
+    for result in check_decoders(args.decoders, rounds=args.rounds, shots=args.shots, noise=args.noise, seed=args.seed):
+        print(f"{result.decoder} | {result.encoding_mode} | {result.mismatched_decisions} | "
+              f"{result.mismatched_frames} | {result.shots_per_second:.0f}")
+
+
+if __name__ == "__main__":
+    main()
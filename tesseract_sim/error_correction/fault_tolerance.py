@@ -0,0 +1,157 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Literal, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from tesseract_sim.common.circuit_base import channel
+from tesseract_sim.error_correction.decoder_manual import decode_shots
+from tesseract_sim.error_correction.measurement_rounds import error_correct_manual, measure_logical_operators_tesseract
+from tesseract_sim.noise.fault_locations import FaultInjector, FaultLocation, enumerate_fault_locations, gauge_records
+from tesseract_sim.noise.noise_cfg import NoiseCfg
+from tesseract_sim.run import build_circuit_ec_experiment, build_encoding_circuit
+
+Phase = Literal['enc', 'channel', 'ec', 'meas']
+PHASES = ('enc', 'channel', 'ec', 'meas')
+
+
+class FaultCase(NamedTuple):
+    """Outcome of one single fault, over all gauges it was decoded with."""
+    location: FaultLocation
+    phase: Phase
+    pauli: str
+    accepted: bool          # accepted for at least one gauge
+    logical_error: bool     # accepted with different logical check results than without the fault, for at least one gauge
+
+
+@dataclass
+class VerificationReport:
+    """Result of verify_single_faults."""
+    encoding_mode: Literal['9a', '9b']
+    rounds: int
+    apply_pauli_frame: bool
+    gauge_samples: int
+    exact_gauge: bool
+    cases: List[FaultCase] = field(default_factory=list)
+
+    @property
+    def failures(self) -> List[FaultCase]:
+        """Single faults that lead to an accepted logical error."""
+        return [case for case in self.cases if case.logical_error]
+
+    @property
+    def is_fault_tolerant(self) -> bool:
+        return not self.failures
+
+    def failures_by_phase(self) -> Dict[str, int]:
+        return dict(Counter(case.phase for case in self.failures))
+
+    def summary(self) -> str:
+        gauge = "all gauges" if self.exact_gauge else f"{self.gauge_samples} sampled gauges"
+        lines = [f"Encoding {self.encoding_mode}, rounds={self.rounds}: {len(self.cases)} single faults, "
+                 f"{len(self.failures)} accepted logical errors ({gauge})"]
+        for case in self.failures:
+            lines.append(f"  {case.phase}: {case.pauli} after {case.location.gate} on {case.location.targets} "
+                         f"(instruction {case.location.instruction_index})")
+        return "\n".join(lines)
+
+
+def verification_noise_cfg(rate: float = 1e-3) -> NoiseCfg:
+    """Noise in every phase, so that every operation of the experiment is a fault location."""
+    return NoiseCfg(
+        enc_active=True, enc_rate_1q=rate, enc_rate_2q=rate,
+        ec_active=True, ec_rate_1q=rate, ec_rate_2q=rate,
+        channel_noise_level=rate,
+        meas_active=True, meas_error_rate=rate,
+    )
+
+
+def location_phases(cfg: NoiseCfg, rounds: int, encoding_mode: str) -> List[str]:
+    """Phase of every fault location of the EC experiment, by building it phase by phase."""
+    circuit = build_encoding_circuit(cfg, encoding_mode)
+    counts = [len(enumerate_fault_locations(circuit))]
+    if cfg.channel_noise_level > 0:
+        channel(circuit, cfg.channel_noise_level, noise_type=cfg.channel_noise_type)
+    counts.append(len(enumerate_fault_locations(circuit)))
+    error_correct_manual(circuit, rounds=rounds, cfg=cfg)
+    counts.append(len(enumerate_fault_locations(circuit)))
+    measure_logical_operators_tesseract(circuit, cfg=cfg)
+    counts.append(len(enumerate_fault_locations(circuit)))
+    return [phase for phase, start, end in zip(PHASES, [0] + counts[:-1], counts) for _ in range(end - start)]
+
+
+def verify_single_faults(
+    encoding_mode: Literal['9a', '9b'] = '9a',
+    rounds: int = 1,
+    apply_pauli_frame: bool = True,
+    phases: Sequence[Phase] = PHASES,
+    cfg: Optional[NoiseCfg] = None,
+    gauge_samples: int = 256,
+    seed: Optional[int] = None
+) -> VerificationReport:
+    """
+    Injects every possible single Pauli fault into the EC experiment and decodes it.
+
+    By default every phase is noisy (see verification_noise_cfg; the rate is a placeholder, only the
+    fault locations matter): the encoding, the channel between encoding and EC, every operation of the
+    flagged stabilizer measurements in the EC rounds, and the final logical readout. All faults are
+    propagated in one batch with the FaultInjector.
+
+    Since the decoder reads raw measurement outcomes, the result of a fault can depend on the random
+    (gauge) outcomes of the noiseless circuit. Each fault is decoded on top of every gauge record (all of
+    them if there are at most gauge_samples, see gauge_records) and compared with the fault-free record
+    of the same gauge. A logical error is an accepted shot whose number of successful logical checks
+    differs from the fault-free one.
+
+    Args:
+        encoding_mode: '9a' or '9b'
+        rounds: Number of error correction rounds
+        apply_pauli_frame: Whether to apply Pauli frame corrections
+        phases: Phases whose fault locations are verified
+        cfg: Noise configuration defining the fault locations, default verification_noise_cfg()
+        gauge_samples: Enumerate the gauge if it has at most this many records, otherwise sample this many
+        seed: Seed for gauge sampling
+
+    Returns:
+        VerificationReport with the outcome of every single fault
+    """
+    cfg = verification_noise_cfg() if cfg is None else cfg
+    unknown = set(phases) - set(PHASES)
+    if unknown:
+        raise ValueError(f"Unknown phases {sorted(unknown)}, must be among {PHASES}")
+
+    circuit = build_circuit_ec_experiment(rounds, cfg, encoding_mode=encoding_mode)
+    injector = FaultInjector(circuit)
+    location_phase = location_phases(cfg, rounds, encoding_mode)
+    gauges, exact = gauge_records(circuit, gauge_samples, seed)
+
+    location, pauli, _ = injector.single_faults()
+    selected = np.array([location_phase[i] in phases for i in location], dtype=bool)
+    location, pauli = location[selected], pauli[selected]
+    report = VerificationReport(encoding_mode, rounds, apply_pauli_frame, len(gauges), exact)
+    if len(location) == 0:
+        return report
+
+    flips = injector.sample(location[:, None], pauli[:, None], randomize_gauge=False) ^ injector.reference_sample
+    unique_flips, flip_of_fault = np.unique(flips, axis=0, return_inverse=True)
+    flip_of_fault = flip_of_fault.ravel()
+
+    # Fault-free outcome of every gauge, then every distinct flip pattern on top of every gauge
+    _, reference_checks = decode_shots(gauges, rounds, apply_pauli_frame, encoding_mode)
+    records = np.logical_xor(gauges[:, None, :], unique_flips[None, :, :]).reshape(-1, flips.shape[1])
+    accepted, successful_checks = decode_shots(records, rounds, apply_pauli_frame, encoding_mode)
+    accepted = accepted.reshape(len(gauges), len(unique_flips))
+    changed = successful_checks.reshape(len(gauges), len(unique_flips)) != reference_checks[:, None]
+    any_accepted = accepted.any(axis=0)
+    any_error = (accepted & changed).any(axis=0)
+
+    for i, j, u in zip(location, pauli, flip_of_fault):
+        loc = injector.locations[i]
+        report.cases.append(FaultCase(
+            location=loc,
+            phase=location_phase[i],
+            pauli=loc.paulis[j],
+            accepted=bool(any_accepted[u]),
+            logical_error=bool(any_error[u]),
+        ))
+    return report
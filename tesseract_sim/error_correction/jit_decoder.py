@@ -0,0 +1,124 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+from tesseract_sim.error_correction.decoder_manual import get_decoding_parameters
+from tesseract_sim.error_correction.transition_tables import REJECT_FLAG, ROUND_PASSES
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+NUMBA_AVAILABLE = numba is not None
+
+# ROUND_PASSES as flat arrays the kernel can take: per pass, its tables, measurement offset and steering flag
+NEXT_FLAGS = np.stack([table.next_flag for table, _ in ROUND_PASSES])         # (4, NUM_FLAGS, NUM_PATTERNS)
+FRAME_FLIPS = np.stack([table.frame_flips for table, _ in ROUND_PASSES])      # (4, NUM_FLAGS, NUM_PATTERNS, 16)
+PASS_OFFSETS = np.array([offset for _, offset in ROUND_PASSES], dtype=np.int64)
+PASS_FLAG_IS_X = np.array([table.flag == 'X' for table, _ in ROUND_PASSES])
+
+
+def _decode_kernel(shot_data, rounds, measurement_offset, next_flags, frame_flips, pass_offsets, pass_flag_is_x,
+                   apply_pauli_frame, only_z_checks, accepted, frameX, frameZ, successful_checks):
+    """
+    process_shot and verify_final_state for every shot, in one loop over plain arrays.
+
+    The correction rules are applied through their transition tables (see transition_tables.py), so the
+    kernel has no rules of its own. Written for Numba's nopython mode; it also runs as plain Python.
+    The outputs are filled in place: frames mod 2 and checks are left zero for rejected shots.
+    """
+    num_passes = pass_offsets.shape[0]
+    for s in range(shot_data.shape[0]):
+        shot = shot_data[s]
+        flagX = -1
+        flagZ = -1
+        rejected = False
+        for r in range(rounds):
+            start = measurement_offset + 16 * r
+            for p in range(num_passes):
+                o = start + pass_offsets[p]
+                pattern = (shot[o] & 1) | (shot[o + 2] & 1) << 1 | (shot[o + 4] & 1) << 2 | (shot[o + 6] & 1) << 3
+                flag = flagX if pass_flag_is_x[p] else flagZ
+                next_flag = next_flags[p, flag + 1, pattern]
+                if next_flag == REJECT_FLAG:
+                    rejected = True
+                    break
+                # flagX steers Z corrections and flagZ steers X corrections
+                for q in range(16):
+                    if pass_flag_is_x[p]:
+                        frameZ[s, q] ^= frame_flips[p, flag + 1, pattern, q]
+                    else:
+                        frameX[s, q] ^= frame_flips[p, flag + 1, pattern, q]
+                if pass_flag_is_x[p]:
+                    flagX = next_flag
+                else:
+                    flagZ = next_flag
+            if rejected:
+                break
+        if rejected:
+            for q in range(16):
+                frameX[s, q] = 0
+                frameZ[s, q] = 0
+            continue
+        accepted[s] = True
+
+        # The final measurements with the frames applied, as in verify_final_state
+        tail = shot.shape[0] - 16
+        corrected = np.zeros(16, dtype=np.uint8)
+        for q in range(16):
+            corrected[q] = shot[tail + q] & 1
+        if apply_pauli_frame:
+            for q in range(8):
+                corrected[q] ^= frameZ[s, q]
+            for q in range(8, 16):
+                corrected[q] ^= frameX[s, q]
+            # CNOT propagation of X errors from row 1 (0-3) to row 4 (12-15) and from row 2 (4-7) to row 3 (8-11)
+            for q in range(4):
+                corrected[12 + q] ^= frameX[s, q]
+                corrected[8 + q] ^= frameX[s, 4 + q]
+        checks = int(corrected[13] == corrected[14]) + int(corrected[13] == corrected[12])
+        if not only_z_checks:
+            checks += int(corrected[0] == corrected[3]) + int(corrected[0] == corrected[1])
+        successful_checks[s] = checks
+
+
+# The compiled kernel if Numba is installed, the same function run by the interpreter otherwise
+decode_kernel = numba.njit(cache=True, nogil=True)(_decode_kernel) if NUMBA_AVAILABLE else _decode_kernel
+
+
+def jit_decode_rounds(shot_data_all, rounds, measurement_offset=0, apply_pauli_frame=True, only_z_checks=False):
+    """
+    Runs decode_kernel on a batch of measurement records.
+
+    Returns:
+        tuple: (accepted, frameX, frameZ, successful_checks) - frames mod 2 and checks are zero for rejected shots
+    """
+    shot_data = np.ascontiguousarray(shot_data_all, dtype=np.uint8)
+    shots = len(shot_data)
+    accepted = np.zeros(shots, dtype=bool)
+    frameX = np.zeros((shots, 16), dtype=np.uint8)
+    frameZ = np.zeros((shots, 16), dtype=np.uint8)
+    successful_checks = np.zeros(shots, dtype=np.int64)
+    if shots:
+        decode_kernel(shot_data, rounds, measurement_offset, NEXT_FLAGS, FRAME_FLIPS, PASS_OFFSETS, PASS_FLAG_IS_X,
+                      apply_pauli_frame, only_z_checks, accepted, frameX, frameZ, successful_checks)
+    return accepted, frameX, frameZ, successful_checks
+
+
+def jit_decode_shots(shot_data_all, rounds, apply_pauli_frame=True, encoding_mode='9b',
+                     only_z_checks: Optional[bool] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    decode_shots with the error correction rounds and the final checks fused into decode_kernel.
+
+    Without Numba, the kernel runs shot by shot in the interpreter; the default 'dedup' decoder is
+    then faster.
+
+    Returns:
+        tuple: (accepted, successful_checks), as in decode_shots
+    """
+    measurement_offset, default_only_z_checks, _ = get_decoding_parameters(encoding_mode)
+    only_z_checks = default_only_z_checks if only_z_checks is None else only_z_checks
+    accepted, _, _, successful_checks = jit_decode_rounds(shot_data_all, rounds, measurement_offset,
+                                                          apply_pauli_frame, only_z_checks)
+    return accepted, successful_checks
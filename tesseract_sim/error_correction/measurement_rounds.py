@@ -1,5 +1,5 @@
 from tesseract_sim.common.code_commons import measurement_operators_rows, measurement_operators_columns
-from tesseract_sim.noise.noise_utils import append_1q, append_2q
+from tesseract_sim.noise.noise_utils import append_1q, append_2q, append_final_measurement, append_reset_x
 from tesseract_sim.noise.noise_cfg import NoiseCfg, NO_NOISE
 
 
@@ -17,12 +17,10 @@ def measure_x_z_stabilizer(circuit, data_qubits, x_ancilla, z_ancilla, cfg: Nois
     X stabilizer is measured on x_ancilla.
     Z stabilizer is measured on z_ancilla. The Z measurement also acts as a flag for the X measurement.
     """
-    # Reset for fresh ancillas
-    append_1q(circuit, "R", x_ancilla, phase="ec", cfg=cfg)
+    # Reset for fresh ancillas, the x ancilla in |+> (RX, i.e. R followed by H)
+    append_reset_x(circuit, x_ancilla, phase="ec", cfg=cfg)
     append_1q(circuit, "R", z_ancilla, phase="ec", cfg=cfg)
 
-    append_1q(circuit, "H", x_ancilla, phase="ec", cfg=cfg)  # x ancilla should be in |+>
-
     append_2q(circuit, "CNOT", data_qubits[0], z_ancilla, phase="ec", cfg=cfg)
     append_2q(circuit, "CNOT", x_ancilla, data_qubits[1], phase="ec", cfg=cfg)
     append_2q(circuit, "CNOT", data_qubits[1], z_ancilla, phase="ec", cfg=cfg)
@@ -32,13 +30,12 @@ def measure_x_z_stabilizer(circuit, data_qubits, x_ancilla, z_ancilla, cfg: Nois
     append_2q(circuit, "CNOT", data_qubits[3], z_ancilla, phase="ec", cfg=cfg)
     append_2q(circuit, "CNOT", x_ancilla, data_qubits[2], phase="ec", cfg=cfg)
 
-    # changing x ancilla to computational basis for future measurement:
-    append_1q(circuit, "H", x_ancilla, phase="ec", cfg=cfg)
-
+    # Measuring the x ancilla in the X basis (MX, i.e. H followed by M). Both ancillas are reset before
+    # they are used again, so these are final measurements (see append_final_measurement).
     # In stim, the order of measurements in a single M command matters for rec targeting.
     # M x_ancilla, z_ancilla means x is rec(-2), z is rec(-1)
-    append_1q(circuit, "M", x_ancilla, phase="ec", cfg=cfg)
-    append_1q(circuit, "M", z_ancilla, phase="ec", cfg=cfg)
+    append_final_measurement(circuit, 'X', x_ancilla, phase="ec", cfg=cfg)
+    append_final_measurement(circuit, 'Z', z_ancilla, phase="ec", cfg=cfg)
 
 
 def error_correction_round_rows(circuit, cfg: NoiseCfg = NO_NOISE):
@@ -74,16 +71,12 @@ def measure_logical_operators_for_8_3_2_color_code(circuit, participating_qubits
     Measures the logical operators for the 8-3-2 color code.
     """
 
-    if measurement_basis == "X":
-        for q in participating_qubits:
-            append_1q(circuit, "H", q, phase="meas", cfg=cfg)
-    elif measurement_basis == "Z":
-        pass
-    else:
+    if measurement_basis not in ("X", "Z"):
         raise ValueError(f"Invalid measurement basis: {measurement_basis}")
-    
+
+    # The qubits aren't used afterwards, so X-basis measurements are MX instead of H followed by M
     for q in participating_qubits:
-        append_1q(circuit, "M", q, phase="meas", cfg=cfg)
+        append_final_measurement(circuit, measurement_basis, q, phase="meas", cfg=cfg)
 
 def measure_logical_operators_tesseract(circuit, cfg: NoiseCfg = NO_NOISE):
     """
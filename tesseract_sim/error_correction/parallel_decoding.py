@@ -0,0 +1,125 @@
+import multiprocessing
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+import numpy as np
+import stim
+
+from tesseract_sim.common.profiling import stage
+from tesseract_sim.error_correction.decoder_manual import DecodingCounts, decode_shots, get_decoding_parameters
+
+# The shared records, as attached by each worker (see _attach)
+_worker_records: Optional[np.ndarray] = None
+_worker_memory: Optional[shared_memory.SharedMemory] = None
+
+
+def sample_to_shared_memory(circuit: stim.Circuit, shots: int, chunk_shots: int = 100000,
+                            seed: Optional[int] = None) -> Tuple[shared_memory.SharedMemory, Tuple[int, int]]:
+    """
+    Samples the circuit into a new shared memory block, as bit-packed records of shape (shots, bytes per shot).
+
+    Stim samples chunk_shots at a time straight into the block, so no second full copy of the records is
+    ever held. The caller owns the block and must close and unlink it.
+
+    Returns:
+        tuple: (the shared memory block, shape of the packed records)
+    """
+    shape = (shots, (circuit.num_measurements + 7) // 8)
+    memory = shared_memory.SharedMemory(create=True, size=max(1, shape[0] * shape[1]))
+    try:
+        records = np.ndarray(shape, dtype=np.uint8, buffer=memory.buf)
+        sampler = circuit.compile_sampler(seed=seed)
+        for start in range(0, shots, chunk_shots):
+            stop = min(start + chunk_shots, shots)
+            records[start:stop] = sampler.sample(stop - start, bit_packed=True)
+        del records
+    except BaseException:
+        memory.close()
+        memory.unlink()
+        raise
+    return memory, shape
+
+
+def _attach(name, shape):
+    global _worker_memory, _worker_records
+    _worker_memory = shared_memory.SharedMemory(name=name)
+    _worker_records = np.ndarray(shape, dtype=np.uint8, buffer=_worker_memory.buf)
+
+
+def _decode_rows(task) -> DecodingCounts:
+    start, stop, num_measurements, rounds, apply_pauli_frame, encoding_mode, decoder, readout = task
+    shot_data = np.unpackbits(_worker_records[start:stop], axis=1, count=num_measurements,
+                              bitorder='little').astype(bool)
+    accepted, successful_checks = decode_shots(shot_data, rounds, apply_pauli_frame, encoding_mode, decoder=decoder,
+                                               readout=readout)
+    _, _, max_checks = get_decoding_parameters(encoding_mode)
+    return DecodingCounts(stop - start, int(accepted.sum()), int((successful_checks == max_checks).sum()),
+                          int(successful_checks.sum()))
+
+
+def decode_shared_records(memory: shared_memory.SharedMemory, shape: Tuple[int, int], num_measurements: int,
+                          rounds: int, apply_pauli_frame: bool = True, encoding_mode: str = '9b', workers: int = 1,
+                          batch_shots: int = 100000, decoder: Optional[str] = None,
+                          readout: Optional[str] = None) -> DecodingCounts:
+    """
+    Decodes bit-packed records in shared memory (see sample_to_shared_memory) with workers processes.
+
+    Every worker attaches the block once and unpacks its own batches of rows from it, so the records are
+    never pickled or copied between processes; only the counts of each batch are sent back.
+
+    Args:
+        memory, shape: The shared block and the shape of the packed records
+        num_measurements: Measurements per shot (the packed rows are padded to whole bytes)
+        rounds, apply_pauli_frame, encoding_mode, decoder, readout: As in decode_shots
+        workers: Number of processes (1 decodes in this process)
+        batch_shots: Shots decoded at a time
+
+    Returns:
+        DecodingCounts of all shots
+    """
+    if batch_shots <= 0 or workers <= 0:
+        raise ValueError(f"batch_shots and workers must be positive, got {batch_shots} and {workers}")
+
+    tasks = [(start, min(start + batch_shots, shape[0]), num_measurements, rounds, apply_pauli_frame, encoding_mode,
+              decoder, readout) for start in range(0, shape[0], batch_shots)]
+    total = DecodingCounts(0, 0, 0, 0)
+    if workers == 1:
+        global _worker_records
+        _worker_records = np.ndarray(shape, dtype=np.uint8, buffer=memory.buf)
+        try:
+            for task in tasks:
+                total += _decode_rows(task)
+        finally:
+            _worker_records = None
+    else:
+        with multiprocessing.Pool(workers, initializer=_attach, initargs=(memory.name, shape)) as pool:
+            for counts in pool.imap_unordered(_decode_rows, tasks):
+                total += counts
+    return total
+
+
+def run_parallel_error_correction(circuit: stim.Circuit, shots: int, rounds: int, apply_pauli_frame: bool = True,
+                                  encoding_mode: str = '9b', workers: Optional[int] = None, batch_shots: int = 100000,
+                                  decoder: Optional[str] = None, readout: Optional[str] = None,
+                                  seed: Optional[int] = None) -> DecodingCounts:
+    """
+    Samples shots of the circuit into shared memory and decodes them on workers processes.
+
+    Args:
+        workers: Number of decoding processes, all cores if None
+        seed: Seed for Stim's sampler
+        Others as in run_manual_error_correction
+
+    Returns:
+        DecodingCounts of all shots
+    """
+    with stage('sample'):
+        memory, shape = sample_to_shared_memory(circuit, shots, batch_shots, seed)
+    try:
+        with stage('decode'):
+            return decode_shared_records(memory, shape, circuit.num_measurements, rounds, apply_pauli_frame,
+                                         encoding_mode, workers or multiprocessing.cpu_count(), batch_shots, decoder,
+                                         readout)
+    finally:
+        memory.close()
+        memory.unlink()
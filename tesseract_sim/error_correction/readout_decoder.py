@@ -0,0 +1,179 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Literal, Optional, Sequence
+
+import numpy as np
+import stim
+
+from tesseract_sim.common.code_commons import x_stabilizers, z_stabilizers
+from tesseract_sim.error_correction.decoder_manual import apply_final_frame
+from tesseract_sim.error_correction.fault_tolerance import location_phases
+from tesseract_sim.noise.fault_locations import FaultInjector
+from tesseract_sim.noise.noise_cfg import NoiseCfg
+from tesseract_sim.run import build_circuit_ec_experiment
+
+Block = Literal['X', 'Z']
+
+# Logical parities of each [[8,3,2]] block, as pairs of local qubit indices (0-7 within the block).
+# The top half (qubits 0-7) is measured in the X basis, the bottom half (8-15) in the Z basis.
+BLOCK_LOGICALS = {
+    'X': (('X2', (0, 4)), ('X4', (0, 3)), ('X6', (0, 1))),
+    'Z': (('Z1', (5, 1)), ('Z3', (5, 6)), ('Z5', (5, 4))),
+}
+# Logical parities counted as checks, the others are gauge qubits (see verify_final_state)
+CHECKED_LOGICALS = {'X': ('X4', 'X6'), 'Z': ('Z3', 'Z5')}
+NUM_OUTCOMES = 256
+
+
+def _readout_cnots() -> stim.Circuit:
+    """The row-transversal CNOTs of measure_logical_operators_tesseract."""
+    circuit = stim.Circuit()
+    for i in range(4):
+        circuit.append("CNOT", [i, i + 12])
+    for i in range(4):
+        circuit.append("CNOT", [i + 4, i + 8])
+    return circuit
+
+
+def block_checks(block: Block) -> np.ndarray:
+    """
+    Parity checks of a block's 8 measurement outcomes, as a (checks, 8) boolean matrix.
+
+    The checks are the products of the code's stabilizers (X-type for the X block, Z-type for the Z
+    block) that the readout CNOTs map onto the block alone. Without faults every check has parity 0.
+    """
+    stabilizers = x_stabilizers if block == 'X' else z_stabilizers
+    own, other = (slice(0, 8), slice(8, 16)) if block == 'X' else (slice(8, 16), slice(0, 8))
+    cnots = _readout_cnots()
+    rows = []
+    for targets in stabilizers:
+        pauli = stim.PauliString(16)
+        for q in targets:
+            pauli[q] = block
+        propagated = pauli.after(cnots)
+        rows.append([propagated[q] != 0 for q in range(16)])
+    rows = np.array(rows, dtype=bool)
+
+    # Eliminate the other half; the rows left without support there are checks of this block
+    pivot_row = 0
+    for col in range(other.start, other.stop):
+        pivots = np.flatnonzero(rows[pivot_row:, col]) + pivot_row
+        if len(pivots) == 0:
+            continue
+        rows[[pivot_row, pivots[0]]] = rows[[pivots[0], pivot_row]]
+        below = np.flatnonzero(rows[:, col])
+        rows[below[below != pivot_row]] ^= rows[pivot_row]
+        pivot_row += 1
+    checks = rows[pivot_row:, own]
+    return checks[checks.any(axis=1)]
+
+
+def _outcome_bits() -> np.ndarray:
+    """(256, 8) bits of every packed block outcome, bit i of the byte is local qubit i."""
+    return ((np.arange(NUM_OUTCOMES)[:, None] >> np.arange(8)) & 1).astype(np.uint8)
+
+
+def block_error_prior(block: Block, cfg: Optional[NoiseCfg] = None, encoding_mode: Literal['9a', '9b'] = '9b',
+                      phases: Sequence[str] = ('meas',), bit_flip_rate: float = 1e-3) -> np.ndarray:
+    """
+    Probability of every flip pattern of the block's 8 outcomes, as a (256,) array indexed by the packed byte.
+
+    The faults of cfg in the given phases (by default the readout itself, whose faults the EC rounds
+    can't see) are independent, so the distribution of their combined flip pattern is the XOR
+    convolution of the single-location distributions, computed exactly as a product of Walsh-Hadamard
+    transforms. Without such faults (e.g. cfg=None), every outcome flips independently with
+    bit_flip_rate, and decoding reduces to minimum weight.
+    """
+    bits = _outcome_bits()
+    hadamard = np.where(((bits[:, None, :] & bits[None, :, :]).sum(axis=2) % 2) == 0, 1.0, -1.0)
+
+    transform = np.ones(NUM_OUTCOMES)
+    if cfg is not None:
+        circuit = build_circuit_ec_experiment(1, cfg, encoding_mode=encoding_mode)
+        injector = FaultInjector(circuit)
+        location_phase = location_phases(cfg, 1, encoding_mode)
+        location, pauli, probability = injector.single_faults()
+        selected = np.array([location_phase[i] in phases for i in location], dtype=bool)
+        location, pauli, probability = location[selected], pauli[selected], probability[selected]
+        if len(location):
+            flips = injector.sample(location[:, None], pauli[:, None], randomize_gauge=False) ^ injector.reference_sample
+            columns = slice(-16, -8) if block == 'X' else slice(-8, None)
+            patterns = np.packbits(flips[:, columns], axis=1, bitorder='little')[:, 0]
+            # Per location: no fault, or one of its faults with its flip pattern
+            locations, location_of_fault = np.unique(location, return_inverse=True)
+            distributions = np.zeros((len(locations), NUM_OUTCOMES))
+            distributions[:, 0] = 1.0 - np.bincount(location_of_fault, weights=probability, minlength=len(locations))
+            np.add.at(distributions, (location_of_fault, patterns), probability)
+            transform = np.prod(distributions @ hadamard, axis=0)
+
+    if np.allclose(transform, 1.0):
+        weight = bits.sum(axis=1)
+        return bit_flip_rate ** weight * (1 - bit_flip_rate) ** (8 - weight)
+    return np.clip(hadamard @ transform / NUM_OUTCOMES, 0.0, None)
+
+
+def build_block_table(block: Block, prior: np.ndarray) -> np.ndarray:
+    """
+    Most likely logical values of every block outcome, as a (256,) uint8 array indexed by the packed byte.
+
+    Bit j of an entry is the decoded value of BLOCK_LOGICALS[block][j]. Each logical is decoded on its
+    own: it is flipped if, among the flip patterns with the outcome's syndrome, those flipping the logical
+    are more likely under prior than those that don't.
+    """
+    bits = _outcome_bits()
+    checks = block_checks(block).astype(np.uint8)
+    syndromes = ((bits @ checks.T) % 2) @ (1 << np.arange(len(checks)))
+    logicals = np.stack([bits[:, a] ^ bits[:, b] for _, (a, b) in BLOCK_LOGICALS[block]], axis=1)
+
+    totals = np.bincount(syndromes, weights=prior, minlength=2 ** len(checks))
+    table = np.zeros(NUM_OUTCOMES, dtype=np.uint8)
+    for j in range(logicals.shape[1]):
+        flipping = np.bincount(syndromes, weights=prior * logicals[:, j], minlength=2 ** len(checks))
+        flip = flipping > totals / 2
+        table |= ((logicals[:, j] ^ flip[syndromes]) << j).astype(np.uint8)
+    return table
+
+
+@dataclass
+class ReadoutTables:
+    """Lookup tables decoding the two [[8,3,2]] blocks of the final measurements."""
+    x_block: np.ndarray     # (256,) decoded logicals of the top half, see build_block_table
+    z_block: np.ndarray     # (256,) decoded logicals of the bottom half
+
+    def decode(self, shot_tails: np.ndarray, frameX=None, frameZ=None, apply_pauli_frame: bool = True) -> np.ndarray:
+        """
+        Decoded logical values of every shot, as a (shots, 6) array in the order of BLOCK_LOGICALS.
+
+        The frames are applied to the final measurements as in verify_final_state, then every block is
+        a single table lookup.
+        """
+        corrected = apply_final_frame(shot_tails, frameX, frameZ) if apply_pauli_frame \
+            else np.array(shot_tails, dtype=np.uint8)
+        decoded = []
+        for table, columns in ((self.x_block, slice(0, 8)), (self.z_block, slice(8, 16))):
+            values = table[np.packbits(corrected[:, columns], axis=1, bitorder='little')[:, 0]]
+            decoded.append((values[:, None] >> np.arange(3)) & 1)
+        return np.concatenate(decoded, axis=1)
+
+    def successful_checks(self, shot_tails: np.ndarray, frameX=None, frameZ=None, apply_pauli_frame: bool = True,
+                          only_z_checks: bool = False) -> np.ndarray:
+        """Drop-in for verify_final_states: number of checked logicals decoded as 0 per shot."""
+        decoded = self.decode(shot_tails, frameX, frameZ, apply_pauli_frame)
+        names = [name for block in ('X', 'Z') for name, _ in BLOCK_LOGICALS[block]]
+        checked = list(CHECKED_LOGICALS['Z']) if only_z_checks else list(CHECKED_LOGICALS['X'] + CHECKED_LOGICALS['Z'])
+        return (decoded[:, [names.index(name) for name in checked]] == 0).sum(axis=1)
+
+
+def build_readout_tables(cfg: Optional[NoiseCfg] = None, encoding_mode: Literal['9a', '9b'] = '9b',
+                         phases: Sequence[str] = ('meas',), bit_flip_rate: float = 1e-3) -> ReadoutTables:
+    """Readout tables for the error model of cfg in the given phases, see block_error_prior."""
+    return ReadoutTables(
+        x_block=build_block_table('X', block_error_prior('X', cfg, encoding_mode, phases, bit_flip_rate)),
+        z_block=build_block_table('Z', block_error_prior('Z', cfg, encoding_mode, phases, bit_flip_rate)),
+    )
+
+
+@lru_cache(maxsize=None)
+def default_readout_tables() -> ReadoutTables:
+    """Tables for independent outcome flips, i.e. minimum-weight decoding of each block."""
+    return build_readout_tables()
@@ -0,0 +1,263 @@
+import argparse
+import math
+import time
+from dataclasses import dataclass
+from typing import Literal, Optional
+
+import numpy as np
+import stim
+
+from tesseract_sim.error_correction.decoder_manual import get_decoding_parameters, verify_final_states
+from tesseract_sim.error_correction.transition_tables import REJECT_FLAG, ROUND_PASSES, pattern_indices
+
+MEASUREMENTS_PER_ROUND = 16
+
+
+class LatencyHistogram:
+    """
+    Histogram of decode times on logarithmically spaced bins.
+
+    Bins cover min_seconds..max_seconds with bins_per_decade bins per factor of 10; faster and slower
+    times are counted in the first and last bin. Quantiles are reported as the upper edge of the bin
+    they fall in, so they are upper bounds within the bin resolution.
+    """
+
+    def __init__(self, min_seconds: float = 1e-7, max_seconds: float = 1.0, bins_per_decade: int = 10):
+        decades = math.log10(max_seconds / min_seconds)
+        self.edges = np.logspace(math.log10(min_seconds), math.log10(max_seconds),
+                                 int(round(decades * bins_per_decade)) + 1)
+        self.counts = np.zeros(len(self.edges) + 1, dtype=np.int64)
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds: float):
+        self.counts[np.searchsorted(self.edges, seconds)] += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+    @property
+    def mean(self) -> float:
+        return self.total_seconds / self.count if self.count else math.nan
+
+    def quantile(self, q: float) -> float:
+        """Upper edge of the bin holding the q-quantile, capped at the observed maximum."""
+        if not self.count:
+            return math.nan
+        index = int(np.searchsorted(np.cumsum(self.counts), q * self.count))
+        return min(float(self.edges[index]), self.max_seconds) if index < len(self.edges) else self.max_seconds
+
+    def summary(self) -> str:
+        return (f"{self.count} rounds: mean {self.mean * 1e6:.1f} us, p50 <= {self.quantile(0.5) * 1e6:.1f} us, "
+                f"p99 <= {self.quantile(0.99) * 1e6:.1f} us, max {self.max_seconds * 1e6:.1f} us")
+
+
+class StreamingDecoder:
+    """
+    Decoder fed one error correction round at a time, for one shot or a batch of shots.
+
+    The state between rounds is what process_shot carries: flagX, flagZ and the Pauli frames (mod 2),
+    plus whether the shot was rejected. Each round applies the tabulated correction rules (see
+    transition_tables), so after the same rounds the accept/reject decisions and frames match
+    process_shot. The time spent in every push_round call is recorded in latency.
+    """
+
+    def __init__(self, shots: int = 1, latency: Optional[LatencyHistogram] = None):
+        self.shots = shots
+        self.latency = LatencyHistogram() if latency is None else latency
+        self.reset()
+
+    def reset(self):
+        """Starts new shots: nothing flagged, empty frames, nothing rejected."""
+        self.flagX = np.full(self.shots, -1, dtype=np.int8)
+        self.flagZ = np.full(self.shots, -1, dtype=np.int8)
+        self.frameX = np.zeros((self.shots, 16), dtype=np.uint8)
+        self.frameZ = np.zeros((self.shots, 16), dtype=np.uint8)
+        self.rejected = np.zeros(self.shots, dtype=bool)
+        self.rounds = 0
+
+    @property
+    def accepted(self) -> np.ndarray:
+        """Shots not rejected in any round so far."""
+        return ~self.rejected
+
+    def push_round(self, round_measurements: np.ndarray) -> np.ndarray:
+        """
+        Decodes one round and returns which shots are still accepted.
+
+        Args:
+            round_measurements: The round's 16 stabilizer measurements, shape (16,) for a single shot
+                or (shots, 16) for a batch, in the order of the measurement record
+
+        Returns:
+            Boolean array (shots,) of shots not rejected so far
+        """
+        start = time.perf_counter()
+        measurements = np.asarray(round_measurements).reshape(self.shots, MEASUREMENTS_PER_ROUND)
+        if self.shots == 1:
+            self._push_single(measurements[0])
+            self.rounds += 1
+            self.latency.record(time.perf_counter() - start)
+            return ~self.rejected
+        alive = np.flatnonzero(~self.rejected)
+        flags = {'X': self.flagX[alive], 'Z': self.flagZ[alive]}
+        frames = {'X': self.frameZ, 'Z': self.frameX}   # flagX steers Z corrections and vice versa
+        for table, offset in ROUND_PASSES:
+            flag = flags[table.flag]
+            patterns = pattern_indices(measurements[alive][:, offset:offset + 8:2])
+            next_flag = table.next_flag[flag + 1, patterns]
+            frames[table.flag][alive] ^= table.frame_flips[flag + 1, patterns]
+            # Rejected shots stop here, the remaining passes index with a valid flag
+            rejected = next_flag == REJECT_FLAG
+            next_flag[rejected] = -1
+            self.rejected[alive[rejected]] = True
+            flags['X'][rejected] = -1
+            flags['Z'][rejected] = -1
+            flags[table.flag] = next_flag
+        self.flagX[alive] = flags['X']
+        self.flagZ[alive] = flags['Z']
+        self.rounds += 1
+        self.latency.record(time.perf_counter() - start)
+        return ~self.rejected
+
+    def _push_single(self, measurements: np.ndarray):
+        """push_round for a single shot, with scalar table lookups instead of array operations."""
+        if self.rejected[0]:
+            return
+        bits = measurements.tolist()
+        flags = {'X': int(self.flagX[0]), 'Z': int(self.flagZ[0])}
+        frames = {'X': self.frameZ[0], 'Z': self.frameX[0]}
+        for table, offset in ROUND_PASSES:
+            flag = flags[table.flag]
+            pattern = (bits[offset] & 1) | (bits[offset + 2] & 1) << 1 | (bits[offset + 4] & 1) << 2 \
+                | (bits[offset + 6] & 1) << 3
+            next_flag = int(table.next_flag[flag + 1, pattern])
+            if next_flag == REJECT_FLAG:
+                self.rejected[0] = True
+                return
+            frames[table.flag] ^= table.frame_flips[flag + 1, pattern]
+            flags[table.flag] = next_flag
+        self.flagX[0] = flags['X']
+        self.flagZ[0] = flags['Z']
+
+    def verify(self, shot_tails: np.ndarray, apply_pauli_frame: bool = True, only_z_checks: bool = False) -> np.ndarray:
+        """Successful parity checks of the final measurements (see verify_final_states), 0 for rejected shots."""
+        tails = np.asarray(shot_tails).reshape(self.shots, 16)
+        checks = verify_final_states(tails, self.frameX, self.frameZ, apply_pauli_frame, only_z_checks)
+        checks[self.rejected] = 0
+        return checks
+
+
+@dataclass
+class ReplayReport:
+    """Result of replaying recorded shots through a StreamingDecoder."""
+    accepted: np.ndarray
+    successful_checks: np.ndarray
+    latency: LatencyHistogram
+    round_budget: Optional[float]       # seconds between rounds, None when replayed as fast as possible
+    missed_deadlines: int = 0           # rounds whose decode took longer than round_budget
+    rounds: int = 0
+    batches: int = 0
+    elapsed_seconds: float = 0.0
+
+    def summary(self) -> str:
+        lines = [f"{len(self.accepted)} shots, {self.rounds} rounds, {int(self.accepted.sum())} accepted",
+                 f"Latency per round (batch): {self.latency.summary()}"]
+        if self.round_budget is not None:
+            lines.append(f"Round budget {self.round_budget * 1e6:.1f} us: {self.missed_deadlines} of "
+                         f"{self.latency.count} rounds missed their deadline")
+        return "\n".join(lines)
+
+
+def load_records(path: str, num_measurements: Optional[int] = None, format: str = '01') -> np.ndarray:
+    """
+    Loads recorded measurement records, one row per shot.
+
+    .npy files are loaded with NumPy; anything else is read with stim.read_shot_data_file in the given
+    format ('01', 'b8', 'r8', ...), which needs num_measurements per shot.
+    """
+    if path.endswith('.npy'):
+        return np.load(path).astype(bool)
+    if num_measurements is None:
+        raise ValueError(f"num_measurements is required to read {format} files")
+    return stim.read_shot_data_file(path=path, format=format, num_measurements=num_measurements)
+
+
+def replay_records(
+    shot_data_all: np.ndarray,
+    rounds: int,
+    encoding_mode: Literal['9a', '9b'] = '9b',
+    apply_pauli_frame: bool = True,
+    round_rate: Optional[float] = None,
+    batch_shots: int = 1
+) -> ReplayReport:
+    """
+    Pushes recorded shots through a StreamingDecoder round by round, optionally paced like hardware.
+
+    Shots are replayed batch_shots at a time (batch_shots=1 is a single shot per decoder step). With
+    round_rate (rounds per second), each round of a batch is released at its arrival time, and a round
+    whose decode takes longer than 1 / round_rate counts as a missed deadline.
+
+    Returns:
+        ReplayReport with the decisions, which equal decode_shots on the same records, and the latencies
+    """
+    if batch_shots <= 0:
+        raise ValueError(f"batch_shots must be positive, got {batch_shots}")
+    measurement_offset, only_z_checks, _ = get_decoding_parameters(encoding_mode)
+    round_budget = None if round_rate is None else 1.0 / round_rate
+    shots = len(shot_data_all)
+    report = ReplayReport(np.zeros(shots, dtype=bool), np.zeros(shots, dtype=np.int64), LatencyHistogram(),
+                          round_budget)
+
+    start = time.perf_counter()
+    decoder = None
+    for first in range(0, shots, batch_shots):
+        batch = shot_data_all[first:first + batch_shots]
+        if decoder is None or decoder.shots != len(batch):
+            decoder = StreamingDecoder(len(batch), latency=report.latency)
+        else:
+            decoder.reset()
+        arrival = time.perf_counter()
+        for r in range(rounds):
+            if round_budget is not None:
+                arrival += round_budget
+                wait = arrival - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+            round_start = measurement_offset + r * MEASUREMENTS_PER_ROUND
+            before = report.latency.total_seconds
+            decoder.push_round(batch[:, round_start:round_start + MEASUREMENTS_PER_ROUND])
+            if round_budget is not None and report.latency.total_seconds - before > round_budget:
+                report.missed_deadlines += 1
+            report.rounds += 1
+        report.accepted[first:first + len(batch)] = decoder.accepted
+        report.successful_checks[first:first + len(batch)] = decoder.verify(batch[:, -16:], apply_pauli_frame,
+                                                                            only_z_checks)
+        report.batches += 1
+    report.elapsed_seconds = time.perf_counter() - start
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded measurement records through the streaming decoder.")
+    parser.add_argument('path', type=str, help='Recorded measurements (.npy, or a Stim shot data file)')
+    parser.add_argument('--rounds', type=int, required=True, help='Number of error correction rounds per shot')
+    parser.add_argument('--encoding-mode', type=str, choices=['9a', '9b'], default='9b', help='Encoding mode')
+    parser.add_argument('--format', type=str, default='01', help='Stim shot data format of non-.npy files')
+    parser.add_argument('--num-measurements', type=int, default=None, help='Measurements per shot (Stim formats)')
+    parser.add_argument('--round-rate', type=float, default=None, help='Rounds per second to replay at (default: as fast as possible)')
+    parser.add_argument('--batch-shots', type=int, default=1, help='Shots decoded together in every step')
+    parser.add_argument('--no-pauli-frame', action='store_true', help='Disable Pauli frame corrections')
+    args = parser.parse_args()
+
+    records = load_records(args.path, args.num_measurements, args.format)
+    report = replay_records(records, args.rounds, args.encoding_mode, not args.no_pauli_frame,
+                            args.round_rate, args.batch_shots)
+    print(report.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+from typing import Callable, List, NamedTuple
+
+import numpy as np
+
+from tesseract_sim.error_correction.correction_rules import correct_row_Z, correct_row_X, correct_column_Z, \
+    correct_column_X
+
+# Flags are -1 (nothing flagged) or 0..3, tables are indexed by flag + 1
+NUM_FLAGS = 5
+# Four stabilizer outcomes m0..m3, indexed by m0 + 2*m1 + 4*m2 + 8*m3
+NUM_PATTERNS = 16
+REJECT_FLAG = -2
+
+
+class TransitionTable(NamedTuple):
+    """
+    One correction rule, tabulated over every incoming flag and measurement pattern.
+
+    next_flag[flag + 1, pattern] is the flag after the rule, or REJECT_FLAG. frame_flips[flag + 1, pattern]
+    is the 0/1 change of the Pauli frame (frames only matter mod 2, see verify_final_state).
+    """
+    name: str
+    flag: str               # 'X' if the rule reads and updates flagX (and frameZ), 'Z' for flagZ (and frameX)
+    next_flag: np.ndarray   # (NUM_FLAGS, NUM_PATTERNS) int8
+    frame_flips: np.ndarray  # (NUM_FLAGS, NUM_PATTERNS, 16) uint8
+
+
+def pattern_bits(pattern: int) -> List[int]:
+    """The four measurement outcomes of a pattern index."""
+    return [(pattern >> i) & 1 for i in range(4)]
+
+
+def pattern_indices(measurements: np.ndarray) -> np.ndarray:
+    """Pattern index of every row of four measurement outcomes, for an array of shape (..., 4)."""
+    measurements = np.asarray(measurements, dtype=np.uint8) & 1
+    return measurements[..., 0] | (measurements[..., 1] << 1) | (measurements[..., 2] << 2) | (measurements[..., 3] << 3)
+
+
+def build_transition_table(name: str, flag: str, rule: Callable) -> TransitionTable:
+    """Tabulates a rule of correction_rules by calling it on every flag and measurement pattern."""
+    next_flag = np.full((NUM_FLAGS, NUM_PATTERNS), REJECT_FLAG, dtype=np.int8)
+    frame_flips = np.zeros((NUM_FLAGS, NUM_PATTERNS, 16), dtype=np.uint8)
+    for f in range(-1, 4):
+        for pattern in range(NUM_PATTERNS):
+            result = rule(f, pattern_bits(pattern), np.zeros(16, dtype=np.int64))
+            if isinstance(result, str) and result == "reject":
+                continue
+            new_flag, _, frame = result
+            next_flag[f + 1, pattern] = new_flag
+            frame_flips[f + 1, pattern] = frame & 1
+    return TransitionTable(name, flag, next_flag, frame_flips)
+
+
+# The rules in the order process_round applies them: row pass (X then Z syndromes), then column pass
+ROUND_PASSES = (
+    # (table, measurement offset within the round: X syndromes at even and Z syndromes at odd indices)
+    (build_transition_table('correct_row_Z', 'X', correct_row_Z), 0),
+    (build_transition_table('correct_row_X', 'Z', correct_row_X), 1),
+    (build_transition_table('correct_column_Z', 'X', correct_column_Z), 8),
+    (build_transition_table('correct_column_X', 'Z', correct_column_X), 9),
+)
@@ -0,0 +1,110 @@
+from typing import Literal, NamedTuple, Optional, Tuple
+
+from tesseract_sim.error_correction.decoder_manual import decode_shots, get_decoding_parameters
+from tesseract_sim.estimation.intervals import IntervalMethod, binomial_interval
+from tesseract_sim.noise.noise_cfg import NoiseCfg, NO_NOISE
+from tesseract_sim.run import build_circuit_ec_experiment
+
+
+class AdaptiveResult(NamedTuple):
+    """
+    Result of an adaptively sampled data point, starting with the counts of run_manual_error_correction.
+    """
+    ec_accept: int
+    logical_shots_passed: int
+    average_percentage: Optional[float]
+    shots: int                                  # shots actually sampled for this point
+    acceptance_interval: Tuple[float, float]    # interval on ec_accept / shots
+    logical_interval: Tuple[float, float]       # interval on logical_shots_passed / ec_accept
+    converged: bool                             # True if both intervals reached the target width
+
+
+def run_adaptive_ec_experiment(
+    rounds: int,
+    shots: int,
+    cfg: NoiseCfg = NO_NOISE,
+    apply_pauli_frame: bool = True,
+    encoding_mode: Literal['9a', '9b'] = '9b',
+    target_width: float = 0.02,
+    batch_shots: int = 1000,
+    confidence: float = 0.95,
+    method: IntervalMethod = 'wilson',
+    min_acceptance: float = 0.0
+) -> AdaptiveResult:
+    """
+    Runs the EC experiment in increments of batch_shots until the point is resolved.
+
+    After every batch, confidence intervals are computed for the acceptance rate and for the
+    conditional logical success rate (logical_pass/accepted). Sampling stops as soon as:
+    - both intervals are narrower than target_width, or
+    - the upper bound of the acceptance interval is below min_acceptance (the point is
+      resolved as "always rejected" and the conditional rate is not worth resolving), or
+    - shots (the per-point maximum) have been sampled.
+
+    The circuit is built and compiled once per point; each batch is decoded independently.
+
+    Args:
+        rounds: Number of error correction rounds
+        shots: Maximum number of shots for this point
+        cfg: Noise configuration
+        apply_pauli_frame: Whether to apply Pauli frame corrections
+        encoding_mode: '9a' or '9b'
+        target_width: Target width of both confidence intervals
+        batch_shots: Number of shots sampled per increment
+        confidence: Confidence level of the intervals
+        method: 'wilson' or 'clopper-pearson'
+        min_acceptance: Stop early if the acceptance rate is confidently below this value
+
+    Returns:
+        AdaptiveResult with counts, shots used and the final intervals
+    """
+    if batch_shots <= 0:
+        raise ValueError(f"batch_shots must be positive, got {batch_shots}")
+
+    _, _, max_checks = get_decoding_parameters(encoding_mode)
+    circuit = build_circuit_ec_experiment(rounds, cfg, encoding_mode=encoding_mode)
+    sampler = circuit.compile_sampler()
+
+    shots_used = 0
+    ec_accept = 0
+    logical_shots_passed = 0
+    total_successful_checks = 0
+    acceptance_interval = (0.0, 1.0)
+    logical_interval = (0.0, 1.0)
+    converged = False
+
+    while shots_used < shots:
+        batch = min(batch_shots, shots - shots_used)
+        accepted, successful_checks = decode_shots(sampler.sample(shots=batch), rounds, apply_pauli_frame, encoding_mode)
+
+        shots_used += batch
+        ec_accept += int(accepted.sum())
+        logical_shots_passed += int((successful_checks == max_checks).sum())
+        total_successful_checks += int(successful_checks.sum())
+
+        acceptance_interval = binomial_interval(ec_accept, shots_used, confidence, method)
+        logical_interval = binomial_interval(logical_shots_passed, ec_accept, confidence, method)
+
+        if (acceptance_interval[1] - acceptance_interval[0] <= target_width
+                and logical_interval[1] - logical_interval[0] <= target_width):
+            converged = True
+            break
+        if acceptance_interval[1] < min_acceptance:
+            break
+
+    average_percentage = total_successful_checks / max_checks / ec_accept if ec_accept > 0 else None
+
+    print(f"--- Adaptive EC experiment: rounds={rounds}, encoding=Fig {encoding_mode} ---")
+    print(f"Shots used → {shots_used}/{shots} ({'converged' if converged else 'not converged'})")
+    print(f"Acceptance → {ec_accept}/{shots_used}, interval [{acceptance_interval[0]:.4f}, {acceptance_interval[1]:.4f}]")
+    print(f"Logical success | accepted → {logical_shots_passed}/{ec_accept}, interval [{logical_interval[0]:.4f}, {logical_interval[1]:.4f}]")
+
+    return AdaptiveResult(
+        ec_accept=ec_accept,
+        logical_shots_passed=logical_shots_passed,
+        average_percentage=average_percentage,
+        shots=shots_used,
+        acceptance_interval=acceptance_interval,
+        logical_interval=logical_interval,
+        converged=converged
+    )
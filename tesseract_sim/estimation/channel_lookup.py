@@ -0,0 +1,205 @@
+import itertools
+import math
+from functools import lru_cache
+from typing import Dict, Literal, Optional, Tuple
+
+import numpy as np
+
+from tesseract_sim.error_correction.decoder_manual import decode_shots, summarize_decoded_shots
+from tesseract_sim.estimation.sweep import canonical_cfg
+from tesseract_sim.noise.fault_locations import FaultInjector
+from tesseract_sim.noise.noise_cfg import NO_NOISE, NoiseCfg
+from tesseract_sim.run import build_circuit_ec_experiment, run_simulation_ec_experiment
+
+NUM_DATA_QUBITS = 16
+MEASUREMENTS_PER_ROUND = 16
+# Every distinct pattern is simulated once, so the lookup only beats simulating every shot when the
+# expected number of distinct patterns is at most this fraction of the shots
+MAX_PATTERN_FRACTION = 0.1
+
+
+class ChannelLookup:
+    """
+    Outcomes of the EC experiment with channel noise only, cached per Pauli pattern.
+
+    Without any other noise, the decoded outcome of a shot (acceptance, frames, final checks) only depends
+    on the Pauli pattern the channel applied to the 16 data qubits. A pattern is a key with 2 bits per
+    qubit: 0 for no fault, otherwise 1 + the index of the channel's Pauli. The measurement flips of a new
+    pattern are propagated once, with FaultInjector on a single round: the noiseless rounds leave the data
+    untouched, so every further round repeats the flips of the first. The outcome of each pattern is then
+    decoded once per round count and Pauli frame setting, and shots are evaluated by lookup.
+
+    Only the 9a encoding is supported: the 9b records are decoded with a measurement offset that mixes
+    encoding and round measurements (see the TODO in test_ec_experiment_no_noise.py), so their decoded
+    outcome also depends on random measurement outcomes.
+    """
+
+    def __init__(self, encoding_mode: Literal['9a', '9b'] = '9a', noise_type: str = "DEPOLARIZE1"):
+        if encoding_mode != '9a':
+            raise ValueError(f"The channel lookup only supports the 9a encoding, got {encoding_mode}")
+        self.encoding_mode = encoding_mode
+        self.noise_type = noise_type
+        # The channel's 16 target groups are the only fault locations of this circuit
+        circuit = build_circuit_ec_experiment(
+            1, NoiseCfg(channel_noise_level=0.5, channel_noise_type=noise_type), encoding_mode=encoding_mode)
+        self._injector = FaultInjector(circuit)
+        locations = self._injector.locations
+        if [location.targets for location in locations] != [(q,) for q in range(NUM_DATA_QUBITS)]:
+            raise ValueError(f"Channel noise {noise_type} doesn't act on each data qubit on its own")
+        self.paulis = locations[0].paulis
+        self.weights = np.array(locations[0].weights)
+        self.num_encoding_measurements = circuit.num_measurements - 2 * MEASUREMENTS_PER_ROUND
+
+        # The cached keys in sorted order, with the row of each key's flips and outcomes
+        self._keys = np.zeros(0, dtype=np.uint64)
+        self._rows = np.zeros(0, dtype=np.int64)
+        self._num_patterns = 0
+        # Rows are appended to these buffers, which grow geometrically (see _append)
+        self._flips = np.zeros((0, 2 * MEASUREMENTS_PER_ROUND), dtype=bool)    # first round, then final flips
+        self._references: Dict[int, np.ndarray] = {}
+        self._decoded: Dict[Tuple[int, bool], Tuple[int, np.ndarray, np.ndarray]] = {}
+
+    @property
+    def num_patterns(self) -> int:
+        return self._num_patterns
+
+    def expected_patterns(self, shots: int, noise_level: float) -> float:
+        """
+        Expected number of distinct Pauli patterns among shots patterns drawn from the channel.
+
+        Patterns with the same number of faults of each Pauli are equally likely, so the sum runs over
+        these fault counts rather than over the patterns.
+        """
+        expected = 0.0
+        for counts in itertools.product(range(NUM_DATA_QUBITS + 1), repeat=len(self.weights)):
+            faults = sum(counts)
+            if faults > NUM_DATA_QUBITS:
+                continue
+            probability = (1 - noise_level) ** (NUM_DATA_QUBITS - faults) * math.prod(
+                (noise_level * weight) ** count for count, weight in zip(counts, self.weights))
+            multiplicity = math.factorial(NUM_DATA_QUBITS) // (math.factorial(NUM_DATA_QUBITS - faults) *
+                                                               math.prod(math.factorial(count) for count in counts))
+            # 1 - (1 - probability) ** shots, without losing small probabilities to rounding
+            expected += multiplicity * (1.0 if probability >= 1 else -math.expm1(shots * math.log1p(-probability)))
+        return expected
+
+    def sample_patterns(self, shots: int, noise_level: float, rng: np.random.Generator) -> np.ndarray:
+        """Keys of shots Pauli patterns drawn from the channel, as a (shots,) uint64 array."""
+        faulty = rng.random((shots, NUM_DATA_QUBITS)) < noise_level
+        codes = np.zeros((shots, NUM_DATA_QUBITS), dtype=np.uint64)
+        codes[faulty] = 1 + rng.choice(len(self.weights), size=int(faulty.sum()), p=self.weights)
+        return (codes << (2 * np.arange(NUM_DATA_QUBITS, dtype=np.uint64))).sum(axis=1, dtype=np.uint64)
+
+    def _add_patterns(self, keys: np.ndarray) -> None:
+        """Propagates the patterns of the sorted unique keys that aren't cached yet, in one FlipSimulator batch."""
+        positions = np.searchsorted(self._keys, keys)
+        cached = np.zeros(len(keys), dtype=bool)
+        inside = positions < len(self._keys)
+        cached[inside] = self._keys[positions[inside]] == keys[inside]
+        new = keys[~cached]
+        if not len(new):
+            return
+        codes = ((new[:, None] >> (2 * np.arange(NUM_DATA_QUBITS, dtype=np.uint64))) & 3).astype(np.int64)
+        # The fault location of qubit q is location q, see __init__
+        locations = np.where(codes > 0, np.arange(NUM_DATA_QUBITS), -1)
+        records = self._injector.sample(locations, codes - 1, randomize_gauge=False)
+        flips = records[:, self.num_encoding_measurements:] ^ self._injector.reference_sample[self.num_encoding_measurements:]
+
+        # new is sorted, so inserting it at its positions keeps the keys sorted
+        rows = np.arange(self._num_patterns, self._num_patterns + len(new), dtype=np.int64)
+        self._keys = np.insert(self._keys, positions[~cached], new)
+        self._rows = np.insert(self._rows, positions[~cached], rows)
+        self._flips = _append(self._flips, self._num_patterns, flips)
+        self._num_patterns += len(new)
+
+    def _reference(self, rounds: int) -> np.ndarray:
+        if rounds not in self._references:
+            circuit = build_circuit_ec_experiment(rounds, NO_NOISE, encoding_mode=self.encoding_mode)
+            self._references[rounds] = circuit.reference_sample()
+        return self._references[rounds]
+
+    def _decode_new_patterns(self, rounds: int, apply_pauli_frame: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """Outcomes of every cached pattern for this setting, decoding only the ones not decoded before."""
+        decoded, accepted, successful_checks = self._decoded.get(
+            (rounds, apply_pauli_frame), (0, np.zeros(0, dtype=bool), np.zeros(0, dtype=np.int64)))
+        if decoded < self.num_patterns:
+            flips = self._flips[decoded:self.num_patterns]
+            round_flips = np.tile(flips[:, :MEASUREMENTS_PER_ROUND], (1, rounds))
+            encoding_flips = np.zeros((len(flips), self.num_encoding_measurements), dtype=bool)
+            records = np.concatenate([encoding_flips, round_flips, flips[:, MEASUREMENTS_PER_ROUND:]], axis=1)
+            new_accepted, new_checks = decode_shots(records ^ self._reference(rounds), rounds, apply_pauli_frame,
+                                                    self.encoding_mode)
+            accepted = _append(accepted, decoded, new_accepted)
+            successful_checks = _append(successful_checks, decoded, new_checks)
+            self._decoded[(rounds, apply_pauli_frame)] = (self.num_patterns, accepted, successful_checks)
+        return accepted[:self.num_patterns], successful_checks[:self.num_patterns]
+
+    def evaluate(self, keys: np.ndarray, rounds: int, apply_pauli_frame: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Decoded outcome of every shot given by its pattern key, as decode_shots returns it.
+
+        Returns:
+            tuple: (accepted, successful_checks)
+        """
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        self._add_patterns(unique_keys)
+        accepted, successful_checks = self._decode_new_patterns(rounds, apply_pauli_frame)
+        rows = self._rows[np.searchsorted(self._keys, unique_keys)][inverse.ravel()]
+        return accepted[rows], successful_checks[rows]
+
+
+def _append(buffer: np.ndarray, size: int, rows: np.ndarray) -> np.ndarray:
+    """Writes rows after the first size rows of buffer, doubling its capacity when they don't fit."""
+    if size + len(rows) > len(buffer):
+        grown = np.zeros((max(2 * len(buffer), size + len(rows)),) + buffer.shape[1:], dtype=buffer.dtype)
+        grown[:size] = buffer[:size]
+        buffer = grown
+    buffer[size:size + len(rows)] = rows
+    return buffer
+
+
+@lru_cache(maxsize=None)
+def channel_lookup(encoding_mode: Literal['9a', '9b'] = '9a', noise_type: str = "DEPOLARIZE1") -> ChannelLookup:
+    """The shared ChannelLookup of an encoding mode and channel, so the cache grows across a sweep."""
+    return ChannelLookup(encoding_mode, noise_type)
+
+
+def _channel_noise_only(cfg: NoiseCfg) -> bool:
+    return canonical_cfg(cfg) == canonical_cfg(NoiseCfg(channel_noise_level=cfg.channel_noise_level,
+                                                        channel_noise_type=cfg.channel_noise_type))
+
+
+def run_channel_lookup_experiment(rounds: int, shots: int, cfg: NoiseCfg, apply_pauli_frame: bool = True,
+                                  encoding_mode: Literal['9a', '9b'] = '9a', seed: Optional[int] = None):
+    """
+    Drop-in for run_simulation_ec_experiment when cfg has channel noise only, without per-shot simulation.
+
+    The channel's Pauli patterns are sampled with NumPy and evaluated through channel_lookup.
+
+    Returns:
+        tuple: (ec_accept, logical_shots_passed, average_percentage), as in run_manual_error_correction
+    """
+    if not _channel_noise_only(cfg):
+        raise ValueError("The channel lookup only applies to configurations with channel noise only")
+
+    print(f"--- Running Channel-Noise Lookup (Rounds: {rounds}, Shots: {shots}, Encoding: Fig {encoding_mode}) ---")
+    lookup = channel_lookup(encoding_mode, cfg.channel_noise_type)
+    keys = lookup.sample_patterns(shots, cfg.channel_noise_level, np.random.default_rng(seed))
+    accepted, successful_checks = lookup.evaluate(keys, rounds, apply_pauli_frame)
+    return summarize_decoded_shots(accepted, successful_checks, apply_pauli_frame, encoding_mode)
+
+
+def run_channel_noise_experiment(rounds: int, shots: int, cfg: NoiseCfg, apply_pauli_frame: bool = True,
+                                 encoding_mode: Literal['9a', '9b'] = '9a'):
+    """
+    run_channel_lookup_experiment where the lookup pays off, run_simulation_ec_experiment elsewhere.
+
+    The lookup is used for 9a configurations with channel noise only, when the shots are expected to
+    draw fewer than MAX_PATTERN_FRACTION * shots distinct patterns. At higher noise almost every shot
+    has a pattern of its own, and simulating each pattern once costs more than sampling the shots.
+    """
+    if (encoding_mode == '9a' and _channel_noise_only(cfg) and
+            channel_lookup(encoding_mode, cfg.channel_noise_type).expected_patterns(
+                shots, cfg.channel_noise_level) <= MAX_PATTERN_FRACTION * shots):
+        return run_channel_lookup_experiment(rounds, shots, cfg, apply_pauli_frame, encoding_mode)
+    return run_simulation_ec_experiment(rounds, shots, cfg, apply_pauli_frame, encoding_mode)
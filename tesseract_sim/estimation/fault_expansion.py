@@ -0,0 +1,258 @@
+import argparse
+from dataclasses import dataclass
+from typing import Literal, Optional, Tuple
+
+import numpy as np
+
+from tesseract_sim.error_correction.decoder_manual import decode_shots, get_decoding_parameters
+from tesseract_sim.estimation.threshold import ec_noise_cfg
+from tesseract_sim.noise.fault_locations import FaultInjector, gauge_records
+from tesseract_sim.noise.noise_cfg import NoiseCfg
+from tesseract_sim.run import build_circuit_ec_experiment
+
+
+@dataclass
+class FaultExpansion:
+    """
+    Low-order expansion of the EC experiment's rejection and logical failure probabilities in the noise rate.
+
+    With every fault location's probability proportional to the noise rate p (as in a sweep over
+    cfg_builder(p)), the probabilities are polynomials in p. The coefficients of p^0, p^1 and p^2 are
+    obtained exactly from all single faults and pairs of faults. Logical failure means an accepted shot
+    that fails at least one parity check, so logical_failure is the joint probability.
+
+    If the gauge (the random outcomes of the noiseless circuit) was sampled instead of enumerated, the
+    coefficients are averages over gauge_samples random gauges and *_std are their standard errors.
+    """
+    rounds: int
+    encoding_mode: Literal['9a', '9b']
+    rejection: np.ndarray               # coefficients of p^0, p^1 (and p^2 if max_order=2)
+    rejection_std: np.ndarray
+    logical_failure: np.ndarray
+    logical_failure_std: np.ndarray
+    gauge_samples: int
+    exact_gauge: bool
+    single_configurations: int          # distinct single-fault flip patterns decoded
+    pair_configurations: int            # distinct pair flip patterns decoded
+
+    def rejection_rate(self, p):
+        return np.polyval(self.rejection[::-1], p)
+
+    def logical_failure_rate(self, p):
+        return np.polyval(self.logical_failure[::-1], p)
+
+    def acceptance_rate(self, p):
+        return 1.0 - self.rejection_rate(p)
+
+    def conditional_failure_rate(self, p):
+        """Logical failure rate given acceptance, 1 - logical_pass/accepted as plotted by plot_acceptance_rates.py."""
+        return self.logical_failure_rate(p) / self.acceptance_rate(p)
+
+
+class _CachedDecoder:
+    """Decodes measurement records, decoding every distinct record only once."""
+
+    def __init__(self, rounds: int, apply_pauli_frame: bool, encoding_mode: str, batch_size: int = 100000):
+        self.rounds = rounds
+        self.apply_pauli_frame = apply_pauli_frame
+        self.encoding_mode = encoding_mode
+        self.batch_size = batch_size
+        _, _, self.max_checks = get_decoding_parameters(encoding_mode)
+        # Sorted packed records (as fixed-size byte strings) and their (rejected, logical failure) outcomes
+        self._keys: Optional[np.ndarray] = None
+        self._outcomes = np.zeros((0, 2), dtype=bool)
+
+    def decode(self, records: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (rejected, logical_failure) boolean arrays for the records."""
+        packed = np.packbits(records, axis=1)
+        keys = np.ascontiguousarray(packed).view(f"V{packed.shape[1]}").ravel()
+        unique, inverse = np.unique(keys, return_inverse=True)
+        if self._keys is None:
+            self._keys = unique[:0]
+
+        position = np.minimum(np.searchsorted(self._keys, unique), max(len(self._keys) - 1, 0))
+        known = (self._keys[position] == unique) if len(self._keys) else np.zeros(len(unique), dtype=bool)
+        outcomes = np.zeros((len(unique), 2), dtype=bool)
+        outcomes[known] = self._outcomes[position[known]]
+
+        missing = np.flatnonzero(~known)
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            shots = np.unpackbits(unique[batch].view(np.uint8).reshape(len(batch), -1), axis=1,
+                                  count=records.shape[1]).astype(bool)
+            accepted, successful_checks = decode_shots(shots, self.rounds, self.apply_pauli_frame, self.encoding_mode)
+            outcomes[batch, 0] = ~accepted
+            outcomes[batch, 1] = accepted & (successful_checks < self.max_checks)
+
+        if len(missing):
+            keys = np.concatenate([self._keys, unique[missing]])
+            order = np.argsort(keys, kind='stable')
+            self._keys = keys[order]
+            self._outcomes = np.concatenate([self._outcomes, outcomes[missing]])[order]
+        inverse = inverse.ravel()
+        return outcomes[inverse, 0], outcomes[inverse, 1]
+
+
+def expand_fault_probabilities(
+    rounds: int,
+    encoding_mode: Literal['9a', '9b'] = '9a',
+    apply_pauli_frame: bool = True,
+    cfg: Optional[NoiseCfg] = None,
+    noise: float = 1e-3,
+    gauge_samples: int = 16,
+    max_order: int = 2,
+    pair_chunk: int = 20000,
+    seed: Optional[int] = None
+) -> FaultExpansion:
+    """
+    Computes the p^0, p^1 and p^2 coefficients of the rejection and logical failure probabilities.
+
+    cfg fixes where noise acts and the relative rates; its rates are taken to be proportional to the
+    noise rate p, with cfg itself corresponding to p = noise. The default is the EC noise sweep of
+    plot_acceptance_rates.py (ec_rate_1q = ec_rate_2q = p).
+
+    Every single fault (location and Pauli) is propagated once with the FaultInjector. Since the effect
+    of faults on the measurement record is linear, the record of a pair of faults is the XOR of their
+    single-fault flips, so pairs don't need to be simulated. Faults with identical flips are merged, the
+    records are XORed with noiseless gauge records and every distinct record is decoded once.
+
+    The number of pair configurations grows quadratically with the number of distinct single-fault
+    flips (roughly with rounds^2); max_order=1 skips them.
+
+    Args:
+        rounds: Number of error correction rounds
+        encoding_mode: '9a' or '9b'
+        apply_pauli_frame: Whether to apply Pauli frame corrections
+        cfg: Noise configuration at p = noise, default ec_noise_cfg(noise)
+        noise: Noise rate that cfg corresponds to
+        gauge_samples: Enumerate the gauge if it has at most this many records, otherwise sample this many
+        max_order: 1 or 2
+        pair_chunk: Number of pair configurations processed at a time (bounds memory)
+        seed: Seed for gauge sampling
+
+    Returns:
+        FaultExpansion with the coefficients
+    """
+    if max_order not in (1, 2):
+        raise ValueError(f"max_order must be 1 or 2, got {max_order}")
+    cfg = ec_noise_cfg(noise) if cfg is None else cfg
+
+    circuit = build_circuit_ec_experiment(rounds, cfg, encoding_mode=encoding_mode)
+    injector = FaultInjector(circuit)
+    decoder = _CachedDecoder(rounds, apply_pauli_frame, encoding_mode)
+    gauges, exact = gauge_records(circuit, gauge_samples, seed)
+    num_gauges = len(gauges)
+
+    def outcomes(flips: np.ndarray) -> np.ndarray:
+        """(2, gauges, configurations) rejection and failure indicators of flip patterns under every gauge."""
+        records = np.logical_xor(gauges[:, None, :], flips[None, :, :]).reshape(-1, flips.shape[1])
+        rejected, failed = decoder.decode(records)
+        return np.stack([rejected, failed]).reshape(2, num_gauges, len(flips)).astype(np.float64)
+
+    # Single faults, in units of p: alpha_f = probability of fault f at p = 1
+    location, pauli, probability = injector.single_faults()
+    alpha = probability / noise
+    pi = np.array([loc.probability for loc in injector.locations]) / noise
+    total = pi.sum()
+    if len(location):
+        flips = injector.sample(location[:, None], pauli[:, None], randomize_gauge=False) ^ injector.reference_sample
+    else:
+        flips = np.zeros((0, injector.num_measurements), dtype=bool)
+    unique_flips, flip_of_fault = np.unique(np.packbits(flips, axis=1), axis=0, return_inverse=True)
+    flip_of_fault = flip_of_fault.ravel()
+    unique_flips = np.unpackbits(unique_flips, axis=1, count=injector.num_measurements).astype(bool)
+    num_unique = len(unique_flips)
+
+    r0 = outcomes(np.zeros((1, injector.num_measurements), dtype=bool))[:, :, 0]      # (2, gauges)
+    r1 = outcomes(unique_flips)                                                       # (2, gauges, unique)
+    a = np.bincount(flip_of_fault, weights=alpha, minlength=num_unique)
+
+    c0 = r0
+    c1 = r1 @ a - total * r0
+    c2 = np.zeros_like(r0)
+    pair_configurations = 0
+    if max_order == 2 and num_unique:
+        # Ordered pairs of faults at the same location are not pairs of faults; their weight per pair of
+        # flip patterns is S_uv = sum over locations of b_{loc,u} b_{loc,v}
+        same_u, same_v, same_w = [], [], []
+        for loc in np.unique(location):
+            faults = np.flatnonzero(location == loc)
+            u, b = np.unique(flip_of_fault[faults], return_inverse=True)
+            b = np.bincount(b.ravel(), weights=alpha[faults], minlength=len(u))
+            same_u.append(np.repeat(u, len(u)))
+            same_v.append(np.tile(u, len(u)))
+            same_w.append(np.outer(b, b).ravel())
+        same_index = np.concatenate(same_u) * num_unique + np.concatenate(same_v)
+        same_index, inverse = np.unique(same_index, return_inverse=True)
+        same_weight = np.bincount(inverse.ravel(), weights=np.concatenate(same_w))
+
+        # Unordered pairs (u <= v) of distinct flip patterns, with weights (a_u a_v - S_uv) and half that on the diagonal
+        pair_u, pair_v = np.triu_indices(num_unique)
+        for start in range(0, len(pair_u), pair_chunk):
+            u, v = pair_u[start:start + pair_chunk], pair_v[start:start + pair_chunk]
+            weight = a[u] * a[v]
+            index = u * num_unique + v
+            hit = np.searchsorted(same_index, index)
+            hit = np.minimum(hit, len(same_index) - 1)
+            weight = weight - np.where(same_index[hit] == index, same_weight[hit], 0.0)
+            weight = np.where(u == v, weight / 2, weight)
+            keep = weight != 0
+            if not keep.any():
+                continue
+            pair_flips = unique_flips[u[keep]] ^ unique_flips[v[keep]]
+            pair_configurations += len(np.unique(np.packbits(pair_flips, axis=1), axis=0))
+            c2 += outcomes(pair_flips) @ weight[keep]
+
+        # Single-fault and no-fault terms of the p^2 coefficient
+        pi_of_fault = pi[location]
+        c2 -= total * (r1 @ a) - r1 @ np.bincount(flip_of_fault, weights=alpha * pi_of_fault, minlength=num_unique)
+        c2 += r0 * (total ** 2 - np.sum(pi ** 2)) / 2
+
+    coefficients = np.stack([c0, c1, c2], axis=-1)                 # (2, gauges, 3)
+    mean = coefficients.mean(axis=1)
+    std = np.zeros_like(mean) if exact or num_gauges < 2 else coefficients.std(axis=1, ddof=1) / np.sqrt(num_gauges)
+    mean, std = mean[:, :max_order + 1], std[:, :max_order + 1]
+
+    return FaultExpansion(
+        rounds=rounds,
+        encoding_mode=encoding_mode,
+        rejection=mean[0],
+        rejection_std=std[0],
+        logical_failure=mean[1],
+        logical_failure_std=std[1],
+        gauge_samples=num_gauges,
+        exact_gauge=exact,
+        single_configurations=num_unique,
+        pair_configurations=pair_configurations,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exact low-order coefficients of rejection and logical failure in the EC noise rate.")
+    parser.add_argument('--rounds', type=int, nargs='+', default=[1], help='Round counts to expand')
+    parser.add_argument('--encoding-mode', type=str, choices=['9a', '9b'], default='9a', help='Encoding mode')
+    parser.add_argument('--no-apply-pauli-frame', action='store_false', dest='apply_pauli_frame', help='Disable Pauli frame corrections')
+    parser.add_argument('--gauge-samples', type=int, default=16, help='Enumerate the gauge if it has at most this many records, otherwise sample this many')
+    parser.add_argument('--max-order', type=int, choices=[1, 2], default=2, help='Highest order to compute')
+    parser.add_argument('--noise-levels', type=float, nargs='*', default=[1e-4, 1e-3], help='Noise rates to evaluate the expansion at')
+    args = parser.parse_args()
+
+    for r in args.rounds:
+        expansion = expand_fault_probabilities(
+            r, args.encoding_mode, args.apply_pauli_frame,
+            gauge_samples=args.gauge_samples, max_order=args.max_order
+        )
+        gauge = "exact" if expansion.exact_gauge else f"{expansion.gauge_samples} sampled"
+        print(f"\nRounds={r} (gauge: {gauge}, {expansion.single_configurations} single / "
+              f"{expansion.pair_configurations} pair configurations)")
+        for name, coefficients, std in [("rejection", expansion.rejection, expansion.rejection_std),
+                                        ("logical failure", expansion.logical_failure, expansion.logical_failure_std)]:
+            terms = " + ".join(f"({c:.6g} ± {s:.2g}) p^{k}" for k, (c, s) in enumerate(zip(coefficients, std)))
+            print(f"  {name}: {terms}")
+        for p in args.noise_levels:
+            print(f"  p={p:g}: acceptance={expansion.acceptance_rate(p):.6g}, "
+                  f"logical failure | accepted={expansion.conditional_failure_rate(p):.6g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import math
+from statistics import NormalDist
+from typing import Literal, Tuple
+
+IntervalMethod = Literal['wilson', 'clopper-pearson']
+
+
+def _z_value(confidence: float) -> float:
+    """Two-sided standard normal quantile for the given confidence level."""
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def wilson_interval(successes: int, trials: int, confidence: float = 0.95) -> Tuple[float, float]:
+    """
+    Wilson score interval for a binomial proportion.
+
+    Returns (0.0, 1.0) when there are no trials, i.e. nothing is known about the proportion.
+    """
+    if trials <= 0:
+        return 0.0, 1.0
+    z = _z_value(confidence)
+    p_hat = successes / trials
+    denominator = 1 + z * z / trials
+    center = (p_hat + z * z / (2 * trials)) / denominator
+    half_width = z * math.sqrt(p_hat * (1 - p_hat) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+
+def _betacf(a: float, b: float, x: float, max_iter: int = 10000, eps: float = 1e-15) -> float:
+    """Continued fraction for the regularized incomplete beta function (modified Lentz method)."""
+    tiny = 1e-300
+    qab = a + b
+    qap = a + 1.0
+    qam = a - 1.0
+    c = 1.0
+    d = 1.0 - qab * x / qap
+    if abs(d) < tiny:
+        d = tiny
+    d = 1.0 / d
+    h = d
+    for m in range(1, max_iter + 1):
+        m2 = 2 * m
+        aa = m * (b - m) * x / ((qam + m2) * (a + m2))
+        d = 1.0 + aa * d
+        d = tiny if abs(d) < tiny else d
+        c = 1.0 + aa / c
+        c = tiny if abs(c) < tiny else c
+        d = 1.0 / d
+        h *= d * c
+        aa = -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))
+        d = 1.0 + aa * d
+        d = tiny if abs(d) < tiny else d
+        c = 1.0 + aa / c
+        c = tiny if abs(c) < tiny else c
+        d = 1.0 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1.0) < eps:
+            break
+    return h
+
+
+def regularized_incomplete_beta(a: float, b: float, x: float) -> float:
+    """Regularized incomplete beta function I_x(a, b), i.e. the CDF of Beta(a, b) at x."""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    log_front = (math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+                 + a * math.log(x) + b * math.log1p(-x))
+    front = math.exp(log_front)
+    # The continued fraction converges quickly only on one side of the mean
+    if x < (a + 1.0) / (a + b + 2.0):
+        return front * _betacf(a, b, x) / a
+    return 1.0 - front * _betacf(b, a, 1.0 - x) / b
+
+
+def _beta_quantile(q: float, a: float, b: float) -> float:
+    """Inverts the Beta(a, b) CDF by bisection."""
+    lo, hi = 0.0, 1.0
+    for _ in range(100):
+        mid = (lo + hi) / 2
+        if regularized_incomplete_beta(a, b, mid) < q:
+            lo = mid
+        else:
+            hi = mid
+    return (lo + hi) / 2
+
+
+def clopper_pearson_interval(successes: int, trials: int, confidence: float = 0.95) -> Tuple[float, float]:
+    """
+    Exact (Clopper-Pearson) interval for a binomial proportion.
+
+    Returns (0.0, 1.0) when there are no trials.
+    """
+    if trials <= 0:
+        return 0.0, 1.0
+    alpha = 1 - confidence
+    lower = 0.0 if successes == 0 else _beta_quantile(alpha / 2, successes, trials - successes + 1)
+    upper = 1.0 if successes == trials else _beta_quantile(1 - alpha / 2, successes + 1, trials - successes)
+    return lower, upper
+
+
+def binomial_interval(successes: int, trials: int, confidence: float = 0.95,
+                      method: IntervalMethod = 'wilson') -> Tuple[float, float]:
+    """Confidence interval for a binomial proportion using the requested method."""
+    if method == 'wilson':
+        return wilson_interval(successes, trials, confidence)
+    elif method == 'clopper-pearson':
+        return clopper_pearson_interval(successes, trials, confidence)
+    else:
+        raise ValueError(f"Invalid interval method: {method}. Must be 'wilson' or 'clopper-pearson'")
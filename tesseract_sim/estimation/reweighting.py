@@ -0,0 +1,271 @@
+import math
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Literal, NamedTuple, Optional, Tuple
+
+import numpy as np
+import stim
+
+from tesseract_sim.error_correction.decoder_manual import decode_shots, get_decoding_parameters
+from tesseract_sim.estimation.stratified import sample_distinct
+from tesseract_sim.noise.fault_locations import FaultInjector, group_fault_classes, match_location_rates
+from tesseract_sim.noise.noise_cfg import NoiseCfg
+from tesseract_sim.run import build_circuit_ec_experiment
+
+
+class ReweightedEstimate(NamedTuple):
+    """
+    Estimate at a target noise configuration, obtained by reweighting shots sampled at a reference.
+
+    The first three fields are the counts of run_manual_error_correction, as effective (fractional) counts
+    out of shots. When the effective sample size is too small, the estimate is refused: reliable is False and
+    the counts are NaN.
+    """
+    ec_accept: float
+    logical_shots_passed: float
+    average_percentage: Optional[float]
+    shots: int                          # shots sampled at the reference
+    acceptance_std: float
+    logical_success_std: float
+    effective_sample_size: float        # (sum w)^2 / sum w^2
+    reliable: bool
+
+
+@dataclass
+class ReferenceSample:
+    """
+    Decoded shots of the EC experiment sampled at a reference noise configuration.
+
+    Every fault location faults independently with its reference probability. For each shot, the faulty
+    locations are recorded (fault_locations, padded with -1), together with the resulting fault count per
+    class of locations (fault_counts). Since the decoded outcome only depends on which faults occurred,
+    the shots can be reweighted by the likelihood ratio of their faults to estimate any configuration
+    whose fault locations are a subset of the reference's, see estimate().
+    """
+    rounds: int
+    encoding_mode: Literal['9a', '9b']
+    circuit: stim.Circuit
+    reference_rates: np.ndarray         # probability of every fault location
+    classes: List[Tuple[str, float]]    # (noise gate, reference probability) per class
+    fault_locations: np.ndarray         # (shots, max faults) indices of the faulty locations, -1 padded
+    fault_counts: np.ndarray            # (shots, classes) number of faults per class
+    accepted: np.ndarray                # (shots,) bool
+    successful_checks: np.ndarray       # (shots,) int
+    max_checks: int
+
+    @property
+    def shots(self) -> int:
+        return len(self.accepted)
+
+    def log_weights(self, target_rates: np.ndarray) -> np.ndarray:
+        """
+        Log likelihood ratio of every shot's faults between target_rates and the reference rates.
+
+        A shot with faults at the locations F has weight
+            prod_{i in F} q_i / p_i * prod_{i not in F} (1 - q_i) / (1 - p_i).
+        """
+        p, q = self.reference_rates, np.asarray(target_rates, dtype=np.float64)
+        # Locations that fault in every shot at the target rates have no "no fault" factor (log(1 - q) = -inf)
+        certain = q >= 1
+        with np.errstate(divide='ignore'):
+            log_no_fault = np.where(certain, 0.0, np.log1p(-q) - np.log1p(-p))
+            log_fault = np.log(q) - np.log(p)
+        # Shots start from "no location faults" and switch the faulty locations over
+        per_location = np.append(log_fault - log_no_fault, 0.0)     # index -1 is padding
+        log_w = log_no_fault.sum() + per_location[self.fault_locations].sum(axis=1)
+        if certain.any():
+            # Shots without all of the certain faults are impossible at the target rates
+            hits = np.append(certain, False)[self.fault_locations].sum(axis=1)
+            log_w[hits < certain.sum()] = -np.inf
+        return log_w
+
+    def estimate_rates(self, target_rates: np.ndarray, min_ess_fraction: float = 0.1) -> ReweightedEstimate:
+        """
+        Self-normalized importance-sampling estimate for the given probability of every fault location.
+
+        The estimate is refused if the effective sample size is below min_ess_fraction of the shots, as
+        the weights are then dominated by a few shots and the estimate and its error bars can't be trusted.
+        """
+        log_w = self.log_weights(target_rates)
+        if self.shots == 0 or not np.isfinite(log_w.max()):
+            return self._refused(0.0)
+        w = np.exp(log_w - log_w.max())
+        total = w.sum()
+        ess = float(total ** 2 / np.sum(w ** 2))
+        if ess < min_ess_fraction * self.shots:
+            return self._refused(ess)
+
+        accepted = self.accepted.astype(np.float64)
+        passed = (self.successful_checks == self.max_checks).astype(np.float64)
+        acceptance = float(w @ accepted / total)
+        acceptance_std = math.sqrt(float(np.sum(w ** 2 * (accepted - acceptance) ** 2)) / total ** 2)
+
+        w_accepted = w * accepted
+        total_accepted = w_accepted.sum()
+        if total_accepted > 0:
+            logical_success = float(w_accepted @ passed / total_accepted)
+            logical_success_std = math.sqrt(
+                float(np.sum(w_accepted ** 2 * (passed - logical_success) ** 2)) / total_accepted ** 2)
+            average_percentage = float(w_accepted @ self.successful_checks / total_accepted / self.max_checks)
+        else:
+            logical_success, logical_success_std, average_percentage = 0.0, 0.0, None
+
+        return ReweightedEstimate(
+            ec_accept=acceptance * self.shots,
+            logical_shots_passed=acceptance * logical_success * self.shots,
+            average_percentage=average_percentage,
+            shots=self.shots,
+            acceptance_std=acceptance_std,
+            logical_success_std=logical_success_std,
+            effective_sample_size=ess,
+            reliable=True,
+        )
+
+    def estimate(self, cfg: NoiseCfg, min_ess_fraction: float = 0.1) -> ReweightedEstimate:
+        """
+        Estimate at the noise configuration cfg.
+
+        Raises:
+            ValueError: If cfg has noise where the reference configuration has none
+        """
+        target = build_circuit_ec_experiment(self.rounds, cfg, encoding_mode=self.encoding_mode)
+        return self.estimate_rates(match_location_rates(self.circuit, target), min_ess_fraction)
+
+    def estimate_scaled(self, scale: float, min_ess_fraction: float = 0.1) -> ReweightedEstimate:
+        """Estimate with every reference probability multiplied by scale."""
+        return self.estimate_rates(np.minimum(self.reference_rates * scale, 1.0), min_ess_fraction)
+
+    def _refused(self, ess: float) -> ReweightedEstimate:
+        return ReweightedEstimate(
+            ec_accept=math.nan, logical_shots_passed=math.nan, average_percentage=None, shots=self.shots,
+            acceptance_std=math.nan, logical_success_std=math.nan, effective_sample_size=ess, reliable=False,
+        )
+
+
+def _sample_faults(members: List[np.ndarray], rates: List[float], shots: int,
+                   rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Draws independent faults at every location, one class of equally likely locations at a time.
+
+    Returns (fault_locations, fault_counts): the faulty locations per shot, -1 padded, and their number per class.
+    """
+    fault_counts = np.stack([rng.binomial(len(m), p, size=shots) for m, p in zip(members, rates)], axis=1) \
+        if members else np.zeros((shots, 0), dtype=np.int64)
+    columns = []
+    for c, m in enumerate(members):
+        width = int(fault_counts[:, c].max()) if shots else 0
+        block = np.full((shots, width), -1, dtype=np.int64)
+        for k in range(1, width + 1):
+            rows = np.flatnonzero(fault_counts[:, c] == k)
+            if len(rows):
+                block[rows, :k] = m[sample_distinct(len(m), k, len(rows), rng)]
+        columns.append(block)
+    if not columns or sum(b.shape[1] for b in columns) == 0:
+        return np.full((shots, 1), -1, dtype=np.int64), fault_counts
+    return np.concatenate(columns, axis=1), fault_counts
+
+
+def sample_reference(
+    rounds: int,
+    shots: int,
+    cfg: NoiseCfg,
+    apply_pauli_frame: bool = True,
+    encoding_mode: Literal['9a', '9b'] = '9b',
+    batch_shots: int = 10000,
+    seed: Optional[int] = None
+) -> ReferenceSample:
+    """
+    Samples and decodes the EC experiment at the reference configuration cfg, recording every shot's faults.
+
+    The reference should be at the high-noise end of the rates that will be estimated from it (the
+    reference must have noise wherever the targets do), and close enough to them that their fault
+    distributions overlap, see ReferenceSample.estimate_rates.
+
+    Args:
+        rounds: Number of error correction rounds
+        shots: Number of shots
+        cfg: Reference noise configuration
+        apply_pauli_frame: Whether to apply Pauli frame corrections
+        encoding_mode: '9a' or '9b'
+        batch_shots: Number of shots simulated and decoded at a time
+        seed: Seed for fault placement and Stim's gauge randomization
+
+    Returns:
+        ReferenceSample with the faults and decoded outcome of every shot
+    """
+    if batch_shots <= 0:
+        raise ValueError(f"batch_shots must be positive, got {batch_shots}")
+
+    rng = np.random.default_rng(seed)
+    _, _, max_checks = get_decoding_parameters(encoding_mode)
+    circuit = build_circuit_ec_experiment(rounds, cfg, encoding_mode=encoding_mode)
+    injector = FaultInjector(circuit)
+    classes, class_of_location = group_fault_classes(injector.locations)
+    members = [np.flatnonzero(class_of_location == c) for c in range(len(classes))]
+
+    location_batches, count_batches, accepted_batches, checks_batches = [], [], [], []
+    for start in range(0, shots, batch_shots):
+        batch = min(batch_shots, shots - start)
+        fault_locations, fault_counts = _sample_faults(members, [p for _, p in classes], batch, rng)
+        fault_paulis = injector.sample_paulis(fault_locations, rng)
+        records = injector.sample(fault_locations, fault_paulis, seed=int(rng.integers(2 ** 63)))
+        accepted, successful_checks = decode_shots(records, rounds, apply_pauli_frame, encoding_mode)
+        location_batches.append(fault_locations)
+        count_batches.append(fault_counts)
+        accepted_batches.append(accepted)
+        checks_batches.append(successful_checks)
+
+    width = max([b.shape[1] for b in location_batches], default=1)
+    fault_locations = np.full((shots, width), -1, dtype=np.int64)
+    row = 0
+    for b in location_batches:
+        fault_locations[row:row + len(b), :b.shape[1]] = b
+        row += len(b)
+
+    return ReferenceSample(
+        rounds=rounds,
+        encoding_mode=encoding_mode,
+        circuit=circuit,
+        reference_rates=np.array([loc.probability for loc in injector.locations], dtype=np.float64),
+        classes=classes,
+        fault_locations=fault_locations,
+        fault_counts=np.concatenate(count_batches) if count_batches else np.zeros((0, len(classes)), dtype=np.int64),
+        accepted=np.concatenate(accepted_batches) if accepted_batches else np.zeros(0, dtype=bool),
+        successful_checks=np.concatenate(checks_batches) if checks_batches else np.zeros(0, dtype=np.int64),
+        max_checks=max_checks,
+    )
+
+
+def reweighted_sweep_results(
+    rounds: List[int],
+    noise_levels: List[float],
+    shots: int,
+    cfg_builder: Callable[[float], NoiseCfg],
+    reference_noise: float,
+    apply_pauli_frame: bool = True,
+    encoding_mode: Literal['9a', '9b'] = '9b',
+    min_ess_fraction: float = 0.1,
+    seed: Optional[int] = None
+) -> Dict[float, List[ReweightedEstimate]]:
+    """
+    Sweep over rounds and noise levels that samples each round count once, at cfg_builder(reference_noise).
+
+    Every noise level is estimated by reweighting the reference shots. The result has the same layout
+    as sweep_results in plot_acceptance_rates.py: noise level -> list of estimates, one per round.
+    """
+    rng = np.random.default_rng(seed)
+    references = []
+    for r in rounds:
+        print(f"Sampling reference for rounds={r}, noise={reference_noise}")
+        references.append(sample_reference(r, shots, cfg_builder(reference_noise), apply_pauli_frame,
+                                           encoding_mode, seed=int(rng.integers(2 ** 63))))
+
+    results: Dict[float, List[ReweightedEstimate]] = {}
+    for noise in noise_levels:
+        results[noise] = []
+        for r, reference in zip(rounds, references):
+            estimate = reference.estimate(cfg_builder(noise), min_ess_fraction)
+            if not estimate.reliable:
+                print(f"Refusing to reweight rounds={r} to noise={noise}: effective sample size "
+                      f"{estimate.effective_sample_size:.1f} of {reference.shots} shots")
+            results[noise].append(estimate)
+    return results
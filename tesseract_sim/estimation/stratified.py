@@ -0,0 +1,183 @@
+import itertools
+import math
+from dataclasses import dataclass
+from typing import List, Literal, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tesseract_sim.error_correction.decoder_manual import decode_shots, get_decoding_parameters
+from tesseract_sim.noise.fault_locations import FaultInjector, group_fault_classes
+from tesseract_sim.noise.noise_cfg import NoiseCfg
+from tesseract_sim.run import build_circuit_ec_experiment
+
+
+class StratumResult(NamedTuple):
+    """Decoded shots of one stratum, i.e. shots with exactly fault_counts[c] faults in class c."""
+    fault_counts: Tuple[int, ...]
+    shots: int
+    accepted: int
+    logical_passed: int
+
+
+class StratifiedEstimate(NamedTuple):
+    """Estimates combined from all strata at one noise scale."""
+    scale: float
+    acceptance: float
+    acceptance_std: float
+    logical_success: Optional[float]        # logical_pass/accepted, None if nothing is accepted
+    logical_success_std: Optional[float]
+    truncation: float                       # probability of configurations with more than max_faults faults
+
+
+def sample_distinct(num_items: int, k: int, shots: int, rng: np.random.Generator) -> np.ndarray:
+    """Draws k distinct items out of num_items for each shot, as a (shots, k) array."""
+    if k * k > num_items:
+        # Rejection would redraw most rows, take the first k of a random permutation instead
+        return np.argsort(rng.random((shots, num_items)), axis=1)[:, :k]
+    draws = rng.integers(num_items, size=(shots, k))
+    if k < 2:
+        return draws
+    while True:
+        sorted_draws = np.sort(draws, axis=1)
+        repeated = np.any(sorted_draws[:, 1:] == sorted_draws[:, :-1], axis=1)
+        if not repeated.any():
+            return draws
+        draws[repeated] = rng.integers(num_items, size=(int(repeated.sum()), k))
+
+
+def _binomial_pmf(k: int, n: int, p: float) -> float:
+    if p <= 0:
+        return 1.0 if k == 0 else 0.0
+    if p >= 1:
+        return 1.0 if k == n else 0.0
+    log_pmf = (math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
+               + k * math.log(p) + (n - k) * math.log1p(-p))
+    return math.exp(log_pmf)
+
+
+@dataclass
+class FaultStrata:
+    """
+    Fault-count strata of one circuit.
+
+    Fault locations are grouped into classes sharing a noise channel and reference probability
+    (e.g. the EC 1q, EC 2q and measurement rates). Each stratum holds decoded shots with a fixed
+    number of faults per class, placed uniformly at random among that class's locations. Since the
+    fault locations within a class are equally likely, the strata can be recombined with binomial
+    weights for any rates, see estimate().
+    """
+    classes: List[Tuple[str, float]]    # (noise gate, reference probability) per class
+    class_sizes: List[int]              # number of fault locations per class
+    strata: List[StratumResult]
+    max_checks: int
+
+    def stratum_weights(self, scale: float = 1.0) -> np.ndarray:
+        """Probability of each stratum when every class rate is scale times its reference probability."""
+        rates = [min(scale * p, 1.0) for _, p in self.classes]
+        return np.array([
+            math.prod(_binomial_pmf(k, n, q) for k, n, q in zip(s.fault_counts, self.class_sizes, rates))
+            for s in self.strata
+        ])
+
+    def estimate(self, scale: float = 1.0) -> StratifiedEstimate:
+        """
+        Combines the strata at the given noise scale.
+
+        All class probabilities are multiplied by scale, so scale=1 reproduces the configuration the
+        strata were sampled from. Configurations with more faults than were sampled are not included;
+        their total probability is reported as truncation.
+        """
+        weights = self.stratum_weights(scale)
+        shots = np.array([s.shots for s in self.strata], dtype=np.float64)
+        accept = np.array([s.accepted for s in self.strata]) / shots
+        passed = np.array([s.logical_passed for s in self.strata]) / shots
+
+        acceptance = float(weights @ accept)
+        logical = float(weights @ passed)
+        var_accept = float(np.sum(weights ** 2 * accept * (1 - accept) / shots))
+        var_logical = float(np.sum(weights ** 2 * passed * (1 - passed) / shots))
+        # Passing shots are a subset of accepted shots
+        cov = float(np.sum(weights ** 2 * passed * (1 - accept) / shots))
+
+        if acceptance > 0:
+            ratio = logical / acceptance
+            var_ratio = max(var_logical - 2 * ratio * cov + ratio ** 2 * var_accept, 0.0) / acceptance ** 2
+            logical_success, logical_success_std = ratio, math.sqrt(var_ratio)
+        else:
+            logical_success, logical_success_std = None, None
+
+        return StratifiedEstimate(
+            scale=scale,
+            acceptance=acceptance,
+            acceptance_std=math.sqrt(var_accept),
+            logical_success=logical_success,
+            logical_success_std=logical_success_std,
+            truncation=max(1.0 - float(weights.sum()), 0.0),
+        )
+
+    def estimate_sweep(self, scales: Sequence[float]) -> List[StratifiedEstimate]:
+        """Estimates for several noise scales from the same strata."""
+        return [self.estimate(scale) for scale in scales]
+
+
+def run_stratified_ec_experiment(
+    rounds: int,
+    cfg: NoiseCfg,
+    apply_pauli_frame: bool = True,
+    encoding_mode: Literal['9a', '9b'] = '9b',
+    max_faults: int = 2,
+    shots_per_stratum: int = 1000,
+    seed: Optional[int] = None
+) -> FaultStrata:
+    """
+    Samples fault-count strata of the EC experiment circuit, for k = 0..max_faults total faults.
+
+    cfg is the reference configuration: it determines where noise acts and the relative rates of the
+    fault classes. The returned FaultStrata can then be evaluated at any multiple of these rates, e.g.
+    a sweep over ec_rate_1q = ec_rate_2q = noise is covered by strata sampled at one reference noise
+    with scale = noise / reference.
+
+    Each stratum is evaluated through the regular decoder (decode_shots).
+
+    Args:
+        rounds: Number of error correction rounds
+        cfg: Reference noise configuration
+        apply_pauli_frame: Whether to apply Pauli frame corrections
+        encoding_mode: '9a' or '9b'
+        max_faults: Largest total number of faults sampled
+        shots_per_stratum: Shots decoded per stratum
+        seed: Seed for fault placement and Stim's gauge randomization
+
+    Returns:
+        FaultStrata holding every stratum's decoded counts
+    """
+    rng = np.random.default_rng(seed)
+    _, _, max_checks = get_decoding_parameters(encoding_mode)
+    circuit = build_circuit_ec_experiment(rounds, cfg, encoding_mode=encoding_mode)
+    injector = FaultInjector(circuit)
+    classes, class_of_location = group_fault_classes(injector.locations)
+    members = [np.flatnonzero(class_of_location == c) for c in range(len(classes))]
+    class_sizes = [len(m) for m in members]
+
+    strata = []
+    for fault_counts in itertools.product(range(max_faults + 1), repeat=len(classes)):
+        if sum(fault_counts) > max_faults or any(k > n for k, n in zip(fault_counts, class_sizes)):
+            continue
+        columns = [members[c][sample_distinct(len(members[c]), k, shots_per_stratum, rng)]
+                   for c, k in enumerate(fault_counts) if k > 0]
+        fault_locations = (np.concatenate(columns, axis=1) if columns
+                           else np.full((shots_per_stratum, 1), -1, dtype=np.int64))
+        fault_paulis = injector.sample_paulis(fault_locations, rng)
+        records = injector.sample(fault_locations, fault_paulis, seed=int(rng.integers(2 ** 63)))
+
+        accepted, successful_checks = decode_shots(records, rounds, apply_pauli_frame, encoding_mode)
+        strata.append(StratumResult(
+            fault_counts=tuple(fault_counts),
+            shots=shots_per_stratum,
+            accepted=int(accepted.sum()),
+            logical_passed=int((successful_checks == max_checks).sum()),
+        ))
+        print(f"Stratum {fault_counts}: {strata[-1].accepted}/{shots_per_stratum} accepted, "
+              f"{strata[-1].logical_passed} passed")
+
+    return FaultStrata(classes=classes, class_sizes=class_sizes, strata=strata, max_checks=max_checks)
@@ -0,0 +1,210 @@
+import argparse
+import itertools
+from dataclasses import astuple, replace
+from typing import Dict, Iterable, List, Literal, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tesseract_sim.error_correction.decoder_manual import get_decoding_parameters, verify_final_states
+from tesseract_sim.error_correction.decoders import DECODERS, DecodingLayout, get_decoder
+from tesseract_sim.noise.noise_cfg import NO_NOISE, NoiseCfg
+from tesseract_sim.run import build_circuit_ec_experiment
+from tesseract_sim.storage.circuit_cache import cached_circuit_ec_experiment
+
+# Noise rates that can be swept, with the flag that switches their phase on
+NOISE_AXES = {
+    'enc_rate_1q': 'enc_active',
+    'enc_rate_2q': 'enc_active',
+    'ec_rate_1q': 'ec_active',
+    'ec_rate_2q': 'ec_active',
+    'meas_error_rate': 'meas_active',
+    'channel_noise_level': None,
+}
+SWEEP_AXES = tuple(NOISE_AXES) + ('channel_noise_type', 'rounds', 'encoding_mode', 'apply_pauli_frame')
+
+SWEEP_DTYPE = np.dtype([
+    ('rounds', np.int64),
+    ('encoding_mode', 'U2'),
+    ('apply_pauli_frame', np.bool_),
+    *((name, np.float64) for name in NOISE_AXES),
+    ('shots', np.int64),
+    ('ec_accept', np.int64),
+    ('logical_shots_passed', np.int64),
+    ('average_percentage', np.float64),     # NaN without accepted shots
+    ('circuit', np.int64),                  # index of the distinct circuit the point was sampled from
+])
+
+
+class SweepPoint(NamedTuple):
+    """One point of a sweep: the EC experiment with rounds and cfg, decoded with the given settings."""
+    rounds: int
+    cfg: NoiseCfg
+    encoding_mode: Literal['9a', '9b'] = '9b'
+    apply_pauli_frame: bool = True
+
+
+def cartesian_grid(**axes: Sequence) -> List[Dict[str, object]]:
+    """
+    Every combination of the values of the given axes, as a list of {axis: value} points.
+
+    The axes are the names in SWEEP_AXES, e.g. cartesian_grid(ec_rate_2q=[1e-3, 2e-3], rounds=[1, 5]).
+    """
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(axes[name] for name in names))]
+
+
+def make_points(grid: Iterable[Mapping[str, object]], base: NoiseCfg = NO_NOISE) -> List[SweepPoint]:
+    """
+    Sweep points of an explicit grid, a sequence of {axis: value} points (see cartesian_grid).
+
+    Axes that a point doesn't set are taken from base (rounds defaults to 1). A noise rate set by a point
+    also switches its phase on, so e.g. {'meas_error_rate': 1e-3} is enough for measurement noise.
+    """
+    points = []
+    for entry in grid:
+        unknown = set(entry) - set(SWEEP_AXES)
+        if unknown:
+            raise ValueError(f"Unknown sweep axes {sorted(unknown)}, must be among {SWEEP_AXES}")
+        noise = {name: entry[name] for name in entry if name in NOISE_AXES or name == 'channel_noise_type'}
+        for name, flag in NOISE_AXES.items():
+            if flag is not None and name in entry and entry[name] > 0:
+                noise[flag] = True
+        points.append(SweepPoint(
+            rounds=int(entry.get('rounds', 1)),
+            cfg=replace(base, **noise),
+            encoding_mode=entry.get('encoding_mode', '9b'),
+            apply_pauli_frame=bool(entry.get('apply_pauli_frame', True)),
+        ))
+    return points
+
+
+def canonical_cfg(cfg: NoiseCfg) -> NoiseCfg:
+    """
+    The configuration that builds the same circuit as cfg, with everything that has no effect reset.
+
+    Inactive phases have their rates zeroed and phases without noise are switched off, so configurations
+    that differ only in settings without effect compare equal.
+    """
+    enc_active = cfg.enc_active and (cfg.enc_rate_1q > 0 or cfg.enc_rate_2q > 0)
+    ec_active = cfg.ec_active and (cfg.ec_rate_1q > 0 or cfg.ec_rate_2q > 0)
+    meas_active = cfg.meas_active and cfg.meas_error_rate > 0
+    channel = cfg.channel_noise_level > 0
+    return replace(
+        cfg,
+        enc_active=enc_active,
+        enc_rate_1q=cfg.enc_rate_1q if enc_active else 0.0,
+        enc_rate_2q=cfg.enc_rate_2q if enc_active else 0.0,
+        ec_active=ec_active,
+        ec_rate_1q=cfg.ec_rate_1q if ec_active else 0.0,
+        ec_rate_2q=cfg.ec_rate_2q if ec_active else 0.0,
+        meas_active=meas_active,
+        meas_error_rate=cfg.meas_error_rate if meas_active else 0.0,
+        channel_noise_level=cfg.channel_noise_level if channel else 0.0,
+        channel_noise_type=cfg.channel_noise_type if channel else NO_NOISE.channel_noise_type,
+    )
+
+
+def circuit_key(rounds: int, cfg: NoiseCfg, encoding_mode: str) -> Tuple:
+    """Hashable key that is equal for all experiments built into the same circuit."""
+    return int(rounds), encoding_mode, astuple(canonical_cfg(cfg))
+
+
+def run_sweep(
+    points: Sequence[SweepPoint],
+    shots: int,
+    decoder: Optional[str] = None,
+    seed: Optional[int] = None,
+    circuit_cache: Optional[str] = None
+) -> np.ndarray:
+    """
+    Runs every point of a sweep, building and sampling each distinct circuit only once.
+
+    Points are grouped by circuit_key. Each group's circuit is built and sampled once, its EC rounds
+    are decoded once, and only the final check is repeated for each Pauli frame setting in the group.
+    Repeated points therefore cost nothing, and sweeping apply_pauli_frame doesn't sample again.
+
+    Args:
+        points: The sweep points, see make_points
+        shots: Number of shots per distinct circuit
+        decoder: Name of a registered decoder (see decoders.py), default 'dedup'
+        seed: Seed for Stim's sampler, used for every circuit
+        circuit_cache: Load the circuits from this on-disk cache (see storage/circuit_cache.py), '' for the
+            default directory, None to always build them
+
+    Returns:
+        Structured array of SWEEP_DTYPE with one row per point, in the order of points
+    """
+    groups: Dict[Tuple, List[int]] = {}
+    for i, point in enumerate(points):
+        groups.setdefault(circuit_key(point.rounds, point.cfg, point.encoding_mode), []).append(i)
+
+    results = np.zeros(len(points), dtype=SWEEP_DTYPE)
+    for circuit_index, indices in enumerate(groups.values()):
+        first = points[indices[0]]
+        print(f"Sampling circuit {circuit_index + 1}/{len(groups)}: rounds={first.rounds}, "
+              f"encoding={first.encoding_mode} ({len(indices)} points)")
+        if circuit_cache is not None:
+            circuit = cached_circuit_ec_experiment(first.rounds, canonical_cfg(first.cfg), first.encoding_mode,
+                                                   directory=circuit_cache)
+        else:
+            circuit = build_circuit_ec_experiment(first.rounds, canonical_cfg(first.cfg), first.encoding_mode)
+        shot_data = circuit.compile_sampler(seed=seed).sample(shots=shots)
+        accepted, frameX, frameZ = get_decoder(decoder or 'dedup').decode(
+            shot_data, DecodingLayout.for_encoding(first.rounds, first.encoding_mode))
+        _, only_z_checks, max_checks = get_decoding_parameters(first.encoding_mode)
+
+        successful_checks = {}
+        for apply_pauli_frame in {points[i].apply_pauli_frame for i in indices}:
+            checks = verify_final_states(shot_data[:, -16:], frameX, frameZ, apply_pauli_frame, only_z_checks)
+            successful_checks[apply_pauli_frame] = np.where(accepted, checks, 0)
+
+        ec_accept = int(accepted.sum())
+        for i in indices:
+            point = points[i]
+            checks = successful_checks[point.apply_pauli_frame]
+            row = results[i]
+            row['rounds'] = point.rounds
+            row['encoding_mode'] = point.encoding_mode
+            row['apply_pauli_frame'] = point.apply_pauli_frame
+            for name in NOISE_AXES:
+                row[name] = getattr(canonical_cfg(point.cfg), name)
+            row['shots'] = shots
+            row['ec_accept'] = ec_accept
+            row['logical_shots_passed'] = int((checks == max_checks).sum())
+            row['average_percentage'] = checks.sum() / max_checks / ec_accept if ec_accept > 0 else np.nan
+            row['circuit'] = circuit_index
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep the EC experiment over a Cartesian grid of noise rates, rounds, encodings and Pauli frame settings.")
+    parser.add_argument('--rounds', type=int, nargs='+', default=[1], help='Round counts')
+    parser.add_argument('--encoding-mode', type=str, nargs='+', choices=['9a', '9b'], default=['9a'], help='Encoding modes')
+    parser.add_argument('--apply-pauli-frame', type=int, nargs='+', choices=[0, 1], default=[1], help='Pauli frame settings (0 and/or 1)')
+    for name in NOISE_AXES:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, nargs='+', default=None, help=f'Values of {name}')
+    parser.add_argument('--shots', type=int, default=10000, help='Shots per distinct circuit')
+    parser.add_argument('--decoder', type=str, choices=sorted(DECODERS), default=None, help='Registered decoder to use (default: dedup)')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for Stim\'s sampler')
+    parser.add_argument('--circuit-cache', type=str, nargs='?', const='', default=None, help='Load the circuits from this on-disk .stim cache (default directory if no value is given)')
+    parser.add_argument('--out', type=str, default=None, help='Save the results to this .npy file')
+    args = parser.parse_args()
+
+    axes = {'rounds': args.rounds, 'encoding_mode': args.encoding_mode,
+            'apply_pauli_frame': [bool(v) for v in args.apply_pauli_frame]}
+    axes.update({name: getattr(args, name) for name in NOISE_AXES if getattr(args, name) is not None})
+    results = run_sweep(make_points(cartesian_grid(**axes)), args.shots, args.decoder, args.seed,
+                        args.circuit_cache)
+
+    names = [name for name in SWEEP_DTYPE.names if name in axes]
+    print(" | ".join(names + ['ec_accept', 'logical_shots_passed', 'average_percentage']))
+    for row in results:
+        print(" | ".join([str(row[name]) for name in names]
+                         + [str(row['ec_accept']), str(row['logical_shots_passed']), f"{row['average_percentage']:.4f}"]))
+    if args.out is not None:
+        np.save(args.out, results)
+        print(f"Results saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
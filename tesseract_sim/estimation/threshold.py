@@ -0,0 +1,236 @@
+import argparse
+import math
+from typing import Callable, Dict, List, Literal, NamedTuple, Optional, Tuple
+
+from tesseract_sim.estimation.intervals import IntervalMethod, binomial_interval
+from tesseract_sim.noise.noise_cfg import NoiseCfg
+from tesseract_sim.run import run_simulation_ec_experiment
+
+
+class ThresholdEvaluation(NamedTuple):
+    """Pooled statistics of one noise rate visited by the search."""
+    noise: float
+    shots: int
+    accepted: int
+    logical_failures: int
+    failure_interval: Tuple[float, float]   # interval on logical_failures / accepted
+
+    @property
+    def failure_rate(self) -> Optional[float]:
+        return self.logical_failures / self.accepted if self.accepted > 0 else None
+
+
+class ThresholdResult(NamedTuple):
+    """
+    Result of a pseudo-threshold search for one round count.
+
+    crossing is None when no crossing could be bracketed in the searched range.
+    Otherwise, the crossing lies within [lower, upper]: the bracket is narrowed until either
+    the relative tolerance is reached or the sign of (failure - target) at the midpoint can no
+    longer be resolved statistically with max_shots, so the bracket is the reported uncertainty.
+    """
+    rounds: int
+    crossing: Optional[float]
+    lower: Optional[float]
+    upper: Optional[float]
+    evaluations: List[ThresholdEvaluation]
+    total_shots: int
+
+
+def ec_noise_cfg(noise: float) -> NoiseCfg:
+    """The EC noise configuration used by the default plotting sweep (same 1q and 2q rate)."""
+    return NoiseCfg(ec_active=True, ec_rate_1q=noise, ec_rate_2q=noise, channel_noise_level=0.0)
+
+
+def find_pseudo_threshold(
+    rounds: int,
+    encoding_mode: Literal['9a', '9b'] = '9a',
+    apply_pauli_frame: bool = True,
+    cfg_builder: Callable[[float], NoiseCfg] = ec_noise_cfg,
+    target: Optional[float] = None,
+    noise_low: float = 1e-4,
+    noise_high: float = 1e-1,
+    initial_shots: int = 1000,
+    shot_growth: float = 2.0,
+    max_shots: int = 100000,
+    max_iterations: int = 20,
+    relative_tolerance: float = 0.05,
+    max_expansions: int = 3,
+    confidence: float = 0.95,
+    method: IntervalMethod = 'wilson',
+    experiment_fn: Callable = run_simulation_ec_experiment
+) -> ThresholdResult:
+    """
+    Finds the EC noise rate where the logical failure rate crosses a target by bracketing and bisection.
+
+    The logical failure rate is 1 - logical_pass/accepted (conditional on acceptance, as plotted by
+    plot_acceptance_rates.py). It is compared against target, or, if target is None, against the
+    unencoded baseline, i.e. the physical noise rate itself (the pseudo-threshold).
+
+    The search first checks that [noise_low, noise_high] brackets a crossing (expanding the range
+    geometrically up to max_expansions times), then bisects in log space. Bracket edges that cannot be
+    resolved within max_shots (typically the low-noise edge, where failures are rare) are classified by
+    their point estimate. Shots per evaluation grow by shot_growth every iteration as the bracket
+    narrows, and statistics are pooled for rates visited more than once. A point whose confidence
+    interval still contains the target after max_shots ends the search, since the crossing cannot be
+    located more precisely at that budget.
+
+    Args:
+        rounds: Number of error correction rounds
+        encoding_mode: '9a' or '9b'
+        apply_pauli_frame: Whether to apply Pauli frame corrections
+        cfg_builder: Function that creates a NoiseCfg from a noise rate
+        target: Fixed logical failure rate to cross, or None for the unencoded baseline
+        noise_low, noise_high: Initial bracket
+        initial_shots: Shots per evaluation in the first iteration
+        shot_growth: Multiplicative growth of shots per iteration
+        max_shots: Maximum pooled shots per noise rate
+        max_iterations: Maximum number of bisection steps
+        relative_tolerance: Stop once upper/lower - 1 is below this value
+        max_expansions: Maximum number of attempts to widen a range that doesn't bracket a crossing
+        confidence: Confidence level of the failure rate intervals
+        method: 'wilson' or 'clopper-pearson'
+        experiment_fn: Function that runs an experiment, with the run_simulation_ec_experiment signature
+
+    Returns:
+        ThresholdResult with the crossing, its bracket and every evaluation made
+    """
+    if not 0 < noise_low < noise_high:
+        raise ValueError(f"Invalid bracket [{noise_low}, {noise_high}]")
+
+    pooled: Dict[float, ThresholdEvaluation] = {}
+
+    def target_at(noise: float) -> float:
+        return noise if target is None else target
+
+    def evaluate(noise: float, shots: int) -> ThresholdEvaluation:
+        """Samples the rate until it has at least `shots` pooled shots."""
+        previous = pooled.get(noise, ThresholdEvaluation(noise, 0, 0, 0, (0.0, 1.0)))
+        extra = min(shots, max_shots) - previous.shots
+        if extra <= 0:
+            return previous
+        ec_accept, logical_pass, _ = experiment_fn(
+            rounds=rounds, shots=extra, cfg=cfg_builder(noise),
+            apply_pauli_frame=apply_pauli_frame, encoding_mode=encoding_mode
+        )[:3]
+        accepted = previous.accepted + ec_accept
+        failures = previous.logical_failures + (ec_accept - logical_pass)
+        evaluation = ThresholdEvaluation(
+            noise, previous.shots + extra, accepted, failures,
+            binomial_interval(failures, accepted, confidence, method)
+        )
+        pooled[noise] = evaluation
+        return evaluation
+
+    def resolved_sign(noise: float, shots: int, fallback_to_estimate: bool = False) -> Tuple[int, ThresholdEvaluation]:
+        """
+        Sign of (failure - target), growing shots until it is resolved.
+        If it is still unresolved at max_shots, returns 0, or the sign of the point estimate if fallback_to_estimate.
+        """
+        while True:
+            evaluation = evaluate(noise, shots)
+            lo, hi = evaluation.failure_interval
+            if lo > target_at(noise):
+                return 1, evaluation
+            if hi < target_at(noise):
+                return -1, evaluation
+            if evaluation.shots >= max_shots:
+                if fallback_to_estimate:
+                    return (1 if (evaluation.failure_rate or 0.0) > target_at(noise) else -1), evaluation
+                return 0, evaluation
+            shots = int(math.ceil(evaluation.shots * shot_growth))
+
+    def result(crossing, lower, upper) -> ThresholdResult:
+        evaluations = sorted(pooled.values())
+        return ThresholdResult(rounds, crossing, lower, upper, evaluations, sum(e.shots for e in evaluations))
+
+    lower, upper = noise_low, noise_high
+    sign_lower, eval_lower = resolved_sign(lower, initial_shots, fallback_to_estimate=True)
+    sign_upper, eval_upper = resolved_sign(upper, initial_shots, fallback_to_estimate=True)
+
+    # Make sure the range brackets a crossing before bisecting
+    for _ in range(max_expansions):
+        if sign_lower * sign_upper < 0:
+            break
+        span = upper / lower
+        if sign_lower < 0:  # still below target at the top of the range: search higher
+            lower, sign_lower, eval_lower = upper, sign_upper, eval_upper
+            upper = min(upper * span, 1.0)
+            sign_upper, eval_upper = resolved_sign(upper, initial_shots, fallback_to_estimate=True)
+        else:  # already above target at the bottom of the range: search lower
+            upper, sign_upper, eval_upper = lower, sign_lower, eval_lower
+            lower = lower / span
+            sign_lower, eval_lower = resolved_sign(lower, initial_shots, fallback_to_estimate=True)
+
+    if sign_lower * sign_upper > 0:
+        print(f"No crossing found for rounds={rounds} in [{lower:.3g}, {upper:.3g}]")
+        return result(None, None, None)
+
+    shots = initial_shots
+    for _ in range(max_iterations):
+        if upper / lower - 1 <= relative_tolerance:
+            break
+        shots = int(math.ceil(shots * shot_growth))
+        middle = math.sqrt(lower * upper)
+        sign_middle, eval_middle = resolved_sign(middle, shots)
+        if sign_middle == 0:
+            # The target is within the statistical uncertainty at the midpoint
+            break
+        if sign_middle == sign_lower:
+            lower, eval_lower = middle, eval_middle
+        else:
+            upper, eval_upper = middle, eval_middle
+
+    crossing = _interpolate_crossing(eval_lower, eval_upper, target_at)
+    print(f"Rounds={rounds}: crossing at {crossing:.4g} (bracket [{lower:.4g}, {upper:.4g}])")
+    return result(crossing, lower, upper)
+
+
+def _interpolate_crossing(eval_lower: ThresholdEvaluation, eval_upper: ThresholdEvaluation,
+                          target_at: Callable[[float], float]) -> float:
+    """Log-linear interpolation of (failure - target) between the bracket edges."""
+    lower, upper = eval_lower.noise, eval_upper.noise
+    f_lower = (eval_lower.failure_rate or 0.0) - target_at(lower)
+    f_upper = (eval_upper.failure_rate or 0.0) - target_at(upper)
+    if f_lower == f_upper:
+        return math.sqrt(lower * upper)
+    fraction = min(max(f_lower / (f_lower - f_upper), 0.0), 1.0)
+    return math.exp(math.log(lower) + fraction * (math.log(upper) - math.log(lower)))
+
+
+def find_pseudo_thresholds(rounds: List[int], **kwargs) -> List[ThresholdResult]:
+    """Runs find_pseudo_threshold for each round count."""
+    return [find_pseudo_threshold(r, **kwargs) for r in rounds]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the EC noise rate where the logical failure rate crosses a target (pseudo-threshold).")
+    parser.add_argument('--rounds', type=int, nargs='+', default=[1], help='Round counts to search (one search per count)')
+    parser.add_argument('--encoding-mode', type=str, choices=['9a', '9b'], default='9a', help='Encoding mode')
+    parser.add_argument('--no-apply-pauli-frame', action='store_false', dest='apply_pauli_frame', help='Disable Pauli frame corrections')
+    parser.add_argument('--target', type=float, default=None, help='Fixed logical failure rate to cross. Default: the unencoded baseline (the physical rate)')
+    parser.add_argument('--noise-low', type=float, default=1e-4, help='Lower edge of the initial bracket')
+    parser.add_argument('--noise-high', type=float, default=1e-1, help='Upper edge of the initial bracket')
+    parser.add_argument('--initial-shots', type=int, default=1000, help='Shots per evaluation in the first iteration')
+    parser.add_argument('--shot-growth', type=float, default=2.0, help='Growth factor of shots per iteration')
+    parser.add_argument('--max-shots', type=int, default=100000, help='Maximum shots per noise rate')
+    parser.add_argument('--relative-tolerance', type=float, default=0.05, help='Stop when the bracket is narrower than this (relative)')
+    args = parser.parse_args()
+
+    results = find_pseudo_thresholds(
+        args.rounds, encoding_mode=args.encoding_mode, apply_pauli_frame=args.apply_pauli_frame,
+        target=args.target, noise_low=args.noise_low, noise_high=args.noise_high,
+        initial_shots=args.initial_shots, shot_growth=args.shot_growth, max_shots=args.max_shots,
+        relative_tolerance=args.relative_tolerance
+    )
+
+    print("\nRounds | crossing | bracket | total shots")
+    for res in results:
+        if res.crossing is None:
+            print(f"{res.rounds} | not bracketed | - | {res.total_shots}")
+        else:
+            print(f"{res.rounds} | {res.crossing:.4g} | [{res.lower:.4g}, {res.upper:.4g}] | {res.total_shots}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import argparse
+from dataclasses import dataclass
+from typing import Literal, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tesseract_sim.error_correction.decoder_manual import get_decoding_parameters, process_round
+from tesseract_sim.estimation.threshold import ec_noise_cfg
+from tesseract_sim.noise.noise_cfg import NoiseCfg
+from tesseract_sim.run import build_circuit_ec_experiment
+
+# Decoder states: (flagX, flagZ) with flags in -1..3, plus an absorbing reject state
+NUM_FLAG_STATES = 25
+REJECT = NUM_FLAG_STATES
+NUM_STATES = NUM_FLAG_STATES + 1
+
+
+def state_index(flagX: int, flagZ: int) -> int:
+    return (flagX + 1) * 5 + (flagZ + 1)
+
+
+def decoder_state_trajectories(shot_data_all: np.ndarray, rounds: int, measurement_offset: int = 0) -> np.ndarray:
+    """
+    Decoder state of every shot before the first round and after every round.
+
+    Returns:
+        (shots, rounds + 1) array of state indices (see state_index), REJECT once a shot is rejected
+    """
+    measurements_per_round = 8 * 2
+    states = np.full((len(shot_data_all), rounds + 1), REJECT, dtype=np.int64)
+    for i, shot_data in enumerate(shot_data_all):
+        flagX, flagZ = -1, -1
+        frameX = np.zeros(16, dtype=np.uint8)
+        frameZ = np.zeros(16, dtype=np.uint8)
+        states[i, 0] = state_index(flagX, flagZ)
+        for r in range(rounds):
+            result = process_round(shot_data, r * measurements_per_round + measurement_offset, flagX, flagZ, frameX, frameZ)
+            if isinstance(result, str) and result == "reject":
+                break
+            flagX, flagZ, frameX, frameZ = result
+            states[i, r + 1] = state_index(flagX, flagZ)
+    return states
+
+
+@dataclass
+class TransferMatrixEstimate:
+    """
+    Markov model of the decoder state across rounds, estimated from a short circuit.
+
+    The decoder carries only (flagX, flagZ) from one round to the next. Treating the state after each
+    round as a Markov chain with stationary transition probabilities (estimated from the rounds after
+    warmup_rounds), the acceptance after any number of rounds R >= warmup_rounds is the probability of
+    not having reached the reject state after R - warmup_rounds steps from the state distribution
+    observed after the warm-up. Residual data errors that persist across rounds are not part of the
+    state, so the model is an approximation that should be checked against direct simulation.
+    """
+    warmup_rounds: int
+    sample_rounds: int
+    shots: int
+    transition_counts: np.ndarray       # (NUM_FLAG_STATES, NUM_STATES) observed transitions after the warm-up
+    initial_counts: np.ndarray          # (NUM_STATES,) state counts after the warm-up
+    warmup_accepted: np.ndarray         # (warmup_rounds + 1,) shots not rejected after 0..warmup_rounds rounds
+
+    def transition_matrix(self, counts: Optional[np.ndarray] = None) -> np.ndarray:
+        """Row-stochastic (NUM_STATES, NUM_STATES) matrix. Unobserved states are sent to reject."""
+        counts = self.transition_counts if counts is None else counts
+        matrix = np.zeros((NUM_STATES, NUM_STATES))
+        totals = counts.sum(axis=1)
+        observed = totals > 0
+        matrix[:NUM_FLAG_STATES][observed] = counts[observed] / totals[observed, None]
+        matrix[np.flatnonzero(~observed), REJECT] = 1.0
+        matrix[REJECT, REJECT] = 1.0
+        return matrix
+
+    def acceptance(self, rounds: Sequence[int]) -> np.ndarray:
+        """Point estimate of the acceptance rate after each of the given round counts."""
+        return self._acceptance(rounds, self.transition_matrix(), self.initial_counts / self.shots,
+                                self.warmup_accepted / self.shots)
+
+    def acceptance_bounds(self, rounds: Sequence[int], confidence: float = 0.95, samples: int = 1000,
+                          seed: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Bayesian-bootstrap bounds on the acceptance rate after each of the given round counts.
+
+        Every observed row of transition counts, the post-warm-up state distribution and the warm-up
+        acceptance counts are redrawn from Dirichlet (Beta) distributions over their observed outcomes;
+        the bounds are the central confidence interval of the resulting acceptance curves.
+        """
+        rng = np.random.default_rng(seed)
+        curves = np.empty((samples, len(rounds)))
+        for b in range(samples):
+            counts = np.zeros_like(self.transition_counts, dtype=np.float64)
+            for row in np.flatnonzero(self.transition_counts.sum(axis=1)):
+                observed = self.transition_counts[row] > 0
+                counts[row, observed] = rng.dirichlet(self.transition_counts[row, observed])
+            initial = np.zeros(NUM_STATES)
+            observed = self.initial_counts > 0
+            initial[observed] = rng.dirichlet(self.initial_counts[observed])
+            warmup = np.array([rng.beta(a, self.shots - a) if 0 < a < self.shots else a / self.shots
+                               for a in self.warmup_accepted])
+            curves[b] = self._acceptance(rounds, self.transition_matrix(counts), initial, warmup)
+        alpha = (1 - confidence) / 2
+        return np.quantile(curves, alpha, axis=0), np.quantile(curves, 1 - alpha, axis=0)
+
+    def _acceptance(self, rounds: Sequence[int], matrix: np.ndarray, initial: np.ndarray,
+                    warmup_acceptance: np.ndarray) -> np.ndarray:
+        result = np.empty(len(rounds))
+        order = np.argsort(rounds)
+        distribution, step = initial, 0
+        for i in order:
+            r = rounds[i]
+            if r <= self.warmup_rounds:
+                result[i] = warmup_acceptance[r]
+                continue
+            # Advance the distribution incrementally, so sorted round counts cost one pass
+            distribution = distribution @ np.linalg.matrix_power(matrix, r - self.warmup_rounds - step)
+            step = r - self.warmup_rounds
+            result[i] = max(1.0 - distribution[REJECT], 0.0)
+        return result
+
+
+def estimate_transfer_matrix(
+    cfg: NoiseCfg,
+    encoding_mode: Literal['9a', '9b'] = '9a',
+    warmup_rounds: int = 2,
+    sample_rounds: int = 4,
+    shots: int = 10000,
+    seed: Optional[int] = None
+) -> TransferMatrixEstimate:
+    """
+    Samples the EC experiment with warmup_rounds + sample_rounds rounds and counts decoder state transitions.
+
+    Transitions in the first warmup_rounds rounds are not counted, since the state distribution right
+    after encoding differs from the steady state.
+
+    Args:
+        cfg: Noise configuration (should be the same in every round)
+        encoding_mode: '9a' or '9b'
+        warmup_rounds: Rounds before transitions are counted
+        sample_rounds: Rounds whose transitions are counted
+        shots: Number of shots
+        seed: Seed for Stim's sampler
+
+    Returns:
+        TransferMatrixEstimate with the transition counts
+    """
+    if sample_rounds < 1 or warmup_rounds < 0:
+        raise ValueError(f"Need sample_rounds >= 1 and warmup_rounds >= 0, got {sample_rounds} and {warmup_rounds}")
+
+    rounds = warmup_rounds + sample_rounds
+    measurement_offset, _, _ = get_decoding_parameters(encoding_mode)
+    circuit = build_circuit_ec_experiment(rounds, cfg, encoding_mode=encoding_mode)
+    shot_data_all = circuit.compile_sampler(seed=seed).sample(shots=shots)
+    states = decoder_state_trajectories(shot_data_all, rounds, measurement_offset)
+
+    transition_counts = np.zeros((NUM_FLAG_STATES, NUM_STATES), dtype=np.int64)
+    before = states[:, warmup_rounds:-1].ravel()
+    after = states[:, warmup_rounds + 1:].ravel()
+    alive = before != REJECT
+    np.add.at(transition_counts, (before[alive], after[alive]), 1)
+
+    return TransferMatrixEstimate(
+        warmup_rounds=warmup_rounds,
+        sample_rounds=sample_rounds,
+        shots=shots,
+        transition_counts=transition_counts,
+        initial_counts=np.bincount(states[:, warmup_rounds], minlength=NUM_STATES),
+        warmup_accepted=(states[:, :warmup_rounds + 1] != REJECT).sum(axis=0),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extrapolate the EC acceptance rate to many rounds with a decoder-state transfer matrix.")
+    parser.add_argument('--noise', type=float, default=1e-3, help='EC noise rate (1q and 2q)')
+    parser.add_argument('--encoding-mode', type=str, choices=['9a', '9b'], default='9a', help='Encoding mode')
+    parser.add_argument('--warmup-rounds', type=int, default=2, help='Rounds before transitions are counted')
+    parser.add_argument('--sample-rounds', type=int, default=4, help='Rounds whose transitions are counted')
+    parser.add_argument('--shots', type=int, default=10000, help='Number of shots')
+    parser.add_argument('--rounds', type=int, nargs='+', default=[1, 10, 100, 1000], help='Round counts to extrapolate to')
+    parser.add_argument('--confidence', type=float, default=0.95, help='Confidence level of the bounds')
+    args = parser.parse_args()
+
+    estimate = estimate_transfer_matrix(ec_noise_cfg(args.noise), args.encoding_mode, args.warmup_rounds,
+                                        args.sample_rounds, args.shots)
+    acceptance = estimate.acceptance(args.rounds)
+    lower, upper = estimate.acceptance_bounds(args.rounds, args.confidence)
+    print("Rounds | acceptance | bounds")
+    for r, a, lo, hi in zip(args.rounds, acceptance, lower, upper):
+        print(f"{r} | {a:.6g} | [{lo:.6g}, {hi:.6g}]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import stim
+
+# Pauli faults of each supported noise channel, with their probabilities relative to the channel's rate.
+_TWO_QUBIT_PAULIS = tuple(a + b for a in "IXYZ" for b in "IXYZ" if a + b != "II")
+NOISE_CHANNEL_PAULIS: Dict[str, Tuple[str, ...]] = {
+    "DEPOLARIZE1": ("X", "Y", "Z"),
+    "DEPOLARIZE2": _TWO_QUBIT_PAULIS,
+    "X_ERROR": ("X",),
+    "Y_ERROR": ("Y",),
+    "Z_ERROR": ("Z",),
+    "PAULI_CHANNEL_1": ("X", "Y", "Z"),
+    "PAULI_CHANNEL_2": _TWO_QUBIT_PAULIS,
+}
+
+# Noisy measurements, M(p) etc., flip the recorded result with probability p. The flip is injected as a
+# Pauli anticommuting with the measured basis, applied before the measurement and, unless the measurement
+# resets the qubit, undone right after it so that only the record is affected.
+MEASUREMENT_FLIP_PAULI: Dict[str, str] = {
+    "M": "X", "MR": "X",
+    "MX": "Z", "MRX": "Z",
+    "MY": "X", "MRY": "X",
+}
+_RESETTING_MEASUREMENTS = {"MR", "MRX", "MRY"}
+
+
+@dataclass(frozen=True)
+class FaultLocation:
+    """A place in a circuit where a noise instruction can insert a fault."""
+    instruction_index: int          # index of the noise instruction in the flattened circuit
+    gate: str                       # noise channel, or noisy measurement, name
+    targets: Tuple[int, ...]        # qubits the fault acts on
+    probability: float              # probability that this location faults
+    paulis: Tuple[str, ...]         # possible faults, one Pauli character per target qubit
+    weights: Tuple[float, ...]      # probability of each fault given that the location faults
+
+    @property
+    def is_measurement_flip(self) -> bool:
+        return self.gate in MEASUREMENT_FLIP_PAULI
+
+
+def _location_faults(instruction: stim.CircuitInstruction) -> Tuple[float, Tuple[str, ...], Tuple[float, ...]]:
+    """Returns (probability, paulis, weights) of one target group of a noise instruction."""
+    name = instruction.name
+    args = instruction.gate_args_copy()
+    if name in MEASUREMENT_FLIP_PAULI:
+        return args[0], (MEASUREMENT_FLIP_PAULI[name],), (1.0,)
+    if name not in NOISE_CHANNEL_PAULIS:
+        raise ValueError(f"Unsupported noise instruction for fault enumeration: {name}")
+    paulis = NOISE_CHANNEL_PAULIS[name]
+    if name.startswith("PAULI_CHANNEL"):
+        probability = sum(args)
+        weights = tuple(a / probability for a in args) if probability > 0 else tuple(0.0 for _ in args)
+    else:
+        probability = args[0]
+        weights = tuple(1.0 / len(paulis) for _ in paulis)
+    return probability, paulis, weights
+
+
+def _is_noise_instruction(instruction: stim.CircuitInstruction) -> bool:
+    if instruction.name in MEASUREMENT_FLIP_PAULI:
+        args = instruction.gate_args_copy()
+        return len(args) > 0 and args[0] > 0
+    return stim.gate_data(instruction.name).is_noisy_gate
+
+
+def _enumerate_with_keys(circuit: stim.Circuit) -> Tuple[List[FaultLocation], List[tuple]]:
+    """
+    Enumerates fault locations together with a key identifying each location independently of noise rates.
+
+    The key is the location's gate and targets plus the number of non-noise operations applied so far to
+    each target qubit. Unlike instruction indices, it doesn't change when Stim merges adjacent instructions
+    or when noise instructions are omitted for zero rates.
+    """
+    locations, keys = [], []
+    steps: Dict[int, int] = {}
+    seen: Dict[tuple, int] = {}
+    for index, instruction in enumerate(circuit.flattened()):
+        qubits = [t.value for t in instruction.targets_copy() if t.is_qubit_target]
+        if instruction.name not in NOISE_CHANNEL_PAULIS:
+            for q in qubits:
+                steps[q] = steps.get(q, 0) + 1
+        if not _is_noise_instruction(instruction):
+            continue
+        probability, paulis, weights = _location_faults(instruction)
+        if probability <= 0:
+            continue
+        group_size = len(paulis[0])
+        for i in range(0, len(qubits), group_size):
+            targets = tuple(qubits[i:i + group_size])
+            key = (instruction.name, targets, tuple(steps.get(q, 0) for q in targets))
+            seen[key] = seen.get(key, 0) + 1
+            keys.append(key + (seen[key],))
+            locations.append(FaultLocation(
+                instruction_index=index,
+                gate=instruction.name,
+                targets=targets,
+                probability=probability,
+                paulis=paulis,
+                weights=weights,
+            ))
+    return locations, keys
+
+
+def enumerate_fault_locations(circuit: stim.Circuit) -> List[FaultLocation]:
+    """
+    Lists every fault location in a circuit, in circuit order.
+
+    Every target (or target pair, for two-qubit channels) of a noise channel is one location. Noisy
+    measurements (e.g. M(p)) contribute one measurement-flip location per measured qubit.
+    REPEAT blocks are flattened, so instruction indices refer to circuit.flattened().
+    """
+    return _enumerate_with_keys(circuit)[0]
+
+
+def match_location_rates(reference: stim.Circuit, target: stim.Circuit) -> np.ndarray:
+    """
+    Probability of every fault location of reference (in enumerate_fault_locations order) in target.
+
+    Both circuits must come from the same construction with different noise rates, e.g. the same
+    experiment built with two NoiseCfg instances. Locations that are noiseless in target get 0.
+
+    Raises:
+        ValueError: If target has a fault location that reference doesn't have, or one whose channel
+            distributes its faults differently
+    """
+    reference_locations, reference_keys = _enumerate_with_keys(reference)
+    index_of = {key: i for i, key in enumerate(reference_keys)}
+    rates = np.zeros(len(reference_locations), dtype=np.float64)
+    for location, key in zip(*_enumerate_with_keys(target)):
+        i = index_of.get(key)
+        if i is None:
+            raise ValueError(f"Fault location {location.gate} {location.targets} of the target circuit "
+                             f"is not a fault location of the reference circuit")
+        if not np.allclose(location.weights, reference_locations[i].weights):
+            raise ValueError(f"Fault location {location.gate} {location.targets} has different fault "
+                             f"weights in the target and reference circuits")
+        rates[i] = location.probability
+    return rates
+
+
+def group_fault_classes(locations: Sequence[FaultLocation]) -> Tuple[List[Tuple[str, float]], np.ndarray]:
+    """
+    Groups fault locations into classes that share the same noise channel and probability.
+
+    Returns:
+        tuple: (classes, class_of_location)
+            - classes: list of (gate, probability) keys, in order of first appearance
+            - class_of_location: class index of every location
+    """
+    classes: List[Tuple[str, float]] = []
+    index_of: Dict[Tuple[str, float], int] = {}
+    class_of_location = np.zeros(len(locations), dtype=np.int64)
+    for i, location in enumerate(locations):
+        key = (location.gate, location.probability)
+        if key not in index_of:
+            index_of[key] = len(classes)
+            classes.append(key)
+        class_of_location[i] = index_of[key]
+    return classes, class_of_location
+
+
+class FaultInjector:
+    """
+    Simulates a circuit with explicitly chosen faults instead of random noise.
+
+    Noise instructions are skipped and the requested faults are injected in their place with Stim's
+    FlipSimulator, so a whole batch of different fault configurations is propagated in one pass.
+    """
+
+    def __init__(self, circuit: stim.Circuit):
+        self.circuit = circuit.flattened()
+        self.locations = enumerate_fault_locations(self.circuit)
+        self.num_qubits = self.circuit.num_qubits
+        self.num_measurements = self.circuit.num_measurements
+        self.reference_sample = self.circuit.reference_sample()
+        self._location_instruction = np.array([loc.instruction_index for loc in self.locations], dtype=np.int64)
+
+    def single_faults(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Every possible single fault, as (locations, paulis, probabilities) arrays.
+
+        probabilities[i] is the probability of fault i on its own: the location's probability times the
+        fault's weight.
+        """
+        location_indices, pauli_indices, probabilities = [], [], []
+        for i, location in enumerate(self.locations):
+            for j, weight in enumerate(location.weights):
+                if weight > 0:
+                    location_indices.append(i)
+                    pauli_indices.append(j)
+                    probabilities.append(location.probability * weight)
+        return (np.array(location_indices, dtype=np.int64), np.array(pauli_indices, dtype=np.int64),
+                np.array(probabilities, dtype=np.float64))
+
+    def sample_paulis(self, fault_locations: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """Draws the Pauli of each given fault location according to its channel's weights (-1 stays -1)."""
+        fault_locations = np.asarray(fault_locations)
+        paulis = np.full(fault_locations.shape, -1, dtype=np.int64)
+        for i in np.unique(fault_locations[fault_locations >= 0]):
+            where = fault_locations == i
+            weights = self.locations[i].weights
+            paulis[where] = rng.choice(len(weights), size=int(where.sum()), p=weights)
+        return paulis
+
+    def sample(self, fault_locations: np.ndarray, fault_paulis: np.ndarray,
+               randomize_gauge: bool = True, seed: Optional[int] = None) -> np.ndarray:
+        """
+        Simulates one shot per row of fault_locations.
+
+        Args:
+            fault_locations: (shots, k) array of indices into self.locations, -1 for "no fault"
+            fault_paulis: (shots, k) array of indices into each location's paulis
+            randomize_gauge: If False, random measurement outcomes are fixed to the reference sample, so
+                the result is the deterministic effect of the faults alone
+            seed: Seed for the gauge randomization
+
+        Returns:
+            (shots, num_measurements) boolean array of measurement records
+        """
+        fault_locations = np.atleast_2d(np.asarray(fault_locations, dtype=np.int64))
+        fault_paulis = np.atleast_2d(np.asarray(fault_paulis, dtype=np.int64))
+        shots = fault_locations.shape[0]
+        if shots == 0:
+            return np.zeros((0, self.num_measurements), dtype=bool)
+
+        # Group the requested faults by the instruction they replace
+        shot_index, slot = np.nonzero(fault_locations >= 0)
+        location_index = fault_locations[shot_index, slot]
+        pauli_index = fault_paulis[shot_index, slot]
+        instruction_index = self._location_instruction[location_index]
+        order = np.argsort(instruction_index, kind='stable')
+        faults_at: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        boundaries = np.flatnonzero(np.diff(instruction_index[order])) + 1
+        for group in np.split(order, boundaries):
+            if len(group):
+                faults_at[int(instruction_index[group[0]])] = (shot_index[group], location_index[group], pauli_index[group])
+
+        simulator = stim.FlipSimulator(
+            batch_size=shots,
+            num_qubits=self.num_qubits,
+            disable_stabilizer_randomization=not randomize_gauge,
+            seed=seed,
+        )
+        for index, instruction in enumerate(self.circuit):
+            faults = faults_at.get(index)
+            if instruction.name in MEASUREMENT_FLIP_PAULI:
+                noiseless = stim.CircuitInstruction(instruction.name, instruction.targets_copy())
+                if faults is not None:
+                    self._inject(simulator, faults, shots)
+                simulator.do(noiseless)
+                if faults is not None and instruction.name not in _RESETTING_MEASUREMENTS:
+                    self._inject(simulator, faults, shots)
+            elif _is_noise_instruction(instruction):
+                if faults is not None:
+                    self._inject(simulator, faults, shots)
+            else:
+                simulator.do(instruction)
+
+        flips = simulator.get_measurement_flips()
+        return np.logical_xor(flips.T, self.reference_sample)
+
+    def _inject(self, simulator: stim.FlipSimulator, faults, shots: int) -> None:
+        """Applies the faults of one instruction, with one broadcast per Pauli type."""
+        masks = {p: np.zeros((self.num_qubits, shots), dtype=bool) for p in "XYZ"}
+        for shot, location_index, pauli_index in zip(*faults):
+            location = self.locations[location_index]
+            for qubit, pauli in zip(location.targets, location.paulis[pauli_index]):
+                if pauli != "I":
+                    masks[pauli][qubit, shot] = True
+        for pauli, mask in masks.items():
+            if mask.any():
+                simulator.broadcast_pauli_errors(pauli=pauli, mask=mask)
+
+
+def _gf2_basis(vectors: np.ndarray) -> np.ndarray:
+    """Basis (as rows) of the GF(2) span of the given boolean row vectors."""
+    rows = vectors.astype(bool).copy()
+    basis = []
+    for col in range(rows.shape[1]):
+        pivots = np.flatnonzero(rows[:, col])
+        if len(pivots) == 0:
+            continue
+        pivot = rows[pivots[0]].copy()
+        basis.append(pivot)
+        rows[pivots] ^= pivot
+    return np.array(basis, dtype=bool).reshape(-1, vectors.shape[1])
+
+
+def gauge_records(circuit: stim.Circuit, max_samples: int, seed: Optional[int] = None) -> Tuple[np.ndarray, bool]:
+    """
+    Noiseless measurement records of the circuit, all of them if there are at most max_samples.
+
+    The noiseless records form an affine space: the reference sample plus the span of the random
+    (gauge) outcomes. If its dimension d satisfies 2^d <= max_samples, all 2^d records are returned
+    (each equally likely); otherwise max_samples random records.
+
+    Returns:
+        tuple: (records, exact)
+    """
+    noiseless = circuit.without_noise()
+    reference = noiseless.reference_sample()
+    sampler = noiseless.compile_sampler(seed=seed)
+    # Enough samples to span the gauge space with overwhelming probability
+    basis = _gf2_basis(sampler.sample(noiseless.num_measurements + 64) ^ reference)
+    if 2 ** len(basis) <= max_samples:
+        coefficients = (np.arange(2 ** len(basis))[:, None] >> np.arange(len(basis))) & 1
+        records = (coefficients.astype(np.uint8) @ basis.astype(np.uint8)) % 2
+        return np.logical_xor(records.astype(bool), reference), True
+    return sampler.sample(max_samples), False
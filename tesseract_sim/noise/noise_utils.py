@@ -1,9 +1,25 @@
 import stim
-from typing import Sequence, Literal
+from typing import Sequence, Literal, Tuple
 from .noise_cfg import NoiseCfg, NO_NOISE
 
 CURRENT_NOISE_CFG: NoiseCfg = NO_NOISE
 
+MEASUREMENT_OPS = {"M", "MX", "MY", "MR", "MRX", "MRY"}
+# Single-qubit channels that commute with H
+H_INVARIANT_CHANNELS = {"DEPOLARIZE1", "Y_ERROR"}
+
+
+def phase_noise(phase: Literal['enc', 'ec', 'meas'], cfg: NoiseCfg) -> Tuple[bool, float, float]:
+    """Returns (active, rate_1q, rate_2q) of a phase."""
+    if phase == 'enc' and cfg.enc_active:
+        return True, cfg.enc_rate_1q, cfg.enc_rate_2q
+    if phase == 'ec' and cfg.ec_active:
+        return True, cfg.ec_rate_1q, cfg.ec_rate_2q
+    if phase == 'meas' and cfg.meas_active:
+        return True, cfg.meas_error_rate, cfg.meas_error_rate  # Use same rate for consistency
+    return False, 0.0, 0.0
+
+
 def append_op(
     circuit: stim.Circuit,
     opname: str,
@@ -11,26 +27,21 @@ def append_op(
     phase: Literal['enc', 'ec', 'meas'],
     cfg: NoiseCfg = CURRENT_NOISE_CFG
 ):
-    circuit.append(opname, targets)
-    
-    active_noise = False
-    rate_1q = 0.0
-    rate_2q = 0.0
+    """
+    Appends an operation followed by the noise of its phase.
+
+    Measurements of the 'meas' phase use Stim's noisy measurements instead, e.g. M(p): the recorded
+    outcome flips with the measurement error rate.
+    """
+    active_noise, rate_1q, rate_2q = phase_noise(phase, cfg)
     op1 = cfg.op1
     op2 = cfg.op2
 
-    if phase == 'enc' and cfg.enc_active:
-        active_noise = True
-        rate_1q = cfg.enc_rate_1q
-        rate_2q = cfg.enc_rate_2q
-    elif phase == 'ec' and cfg.ec_active:
-        active_noise = True
-        rate_1q = cfg.ec_rate_1q
-        rate_2q = cfg.ec_rate_2q
-    elif phase == 'meas' and cfg.meas_active:
-        active_noise = True
-        rate_1q = cfg.meas_error_rate
-        rate_2q = cfg.meas_error_rate  # Use same rate for consistency
+    if phase == 'meas' and opname in MEASUREMENT_OPS:
+        circuit.append(opname, targets, rate_1q if active_noise and rate_1q > 0 else None)
+        return
+
+    circuit.append(opname, targets)
 
     if active_noise:
         if len(targets) == 1 and rate_1q > 0:
@@ -42,4 +53,42 @@ def append_1q(circuit: stim.Circuit, opname: str, target: int, phase: Literal['e
     append_op(circuit, opname, [target], phase, cfg)
 
 def append_2q(circuit: stim.Circuit, opname: str, target1: int, target2: int, phase: Literal['enc', 'ec', 'meas'], cfg: NoiseCfg = CURRENT_NOISE_CFG):
-    append_op(circuit, opname, [target1, target2], phase, cfg) 
\ No newline at end of file
+    append_op(circuit, opname, [target1, target2], phase, cfg)
+
+
+def append_reset_x(circuit: stim.Circuit, target: int, phase: Literal['enc', 'ec', 'meas'], cfg: NoiseCfg = CURRENT_NOISE_CFG):
+    """
+    RX, equivalent to append_1q with R followed by H.
+
+    The channels of both gates follow RX, which is exact for channels that commute with H (DEPOLARIZE1,
+    Y_ERROR). Other channels get the separate R and H.
+    """
+    if cfg.op1 not in H_INVARIANT_CHANNELS:
+        append_1q(circuit, "R", target, phase, cfg)
+        append_1q(circuit, "H", target, phase, cfg)
+        return
+    active_noise, rate_1q, _ = phase_noise(phase, cfg)
+    circuit.append("RX", [target])
+    if active_noise and rate_1q > 0:
+        circuit.append(cfg.op1, [target, target], rate_1q)
+
+
+def append_final_measurement(circuit: stim.Circuit, basis: Literal['X', 'Z'], target: int,
+                             phase: Literal['enc', 'ec', 'meas'], cfg: NoiseCfg = CURRENT_NOISE_CFG):
+    """
+    Measures a qubit that is reset or never used afterwards, with M for basis Z and MX for basis X.
+
+    Equivalent to append_1q with M, or with H followed by M: the channel after M can't affect such a
+    qubit and is left out, and the channel after H moves in front of MX, which is exact for channels that
+    commute with H (other channels get the separate H and M). Measurements of the 'meas' phase flip with
+    the measurement error rate, as in append_op.
+    """
+    active_noise, rate_1q, _ = phase_noise(phase, cfg)
+    if basis == 'X':
+        if cfg.op1 in H_INVARIANT_CHANNELS:
+            if active_noise and rate_1q > 0:
+                circuit.append(cfg.op1, [target], rate_1q)
+        else:
+            append_1q(circuit, "H", target, phase, cfg)
+    flip = rate_1q if phase == 'meas' and active_noise and rate_1q > 0 else None
+    circuit.append("MX" if basis == 'X' and cfg.op1 in H_INVARIANT_CHANNELS else "M", [target], flip)
@@ -0,0 +1,163 @@
+import argparse
+import inspect
+import json
+import multiprocessing
+import os
+import time
+from typing import Dict, List, Literal, Optional, get_args, get_origin
+
+from tesseract_sim.plotting.plot_acceptance_rates import DEFAULT_NOISE_LEVELS, DEFAULT_ROUNDS, plot_ec_experiment
+from tesseract_sim.run import share_circuits
+
+# Settings of a job besides the keyword arguments of plot_ec_experiment
+JOB_KEYS = ('name', 'out_dir')
+EXPERIMENT_PARAMETERS = {name: parameter for name, parameter in inspect.signature(plot_ec_experiment).parameters.items()
+                         if name != 'base_out_dir'}
+EXPERIMENT_KEYS = tuple(EXPERIMENT_PARAMETERS)
+
+
+def load_job_spec(path: str) -> List[Dict]:
+    """
+    Reads a job spec file, JSON or YAML (.yaml/.yml, needs PyYAML), and returns its jobs.
+
+    A spec is a mapping with a list of jobs and optional defaults that every job starts from:
+
+        {"defaults": {"shots": 10000, "encoding_mode": "9a", "out_dir": "./plots"},
+         "jobs": [{"name": "ec_9a", "rounds": [1, 5, 10], "noise_levels": [0.001, 0.005]},
+                  {"name": "channel_9a", "sweep_channel_noise": true, "comparison_mode": true}]}
+
+    Jobs take the arguments of plot_ec_experiment (rounds, noise_levels, shots, encoding_mode,
+    apply_pauli_frame, comparison_mode, ...), plus a name and out_dir. Each job writes to out_dir/name.
+    """
+    with open(path) as f:
+        if path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError("Reading YAML job specs needs PyYAML (pip install pyyaml), or use JSON") from None
+            spec = yaml.safe_load(f)
+        else:
+            spec = json.load(f)
+    if not isinstance(spec, dict) or not isinstance(spec.get('jobs'), list):
+        raise ValueError(f"Job spec {path} must be a mapping with a list of jobs")
+    unknown = set(spec) - {'defaults', 'jobs'}
+    if unknown:
+        raise ValueError(f"Unknown job spec sections {sorted(unknown)}, must be 'defaults' and 'jobs'")
+    return resolve_jobs(spec['jobs'], spec.get('defaults', {}))
+
+
+def resolve_jobs(jobs: List[Dict], defaults: Optional[Dict] = None) -> List[Dict]:
+    """
+    Applies the defaults to every job, and checks the settings and that job names are unique.
+
+    Settings are converted to the types of plot_ec_experiment's arguments, so a bad spec fails here,
+    before any job has run.
+    """
+    resolved = []
+    for index, job in enumerate(jobs):
+        job = {'name': f"job{index:02d}", 'out_dir': './plots', 'rounds': DEFAULT_ROUNDS,
+               'noise_levels': DEFAULT_NOISE_LEVELS, 'shots': 10000, **(defaults or {}), **job}
+        unknown = set(job) - set(JOB_KEYS) - set(EXPERIMENT_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown settings {sorted(unknown)} in job {job['name']}, "
+                             f"must be among {sorted(JOB_KEYS + EXPERIMENT_KEYS)}")
+        for key in EXPERIMENT_KEYS:
+            if key in job:
+                parameter = EXPERIMENT_PARAMETERS[key]
+                job[key] = _coerce_setting(job[key], parameter.annotation, parameter.default, f"{key} of job {job['name']}")
+        resolved.append(job)
+    names = [job['name'] for job in resolved]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Job names must be unique, got duplicates {duplicates}")
+    return resolved
+
+
+def _coerce_setting(value, annotation, default, where: str):
+    """
+    Converts a job setting to the type plot_ec_experiment declares for it, or raises ValueError.
+
+    Numbers may be given as strings: YAML reads exponent notation without a dot (1e-3) as a string.
+    """
+    if value is None and default is None:
+        return None
+    origin = get_origin(annotation)
+    if origin in (list, List):
+        if not isinstance(value, (list, tuple)):
+            raise ValueError(f"{where} must be a list, got {value!r}")
+        item, = get_args(annotation)
+        return [_coerce_setting(v, item, inspect.Parameter.empty, where) for v in value]
+    if origin is Literal:
+        if value not in get_args(annotation):
+            raise ValueError(f"{where} must be one of {list(get_args(annotation))}, got {value!r}")
+        return value
+    if annotation is bool or annotation is str:
+        if not isinstance(value, annotation):
+            raise ValueError(f"{where} must be a {annotation.__name__}, got {value!r}")
+        return value
+    if annotation in (int, float):
+        try:
+            number = None if isinstance(value, bool) else float(value)
+        except (TypeError, ValueError):
+            number = None
+        if number is not None and (annotation is float or number.is_integer()):
+            return annotation(number)
+        raise ValueError(f"{where} must be a number{' (whole)' if annotation is int else ''}, got {value!r}")
+    raise ValueError(f"{where} has an unexpected value {value!r}")
+
+
+def run_job(job: Dict) -> Dict:
+    """Runs one resolved job, returns its name, output directory and runtime."""
+    print(f"=== Job {job['name']} ===")
+    start = time.time()
+    out_dir = plot_ec_experiment(base_out_dir=os.path.join(job['out_dir'], job['name']),
+                                 **{key: value for key, value in job.items() if key in EXPERIMENT_KEYS})
+    return {'name': job['name'], 'out_dir': out_dir, 'seconds': time.time() - start}
+
+
+def _run_jobs(jobs: List[Dict]) -> List[Dict]:
+    with share_circuits():
+        return [run_job(job) for job in jobs]
+
+
+def run_batch(jobs: List[Dict], workers: int = 1) -> List[Dict]:
+    """
+    Runs resolved jobs (see load_job_spec) in this process, or spread over workers processes.
+
+    Jobs that run in the same process share their circuits and compiled samplers (see share_circuits
+    in run.py), and channel-noise lookups share their pattern cache, so repeated data points across
+    jobs are only built and compiled once. With several workers, jobs are dealt out round-robin and
+    every worker shares within its own jobs.
+
+    Returns:
+        One summary per job, in the order of jobs: its name, output directory and runtime
+    """
+    if workers <= 0:
+        raise ValueError(f"workers must be positive, got {workers}")
+    if workers == 1 or len(jobs) <= 1:
+        return _run_jobs(jobs)
+    chunks = [jobs[i::workers] for i in range(min(workers, len(jobs)))]
+    with multiprocessing.Pool(len(chunks)) as pool:
+        summaries = [summary for chunk in pool.map(_run_jobs, chunks) for summary in chunk]
+    order = {job['name']: index for index, job in enumerate(jobs)}
+    return sorted(summaries, key=lambda summary: order[summary['name']])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the EC experiment sweeps of a JSON/YAML job spec in one process.")
+    parser.add_argument('spec', type=str, help='Job spec file (.json, or .yaml/.yml with PyYAML)')
+    parser.add_argument('--workers', type=int, default=1, help='Processes to spread the jobs over')
+    parser.add_argument('--summary', type=str, default=None, help='Write the job names, output directories and runtimes to this JSON file')
+    args = parser.parse_args()
+
+    summaries = run_batch(load_job_spec(args.spec), args.workers)
+    for summary in summaries:
+        print(f"{summary['name']}: {summary['out_dir']} ({summary['seconds']:.1f} s)")
+    if args.summary is not None:
+        with open(args.summary, "w") as f:
+            json.dump(summaries, f, indent=2)
+        print(f"Summary saved to {args.summary}")
+
+
+if __name__ == "__main__":
+    main()
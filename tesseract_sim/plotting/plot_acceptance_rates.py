@@ -1,9 +1,15 @@
 import numpy as np
-import matplotlib.pyplot as plt
+from tesseract_sim.common.profiling import PipelineMetrics
 from tesseract_sim.run import run_simulation_ec_experiment
+from tesseract_sim.estimation.adaptive import run_adaptive_ec_experiment
+from tesseract_sim.estimation.channel_lookup import run_channel_noise_experiment
+from tesseract_sim.estimation.reweighting import reweighted_sweep_results
+from tesseract_sim.estimation.sweep import circuit_key
 from tesseract_sim.noise.noise_cfg import NoiseCfg
 import os
-from typing import Callable, Dict, List, TypeVar, Tuple, Literal
+from contextlib import nullcontext
+from functools import partial
+from typing import Callable, Dict, List, Optional, TypeVar, Tuple, Literal
 import argparse
 from datetime import datetime
 import time
@@ -13,6 +19,25 @@ import sys, shlex
 
 T = TypeVar('T')  # Type of experiment result
 
+DEFAULT_ROUNDS = list(range(1, 11)) + [15, 20]
+DEFAULT_NOISE_LEVELS = list(np.linspace(0.0000, 0.01, 10))
+
+
+def _pyplot():
+    """
+    matplotlib.pyplot, imported on first use so that simulating doesn't load matplotlib.
+
+    Plots are only saved to files, so if this is the first module to load pyplot and no backend is
+    configured (MPLBACKEND, as set by Jupyter), the headless Agg backend is used. A session that already
+    loaded pyplot keeps its backend and its open figures.
+    """
+    import matplotlib
+    if "matplotlib.pyplot" not in sys.modules and "MPLBACKEND" not in os.environ:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
 def sweep_results(
     experiment_fn: Callable[[int, int, NoiseCfg], T],
     rounds: List[int],
@@ -20,7 +45,8 @@ def sweep_results(
     shots: int,
     cfg_builder: Callable[[float], NoiseCfg],
     apply_pauli_frame: bool = True,
-    encoding_mode: Literal['9a', '9b'] = '9b'
+    encoding_mode: Literal['9a', '9b'] = '9b',
+    metrics: Optional[PipelineMetrics] = None
 ) -> Dict[float, List[T]]:
     """
     Sweeps over rounds and noise levels, collecting full experiment results.
@@ -31,25 +57,51 @@ def sweep_results(
         noise_levels: List of noise levels to sweep
         shots: Number of shots per data point
         cfg_builder: Function that creates a NoiseCfg from a noise level
+        metrics: Records the stage timings of every experiment that is run (see common/profiling.py)
+
+    Noise levels that cfg_builder maps to the same circuit (see circuit_key in estimation/sweep.py),
+    e.g. with fixed rates, are only run once and share their results.
 
     Returns:
         Dictionary mapping noise levels to lists of result tuples (one per round)
     """
     results: Dict[float, List[Tuple[int, int, int]]] = {}
+    done: Dict[tuple, T] = {}
 
     for noise in noise_levels:
         noise_config = cfg_builder(noise)
         tuples = []
 
         for r in rounds:
-            print(f"Processing rounds={r}, noise={noise}")
-            result = experiment_fn(rounds=r, shots=shots, cfg=noise_config, apply_pauli_frame=apply_pauli_frame, encoding_mode=encoding_mode)
-            tuples.append(result)
+            key = circuit_key(r, noise_config, encoding_mode)
+            if key not in done:
+                print(f"Processing rounds={r}, noise={noise}")
+                point = metrics.point(rounds=r, noise=noise, shots=shots, apply_pauli_frame=apply_pauli_frame,
+                                      encoding_mode=encoding_mode) if metrics is not None else nullcontext()
+                with point:
+                    done[key] = experiment_fn(rounds=r, shots=shots, cfg=noise_config, apply_pauli_frame=apply_pauli_frame, encoding_mode=encoding_mode)
+            tuples.append(done[key])
 
         results[noise] = tuples
 
     return results
 
+def compute_acceptance_rate(raw_results: Dict[float, List[Tuple[int, int, float]]], shots: int) -> Dict[float, List[float]]:
+    """Extract EC acceptance rates from raw results.
+
+    Args:
+        raw_results: Dict mapping noise levels to lists of (accepted, logical_pass, avg_fidelity) tuples
+        shots: Number of shots per data point. Results that record their own shot count
+            (e.g. adaptively sampled points) are divided by that count instead.
+
+    Returns:
+        Dict mapping noise levels to lists of acceptance rates (accepted/shots)
+    """
+    return {
+        noise: [t[0] / getattr(t, 'shots', shots) for t in tuples]
+        for noise, tuples in raw_results.items()
+    }
+
 def compute_logical_success_rate(raw_results: Dict[float, List[Tuple[int, int, float]]]) -> Dict[float, List[float]]:
     """Extract logical success rates from raw results. Logical success == all qubits are measured with the correct results.
     
@@ -57,16 +109,24 @@ def compute_logical_success_rate(raw_results: Dict[float, List[Tuple[int, int, f
         raw_results: Dict mapping noise levels to lists of (accepted, logical_pass, avg_fidelity) tuples
         
     Returns:
-        Dict mapping noise levels to lists of logical success rates (logical_pass/accepted)
+        Dict mapping noise levels to lists of logical success rates (logical_pass/accepted).
+        Points without an estimate (NaN counts, e.g. refused reweighting) stay NaN.
     """
     return {
-        noise: [
-            t[1]/t[0] if t[0] > 0 else 0.0  # logical_pass/accepted (conditional probability)
-            for t in tuples
-        ]
+        noise: [_conditional_logical_success(t) for t in tuples]
         for noise, tuples in raw_results.items()
     }
 
+
+def _conditional_logical_success(t) -> float:
+    """logical_pass/accepted (conditional probability) of one (accepted, logical_pass, ...) tuple."""
+    if np.isnan(t[0]):
+        # No estimate, e.g. a refused reweighted point
+        return t[0]
+    if t[0] == 0:
+        return 0.0
+    return t[1]/t[0]
+
 def compute_average_fidelity(raw_results: Dict[float, List[Tuple[int, int, float]]]) -> Dict[float, List[float]]:
     """Extract average fidelity values from raw results.
     
@@ -98,6 +158,7 @@ def plot_curve(
         comparison_data: Optional second dataset for comparison (plotted with dashed lines)
         comparison_label: Label suffix for comparison data
     """
+    plt = _pyplot()
     plt.figure(figsize=(12, 8))
     
     # Plot main data with solid lines
@@ -141,9 +202,22 @@ def write_experiment_metadata(
     ec_rate_2q: float = None,
     meas_error_rate: float = 0.0,
     channel_noise_rate: float = None,
-    comparison_mode: bool = False
+    comparison_mode: bool = False,
+    adaptive_results: Dict[float, list] = None,
+    target_width: float = None,
+    min_acceptance: float = None,
+    reweighted_results: Dict[float, list] = None,
+    reweight_reference: float = None,
+    metrics: PipelineMetrics = None
 ) -> None:
-    """Write experiment metadata to a text file."""
+    """Write experiment metadata to a text file.
+
+    If adaptive_results (noise level -> list of AdaptiveResult, one per round) is given,
+    the shots used and the confidence intervals of every data point are recorded as well.
+    Likewise, reweighted_results (noise level -> list of ReweightedEstimate) records the
+    effective sample size of every reweighted data point. With metrics, the time spent in every
+    stage of the pipeline is summarized (the per-point details are in performance_metrics.json).
+    """
     metadata_path = os.path.join(out_dir, "experiment_metadata.txt")
     
     with open(metadata_path, 'w') as f:
@@ -196,6 +270,41 @@ def write_experiment_metadata(
             f.write(f"  - EC 2Q rate: Swept parameter (same as 1Q)\n")
             f.write(f"  - Channel noise: None (0.0)\n")
             f.write(f"  - Encoding: Noiseless\n")
+
+        if adaptive_results is not None:
+            f.write("\nAdaptive Sampling:\n")
+            f.write("-" * 20 + "\n")
+            f.write(f"Target interval width: {target_width}\n")
+            if min_acceptance:
+                f.write(f"Minimum acceptance: {min_acceptance} (points confidently below it stop early)\n")
+            f.write(f"Shots per data point: adaptive (maximum {shots})\n")
+            for noise, results in adaptive_results.items():
+                for r, result in zip(rounds, results):
+                    acc_lo, acc_hi = result.acceptance_interval
+                    log_lo, log_hi = result.logical_interval
+                    f.write(f"  noise={noise:.6g}, rounds={r}: shots={result.shots}, "
+                            f"acceptance=[{acc_lo:.4f}, {acc_hi:.4f}], "
+                            f"logical|accepted=[{log_lo:.4f}, {log_hi:.4f}], "
+                            f"converged={result.converged}\n")
+
+        if reweighted_results is not None:
+            f.write("\nLikelihood-Ratio Reweighting:\n")
+            f.write("-" * 20 + "\n")
+            f.write(f"Reference noise level: {reweight_reference} ({shots} shots per round count)\n")
+            for noise, results in reweighted_results.items():
+                for r, result in zip(rounds, results):
+                    status = "ok" if result.reliable else "refused"
+                    f.write(f"  noise={noise:.6g}, rounds={r}: effective sample size="
+                            f"{result.effective_sample_size:.1f}, {status}\n")
+
+        if metrics is not None and metrics.points:
+            f.write("\nPerformance:\n")
+            f.write("-" * 20 + "\n")
+            for stage_name, seconds in sorted(metrics.stage_totals().items(), key=lambda item: -item[1]):
+                f.write(f"  {stage_name}: {seconds:.3f} seconds\n")
+            peaks = [point['peak_memory_mb'] for point in metrics.points if point['peak_memory_mb'] is not None]
+            if peaks:
+                f.write(f"  Peak memory: {max(peaks):.1f} MB\n")
     
     print(f"Metadata saved to {metadata_path}")
 
@@ -205,30 +314,43 @@ def _run_and_process(
     shots: int,
     cfg_builder: Callable[[float], NoiseCfg],
     encoding_mode: Literal['9a', '9b'],
-    apply_pauli_frame: bool
-) -> Tuple[Dict[float, List[float]], Dict[float, List[float]], Dict[float, List[float]]]:
+    apply_pauli_frame: bool,
+    experiment_fn: Callable = run_simulation_ec_experiment,
+    reweight_reference: float = None,
+    min_ess_fraction: float = 0.1,
+    metrics: PipelineMetrics = None
+) -> Tuple[Dict[float, List[float]], Dict[float, List[float]], Dict[float, List[float]], Dict[float, list]]:
     """
     Helper to run the EC experiment and process its results.
-    Returns EC acceptance, logical success, and average fidelity.
+    If reweight_reference is given, each round count is sampled once at that noise level and
+    reweighted to every noise level instead of running experiment_fn per data point.
+    Returns EC acceptance, logical success, average fidelity and the raw results.
     """
-    raw_results = sweep_results(
-        run_simulation_ec_experiment,
-        rounds, noise_levels, shots,
-        cfg_builder,
-        apply_pauli_frame=apply_pauli_frame,
-        encoding_mode=encoding_mode
-    )
+    if reweight_reference is not None:
+        raw_results = reweighted_sweep_results(
+            rounds, noise_levels, shots,
+            cfg_builder, reweight_reference,
+            apply_pauli_frame=apply_pauli_frame,
+            encoding_mode=encoding_mode,
+            min_ess_fraction=min_ess_fraction
+        )
+    else:
+        raw_results = sweep_results(
+            experiment_fn,
+            rounds, noise_levels, shots,
+            cfg_builder,
+            apply_pauli_frame=apply_pauli_frame,
+            encoding_mode=encoding_mode,
+            metrics=metrics
+        )
 
-    ec_data = {
-        noise: [t[0]/shots for t in tuples]
-        for noise, tuples in raw_results.items()
-    }
+    ec_data = compute_acceptance_rate(raw_results, shots)
 
     logical_data = compute_logical_success_rate(raw_results)
 
     fidelity_data = compute_average_fidelity(raw_results)
 
-    return ec_data, logical_data, fidelity_data
+    return ec_data, logical_data, fidelity_data, raw_results
 
 def plot_metric(
     rounds: List[int],
@@ -244,6 +366,7 @@ def plot_metric(
     Plots and saves a single metric (e.g., acceptance, logical success, fidelity)
     from sweep data, with optional comparison.
     """
+    plt = _pyplot()
     plt.figure(figsize=(12, 8))
     # Assign consistent colors per noise value
     all_noises = set()
@@ -296,15 +419,48 @@ def plot_ec_experiment(
     ec_rate_2q: float = None,
     meas_error_rate: float = 0.0,
     channel_noise_rate: float = None,
-    comparison_mode: bool = False
-) -> None:
-    """Plots EC experiment curves, optionally comparing with/without Pauli-frame correction."""
+    comparison_mode: bool = False,
+    adaptive: bool = False,
+    target_width: float = 0.02,
+    batch_shots: int = 1000,
+    interval_method: str = 'wilson',
+    min_acceptance: float = 0.0,
+    reweight_reference: float = None,
+    min_ess_fraction: float = 0.1,
+    profile: bool = False
+) -> str:
+    """Plots EC experiment curves, optionally comparing with/without Pauli-frame correction.
+
+    With adaptive=True, shots is the per-point maximum and every point is sampled in increments
+    of batch_shots until its confidence intervals are narrower than target_width, or until its
+    acceptance rate is confidently below min_acceptance.
+
+    With reweight_reference set, shots are only sampled at that noise level (once per round count)
+    and reweighted to the other noise levels. Points whose effective sample size is below
+    min_ess_fraction of the shots are left out of the plots.
+
+    Channel-noise sweeps of the 9a encoding without measurement noise are evaluated by lookup of the
+    channel's Pauli patterns (see estimation/channel_lookup.py) instead of simulating every shot, at
+    the noise levels where the shots repeat few enough patterns for the lookup to be faster.
+
+    The wall time of every pipeline stage and the throughput of each simulated data point are saved to
+    performance_metrics.json (see common/profiling.py). With profile=True, every stage also runs under
+    cProfile, with its stats written to the profiles subdirectory, and the peak memory of each point is
+    traced as well.
+
+    Returns the timestamped output directory.
+    """
+    if adaptive and reweight_reference is not None:
+        raise ValueError("Adaptive sampling and reweighting cannot be combined")
+
     start_time = time.time()
     # Create timestamped output directory
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     suffix = "_comparison" if comparison_mode else ""
     out_dir = os.path.join(base_out_dir, f"ec_experiment_{timestamp}{suffix}")
     os.makedirs(out_dir, exist_ok=True)
+    metrics = PipelineMetrics(profile_dir=os.path.join(out_dir, "profiles") if profile else None,
+                              trace_memory=profile)
 
     # Determine if we're using fixed rates or sweeping
     use_fixed_rates = (ec_rate_1q is not None and ec_rate_2q is not None) or channel_noise_rate is not None
@@ -353,15 +509,29 @@ def plot_ec_experiment(
                 meas_error_rate=meas_error_rate
             )
     
+    if adaptive:
+        experiment_fn = partial(
+            run_adaptive_ec_experiment,
+            target_width=target_width, batch_shots=batch_shots, method=interval_method,
+            min_acceptance=min_acceptance
+        )
+    elif sweep_channel_noise and meas_error_rate == 0 and encoding_mode == '9a':
+        # Only the channel is noisy, so at low noise shots are evaluated by lookup of the channel's Pauli pattern
+        experiment_fn = run_channel_noise_experiment
+    else:
+        experiment_fn = run_simulation_ec_experiment
+
     # Run sweeping and processing in helper
-    ec_main, log_main, fid_main = _run_and_process(
-        rounds, noise_levels, shots, cfg_builder, encoding_mode, apply_pauli_frame
+    ec_main, log_main, fid_main, raw_main = _run_and_process(
+        rounds, noise_levels, shots, cfg_builder, encoding_mode, apply_pauli_frame, experiment_fn,
+        reweight_reference, min_ess_fraction, metrics
     )
 
     # Prepare datasets and styles
     if comparison_mode:
-        ec_comp, log_comp, fid_comp = _run_and_process(
-            rounds, noise_levels, shots, cfg_builder, encoding_mode, not apply_pauli_frame
+        ec_comp, log_comp, fid_comp, _ = _run_and_process(
+            rounds, noise_levels, shots, cfg_builder, encoding_mode, not apply_pauli_frame, experiment_fn,
+            reweight_reference, min_ess_fraction, metrics
         )
         labels = ['with correction', 'without correction']
         datasets_accept = {
@@ -422,10 +592,18 @@ def plot_ec_experiment(
         runtime_seconds=runtime_seconds,
         ec_rate_1q=ec_rate_1q, ec_rate_2q=ec_rate_2q,
         meas_error_rate=meas_error_rate, channel_noise_rate=channel_noise_rate,
-        comparison_mode=comparison_mode
+        comparison_mode=comparison_mode,
+        adaptive_results=raw_main if adaptive else None,
+        target_width=target_width if adaptive else None,
+        min_acceptance=min_acceptance if adaptive else None,
+        reweighted_results=raw_main if reweight_reference is not None else None,
+        reweight_reference=reweight_reference,
+        metrics=metrics
     )
+    metrics.save(os.path.join(out_dir, "performance_metrics.json"))
     print(f"All experiment files saved to: {out_dir}")
     print(f"Total experiment runtime: {runtime_seconds:.1f} seconds")
+    return out_dir
 
 def str_to_bool(v):
     """Convert string to boolean for argparse."""
@@ -440,8 +618,8 @@ def str_to_bool(v):
 
 def main():
     # Define defaults
-    default_rounds = list(range(1, 11)) + [15, 20]
-    default_noise_levels = list(np.linspace(0.0000, 0.01, 10))
+    default_rounds = DEFAULT_ROUNDS
+    default_noise_levels = DEFAULT_NOISE_LEVELS
     
     parser = argparse.ArgumentParser(description="Generate acceptance rate plots for tesseract experiments")
     parser.add_argument('--experiments', type=int, nargs='+', choices=[2], default=[2],
@@ -467,6 +645,22 @@ def main():
                       help='Channel noise rate (overrides noise-levels sweep when using --sweep-channel-noise)')
     parser.add_argument('--comparison-mode', action='store_true',
                       help='Run comparison between experiments with and without apply_pauli_frame')
+    parser.add_argument('--adaptive', action='store_true',
+                      help='Sample each data point in increments until its confidence intervals reach --target-width. --shots becomes the per-point maximum.')
+    parser.add_argument('--target-width', type=float, default=0.02,
+                      help='Target confidence interval width for acceptance and logical success (adaptive mode)')
+    parser.add_argument('--batch-shots', type=int, default=1000,
+                      help='Shots sampled per increment (adaptive mode)')
+    parser.add_argument('--interval-method', type=str, choices=['wilson', 'clopper-pearson'], default='wilson',
+                      help='Confidence interval method (adaptive mode)')
+    parser.add_argument('--min-acceptance', type=float, default=0.0,
+                      help='Stop sampling points whose acceptance rate is confidently below this value (adaptive mode)')
+    parser.add_argument('--reweight-reference', type=float, default=None,
+                      help='Sample only at this noise level (once per round count) and estimate the other noise levels by likelihood-ratio reweighting. Should be the highest noise level of the sweep.')
+    parser.add_argument('--min-ess-fraction', type=float, default=0.1,
+                      help='Leave out reweighted points whose effective sample size is below this fraction of the shots')
+    parser.add_argument('--profile', action='store_true',
+                      help='Run every pipeline stage under cProfile and write the stats of each data point to the profiles subdirectory, and trace the peak memory of each data point')
     args = parser.parse_args()
 
     # Use configurable values
@@ -481,7 +675,8 @@ def main():
             rounds, noise_levels, args.shots, args.out_dir, 
             args.apply_pauli_frame, args.encoding_mode, args.sweep_channel_noise,
             args.ec_rate_1q, args.ec_rate_2q, args.meas_error_rate, args.channel_noise_rate,
-            args.comparison_mode
+            args.comparison_mode, args.adaptive, args.target_width, args.batch_shots,
+            args.interval_method, args.min_acceptance, args.reweight_reference, args.min_ess_fraction, args.profile
         )
 
 if __name__ == "__main__":
@@ -1,19 +1,32 @@
 import argparse
+from contextlib import contextmanager
+from dataclasses import astuple
+from functools import lru_cache
+
+import numpy as np
+import stim
 
 from tesseract_sim.encoding.encoding_manual_9b import encode_manual_fig9b
 from tesseract_sim.common.circuit_base import init_circuit, channel
+from tesseract_sim.common.profiling import stage
 from tesseract_sim.encoding.encoding_manual_9a import encode_manual_fig9a
-from typing import Literal
+from tesseract_sim.encoding.preselection import preselection_checks, run_preselected_error_correction
+from typing import Literal, Optional
 from tesseract_sim.error_correction.measurement_rounds import error_correct_manual, measure_logical_operators_tesseract
-from tesseract_sim.error_correction.decoder_manual import run_manual_error_correction
+from tesseract_sim.error_correction.decoder_manual import decode_shots, run_manual_error_correction, \
+    summarize_decoded_shots
 from tesseract_sim.noise.noise_cfg import NoiseCfg, NO_NOISE
+from tesseract_sim.storage.circuit_cache import cached_circuit_ec_experiment
+from tesseract_sim.storage.records import export_records, open_records
 
 
-def build_circuit_ec_experiment(rounds: int, cfg: NoiseCfg = NO_NOISE, encoding_mode: Literal['9a', '9b'] = '9b'):
+def build_circuit_ec_experiment(rounds: int, cfg: NoiseCfg = NO_NOISE, encoding_mode: Literal['9a', '9b'] = '9b',
+                                preselect: bool = False):
     # Here we can use either Fig 9a encoding (|++0000>) or Fig 9b encoding (|+0+0+0>)
     # depending on the encoding_mode parameter.
+    # With preselect, the encoding measures its flags (see encoding/preselection.py).
 
-    circuit = build_encoding_circuit(cfg, encoding_mode)
+    circuit = build_encoding_circuit(cfg, encoding_mode, preselect)
     # -----------------------------
 
     if cfg.channel_noise_level > 0:
@@ -26,34 +39,143 @@ def build_circuit_ec_experiment(rounds: int, cfg: NoiseCfg = NO_NOISE, encoding_
 
 
 def build_error_correction_circuit(cfg, circuit, rounds):
-    # Append the error correction rounds to the circuit
-    error_correct_manual(circuit, rounds=rounds, cfg=cfg)
-    measure_logical_operators_tesseract(circuit, cfg=cfg)
+    # Append the error correction rounds to the circuit, as a REPEAT block of the cached round
+    circuit += _error_correction_round(astuple(cfg)) * rounds
+    circuit += _readout(astuple(cfg))
+
+
+def build_encoding_circuit(cfg, encoding_mode, preselect=False):
+    # The encoding is built once per configuration, callers get their own copy to append to
+    if encoding_mode not in ('9a', '9b'):
+        raise ValueError(f"Invalid encoding_mode: {encoding_mode}. Must be '9a' or '9b'")
+    return _encoding(astuple(cfg), encoding_mode, preselect).copy()
 
 
-def build_encoding_circuit(cfg, encoding_mode):
+# The fragments of the experiment are identical for every round count, so each is built once per noise
+# configuration (keyed by the NoiseCfg fields, as NoiseCfg isn't hashable). They are shared: never modify them.
+
+@lru_cache(maxsize=None)
+def _encoding(cfg_fields, encoding_mode, preselect):
+    cfg = NoiseCfg(*cfg_fields)
     # We start with a fresh circuit
     circuit = init_circuit(qubits=16, ancillas=2)
     # First, prepare a valid encoded state based on encoding mode
+    # (the 9b encoding always measures its ancillas, so preselect only changes the 9a circuit)
     if encoding_mode == '9a':
-        encode_manual_fig9a(circuit, cfg=cfg)
-    elif encoding_mode == '9b':
-        encode_manual_fig9b(circuit, cfg=cfg)
+        encode_manual_fig9a(circuit, cfg=cfg, measure_flags=preselect)
     else:
-        raise ValueError(f"Invalid encoding_mode: {encoding_mode}. Must be '9a' or '9b'")
+        encode_manual_fig9b(circuit, cfg=cfg)
     return circuit
 
 
-def run_simulation_ec_experiment(rounds: int, shots: int, cfg: NoiseCfg = NO_NOISE, apply_pauli_frame = True, encoding_mode: Literal['9a', '9b'] = '9b'):
-    circuit = build_circuit_ec_experiment(rounds, cfg, encoding_mode=encoding_mode)
+@lru_cache(maxsize=None)
+def _preselection_checks(encoding_mode):
+    # The checks only depend on the noiseless encoding, and finding them samples its records
+    return preselection_checks(_encoding(astuple(NO_NOISE), encoding_mode, True))
+
+
+@lru_cache(maxsize=None)
+def _error_correction_round(cfg_fields):
+    circuit = stim.Circuit()
+    error_correct_manual(circuit, rounds=1, cfg=NoiseCfg(*cfg_fields))
+    return circuit
+
+
+@lru_cache(maxsize=None)
+def _readout(cfg_fields):
+    circuit = stim.Circuit()
+    measure_logical_operators_tesseract(circuit, cfg=NoiseCfg(*cfg_fields))
+    return circuit
+
+
+# Circuits and compiled samplers of the experiments run within share_circuits, keyed by their parameters
+_shared_circuits = None
+
+
+@contextmanager
+def share_circuits():
+    """
+    Within this block, run_simulation_ec_experiment builds and compiles each distinct experiment only once.
+
+    The circuit and its compiled sampler are kept and reused by later experiments with the same parameters,
+    e.g. by several sweeps run in one process (see plotting/batch.py). Nested blocks share the outer store.
+    """
+    global _shared_circuits
+    previous = _shared_circuits
+    if previous is None:
+        _shared_circuits = {}
+    try:
+        yield
+    finally:
+        _shared_circuits = previous
+
+
+def clear_circuit_fragments():
+    """Empties the fragment caches, so the next circuits are built from scratch (e.g. to time the builders)."""
+    _encoding.cache_clear()
+    _preselection_checks.cache_clear()
+    _error_correction_round.cache_clear()
+    _readout.cache_clear()
+
+
+def _compile_shared_sampler(shared):
+    # Within share_circuits, the sampler is compiled on first use and kept with its circuit
+    if _shared_circuits is not None and 'sampler' not in shared:
+        with stage('compile_sampler'):
+            shared['sampler'] = shared['circuit'].compile_sampler()
+
+
+def run_simulation_ec_experiment(rounds: int, shots: int, cfg: NoiseCfg = NO_NOISE, apply_pauli_frame = True, encoding_mode: Literal['9a', '9b'] = '9b',
+                                 record_dir: Optional[str] = None, record_format: str = 'b8', chunk_shots: int = 100000,
+                                 decoder: Optional[str] = None, readout: Optional[str] = None, preselect: bool = False,
+                                 circuit_cache: Optional[str] = None, workers: Optional[int] = 1):
+    if preselect and record_dir is not None:
+        raise ValueError("Preselection is applied to sampled records in memory, it can't be combined with record_dir")
+    if preselect and workers != 1:
+        raise ValueError("Preselection decodes the preselected shots in this process, it can't be combined with workers")
+    key = (rounds, astuple(cfg), encoding_mode, preselect)
+    shared = _shared_circuits.get(key) if _shared_circuits is not None else None
+    if shared is None:
+        with stage('build_circuit'):
+            if circuit_cache is not None:
+                # Load the circuit from the on-disk cache, building and storing it on first use
+                circuit = cached_circuit_ec_experiment(rounds, cfg, encoding_mode, preselect, directory=circuit_cache)
+            else:
+                circuit = build_circuit_ec_experiment(rounds, cfg, encoding_mode=encoding_mode, preselect=preselect)
+        shared = {'circuit': circuit}
+        if _shared_circuits is not None:
+            _shared_circuits[key] = shared
+    circuit = shared['circuit']
 
     print(f"--- Running Manual Error Correction Simulation (with Logical Check) ---")
     print(f"Rounds: {rounds}, Shots: {shots}, Encoding: Fig {encoding_mode}")
-    
-    return run_manual_error_correction(circuit, shots=shots, rounds=rounds, apply_pauli_frame=apply_pauli_frame, encoding_mode=encoding_mode)
 
+    if preselect:
+        # Noisy encoding: shots whose encoding flags or checks fire are discarded before decoding
+        _compile_shared_sampler(shared)
+        return run_preselected_error_correction(circuit, _preselection_checks(encoding_mode), shots, rounds,
+                                                apply_pauli_frame, encoding_mode, decoder=decoder, readout=readout,
+                                                sampler=shared.get('sampler'))
+
+    if record_dir is not None:
+        # Write the records to disk chunk by chunk and decode them back from there
+        export_records(record_dir, circuit, shots, rounds, encoding_mode, cfg, record_format, chunk_shots)
+        print(f"Measurement records written to {record_dir} ({record_format})")
+        decoded = [decode_shots(batch, rounds, apply_pauli_frame, encoding_mode, decoder=decoder, readout=readout)
+                   for batch in open_records(record_dir).batches(chunk_shots)]
+        accepted = np.concatenate([a for a, _ in decoded]) if decoded else np.zeros(0, dtype=bool)
+        successful_checks = np.concatenate([c for _, c in decoded]) if decoded else np.zeros(0, dtype=np.int64)
+        return summarize_decoded_shots(accepted, successful_checks, apply_pauli_frame, encoding_mode)
+
+    _compile_shared_sampler(shared)
+    return run_manual_error_correction(circuit, shots=shots, rounds=rounds, apply_pauli_frame=apply_pauli_frame, encoding_mode=encoding_mode,
+                                       decoder=decoder, readout=readout, workers=workers, sampler=shared.get('sampler'))
+
+
+def main():
+    # Imported here, as the registry loads the optional JIT decoder
+    from tesseract_sim.error_correction.decoders import DECODERS
 
-if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run tesseract code simulation with configurable noise.")
     parser.add_argument("--rounds", type=int, default=3, help="Number of error correction rounds.")
     parser.add_argument("--shots", type=int, default=1000, help="Number of simulation shots.")
@@ -68,6 +190,14 @@ if __name__ == "__main__":
     parser.add_argument("--experiment", type=int, choices=[1], default=1, help="Which experiment to run (only 1 available)")
     parser.add_argument("--no-apply-pauli-frame", action="store_false", dest="apply_pauli_frame", help="Disable Pauli frame corrections during logical verification")
     parser.add_argument("--encoding-mode", type=str, choices=['9a', '9b'], default='9b', help="Encoding mode, based on Fig 9a or 9b in the paper")
+    parser.add_argument("--record-dir", type=str, default=None, help="Write the measurement records to this directory (with a layout.json sidecar) and decode them from disk")
+    parser.add_argument("--record-format", type=str, choices=['b8', '01', 'r8'], default='b8', help="Stim format of the written records")
+    parser.add_argument("--chunk-shots", type=int, default=100000, help="Shots per record file and decoded batch")
+    parser.add_argument("--readout", type=str, choices=['parity', 'ml'], default='parity', help="Check the final parities directly, or decode the [[8,3,2]] readout blocks with lookup tables first")
+    parser.add_argument("--decoder", type=str, choices=sorted(DECODERS), default=None, help="Registered decoder to use (default: dedup)")
+    parser.add_argument("--preselect", action="store_true", help="Measure the encoding flags and checks, and discard the shots where they fire before decoding")
+    parser.add_argument("--workers", type=int, default=1, help="Decoding processes sharing the sampled records (0 for all cores)")
+    parser.add_argument("--circuit-cache", type=str, nargs='?', const='', default=None, help="Load the circuit from this on-disk .stim cache, building it on first use (default directory: $TESSERACT_CIRCUIT_CACHE or ~/.cache/tesseract_sim/circuits)")
     
     args = parser.parse_args()
 
@@ -84,4 +214,12 @@ if __name__ == "__main__":
     )
 
 
-    run_simulation_ec_experiment(rounds=args.rounds, shots=args.shots, cfg=sim_cfg, apply_pauli_frame=args.apply_pauli_frame, encoding_mode=args.encoding_mode)
\ No newline at end of file
+    run_simulation_ec_experiment(rounds=args.rounds, shots=args.shots, cfg=sim_cfg, apply_pauli_frame=args.apply_pauli_frame, encoding_mode=args.encoding_mode,
+                                 record_dir=args.record_dir, record_format=args.record_format, chunk_shots=args.chunk_shots,
+                                 decoder=args.decoder, readout=None if args.readout == 'parity' else args.readout,
+                                 preselect=args.preselect, circuit_cache=args.circuit_cache,
+                                 workers=args.workers or None)
+
+
+if __name__ == "__main__":
+    main()
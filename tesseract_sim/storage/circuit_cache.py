@@ -0,0 +1,94 @@
+import hashlib
+import importlib
+import json
+import os
+import tempfile
+from dataclasses import astuple
+from functools import lru_cache
+from typing import Literal, Optional
+
+import stim
+
+from tesseract_sim.noise.noise_cfg import NO_NOISE, NoiseCfg
+
+# Modules whose code determines the experiment circuits, the cache is invalidated when any of them changes
+BUILDER_MODULES = (
+    'tesseract_sim.run',
+    'tesseract_sim.common.circuit_base',
+    'tesseract_sim.common.code_commons',
+    'tesseract_sim.encoding.encoding_manual_9a',
+    'tesseract_sim.encoding.encoding_manual_9b',
+    'tesseract_sim.error_correction.measurement_rounds',
+    'tesseract_sim.noise.noise_cfg',
+    'tesseract_sim.noise.noise_utils',
+)
+
+CACHE_DIR_ENV = "TESSERACT_CIRCUIT_CACHE"
+
+
+@lru_cache(maxsize=None)
+def code_version() -> str:
+    """Hash of the sources of BUILDER_MODULES and of the Stim version, identifying the circuits they build."""
+    digest = hashlib.sha256(stim.__version__.encode())
+    for name in BUILDER_MODULES:
+        with open(importlib.import_module(name).__file__, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def default_cache_dir() -> str:
+    """The directory given by the TESSERACT_CIRCUIT_CACHE variable, or ~/.cache/tesseract_sim/circuits."""
+    return os.environ.get(CACHE_DIR_ENV) or os.path.join(os.path.expanduser("~"), ".cache", "tesseract_sim", "circuits")
+
+
+def circuit_path(directory: str, rounds: int, cfg: NoiseCfg = NO_NOISE, encoding_mode: Literal['9a', '9b'] = '9b',
+                 preselect: bool = False) -> str:
+    """
+    Path of the cached circuit of an EC experiment.
+
+    Circuits live in a subdirectory per code_version, so circuits built by older code are never loaded.
+    The file name is a hash of the experiment's parameters.
+    """
+    key = json.dumps([int(rounds), encoding_mode, bool(preselect), list(astuple(cfg))])
+    name = f"ec_{encoding_mode}_r{int(rounds)}_{hashlib.sha256(key.encode()).hexdigest()[:16]}.stim"
+    return os.path.join(directory, code_version(), name)
+
+
+def cached_circuit_ec_experiment(rounds: int, cfg: NoiseCfg = NO_NOISE, encoding_mode: Literal['9a', '9b'] = '9b',
+                                 preselect: bool = False, directory: Optional[str] = None) -> stim.Circuit:
+    """
+    build_circuit_ec_experiment, through an on-disk cache of .stim files.
+
+    The circuit is loaded with stim.Circuit.from_file if it's in the cache. Otherwise it's built and written
+    to a temporary file that is renamed into place, so concurrent workers never read a partial file.
+    Stim writes rates with limited precision, so circuits that don't read back exactly (rates with many
+    significant digits) are built every time rather than cached.
+
+    Args:
+        rounds, cfg, encoding_mode, preselect: As in build_circuit_ec_experiment
+        directory: The cache directory, default_cache_dir() if None or ''
+
+    Returns:
+        The EC experiment circuit
+    """
+    path = circuit_path(directory or default_cache_dir(), rounds, cfg, encoding_mode, preselect)
+    if os.path.exists(path):
+        return stim.Circuit.from_file(path)
+
+    # Imported here, as run.py uses this module to load its circuits
+    from tesseract_sim.run import build_circuit_ec_experiment
+    circuit = build_circuit_ec_experiment(rounds, cfg, encoding_mode=encoding_mode, preselect=preselect)
+    text = str(circuit)
+    if stim.Circuit(text) != circuit:
+        return circuit
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text + "\n")
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return circuit
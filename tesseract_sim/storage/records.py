@@ -0,0 +1,131 @@
+import os
+from typing import Iterator, Literal, Optional
+
+import numpy as np
+import stim
+
+from tesseract_sim.common.record_layout import RECORD_FORMATS, RecordChunk, RecordLayout
+from tesseract_sim.error_correction.decoder_manual import get_decoding_parameters
+from tesseract_sim.noise.noise_cfg import NO_NOISE, NoiseCfg
+
+LAYOUT_FILE = "layout.json"
+
+
+def export_records(
+    directory: str,
+    circuit: stim.Circuit,
+    shots: int,
+    rounds: int,
+    encoding_mode: Literal['9a', '9b'] = '9b',
+    cfg: NoiseCfg = NO_NOISE,
+    format: str = 'b8',
+    chunk_shots: int = 100000,
+    seed: Optional[int] = None
+) -> RecordLayout:
+    """
+    Samples the circuit straight to disk, chunk_shots at a time, and writes the layout sidecar.
+
+    Stim writes the records itself (sample_write), so no more than one chunk of shots is ever held in
+    memory. The directory gets one file per chunk and LAYOUT_FILE describing them.
+
+    Args:
+        directory: Output directory, created if needed
+        circuit: The EC experiment circuit (see build_circuit_ec_experiment)
+        shots: Number of shots
+        rounds: Number of error correction rounds in the circuit
+        encoding_mode: '9a' or '9b', recorded for decoding
+        cfg: Noise configuration the circuit was built with, recorded for reference
+        format: Stim shot data format: 'b8' (bit-packed), '01' (text) or 'r8' (run-length)
+        chunk_shots: Shots per file
+        seed: Seed for Stim's sampler
+
+    Returns:
+        The RecordLayout that was written
+    """
+    if format not in RECORD_FORMATS:
+        raise ValueError(f"Unsupported record format {format}, must be one of {RECORD_FORMATS}")
+    if chunk_shots <= 0:
+        raise ValueError(f"chunk_shots must be positive, got {chunk_shots}")
+
+    os.makedirs(directory, exist_ok=True)
+    measurement_offset, _, _ = get_decoding_parameters(encoding_mode)
+    layout = RecordLayout(
+        num_measurements=circuit.num_measurements,
+        rounds=rounds,
+        encoding_mode=encoding_mode,
+        measurement_offset=measurement_offset,
+        format=format,
+        cfg=cfg,
+    )
+    sampler = circuit.compile_sampler(seed=seed)
+    for index, start in enumerate(range(0, shots, chunk_shots)):
+        chunk = RecordChunk(file=f"records_{index:05d}.{format}", shots=min(chunk_shots, shots - start))
+        sampler.sample_write(chunk.shots, filepath=os.path.join(directory, chunk.file), format=format)
+        layout.chunks.append(chunk)
+
+    with open(os.path.join(directory, LAYOUT_FILE), "w") as f:
+        f.write(layout.to_json())
+    return layout
+
+
+class RecordSet:
+    """
+    Measurement records written by export_records, read back through memory maps.
+
+    raw_chunk returns a view of a file without reading or copying it: b8 files as (shots, bytes per shot)
+    packed bits, 01 files as (shots, num_measurements) ASCII '0'/'1' characters. batches unpacks a
+    limited number of shots at a time into boolean records for the decoder, so record sets larger than
+    memory can be decoded. r8 files can't be mapped, they are read whole, one chunk at a time.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, LAYOUT_FILE)) as f:
+            self.layout = RecordLayout.from_json(f.read())
+
+    def __len__(self) -> int:
+        return self.layout.shots
+
+    def raw_chunk(self, index: int) -> np.ndarray:
+        """Memory-mapped view of chunk index (b8 and 01 formats)."""
+        chunk = self.layout.chunks[index]
+        path = os.path.join(self.directory, chunk.file)
+        n = self.layout.num_measurements
+        if self.layout.format == 'b8':
+            return np.memmap(path, dtype=np.uint8, mode='r', shape=(chunk.shots, (n + 7) // 8))
+        if self.layout.format == '01':
+            # Every shot is a line of n characters
+            return np.memmap(path, dtype=np.uint8, mode='r', shape=(chunk.shots, n + 1))[:, :n]
+        raise ValueError(f"{self.layout.format} records can't be memory-mapped")
+
+    def chunk(self, index: int) -> np.ndarray:
+        """Chunk index as boolean records, one row per shot."""
+        return self.read(index, 0, self.layout.chunks[index].shots)
+
+    def batches(self, batch_shots: int = 100000) -> Iterator[np.ndarray]:
+        """Yields the records in order, as boolean arrays of at most batch_shots shots."""
+        if batch_shots <= 0:
+            raise ValueError(f"batch_shots must be positive, got {batch_shots}")
+        for index, chunk in enumerate(self.layout.chunks):
+            if self.layout.format == 'r8':
+                records = self.read(index, 0, chunk.shots)
+                for start in range(0, chunk.shots, batch_shots):
+                    yield records[start:start + batch_shots]
+                continue
+            for start in range(0, chunk.shots, batch_shots):
+                yield self.read(index, start, min(start + batch_shots, chunk.shots))
+
+    def read(self, index: int, start: int, stop: int) -> np.ndarray:
+        """Shots start..stop of chunk index as boolean records."""
+        n = self.layout.num_measurements
+        if self.layout.format == 'b8':
+            return np.unpackbits(self.raw_chunk(index)[start:stop], axis=1, count=n, bitorder='little').astype(bool)
+        if self.layout.format == '01':
+            return self.raw_chunk(index)[start:stop] == ord('1')
+        path = os.path.join(self.directory, self.layout.chunks[index].file)
+        return stim.read_shot_data_file(path=path, format='r8', num_measurements=n)[start:stop]
+
+
+def open_records(directory: str) -> RecordSet:
+    """Opens the records written to directory by export_records."""
+    return RecordSet(directory)
@@ -0,0 +1,97 @@
+import argparse
+import multiprocessing
+from typing import List, Optional, Tuple
+
+from tesseract_sim.error_correction.decoder_manual import DecodingCounts, decode_shots, summarize_decoding_counts
+from tesseract_sim.storage.records import open_records
+
+
+def _slices(directory: str, batch_shots: int) -> List[Tuple[int, int, int]]:
+    """(chunk index, first shot, end shot) of every batch of the records."""
+    records = open_records(directory)
+    return [(index, start, min(start + batch_shots, chunk.shots))
+            for index, chunk in enumerate(records.layout.chunks)
+            for start in range(0, chunk.shots, batch_shots)]
+
+
+def _decode_slice(task) -> DecodingCounts:
+    directory, index, start, stop, apply_pauli_frame, only_z_checks, decoder = task
+    records = open_records(directory)
+    layout = records.layout
+    shot_data = records.read(index, start, stop)
+    accepted, successful_checks = decode_shots(shot_data, layout.rounds, apply_pauli_frame, layout.encoding_mode,
+                                               only_z_checks=only_z_checks, decoder=decoder)
+    max_checks = 2 if only_z_checks else 4
+    return DecodingCounts(len(shot_data), int(accepted.sum()), int((successful_checks == max_checks).sum()),
+                          int(successful_checks.sum()))
+
+
+def redecode(
+    directory: str,
+    apply_pauli_frame: bool = True,
+    only_z_checks: Optional[bool] = None,
+    workers: int = 1,
+    batch_shots: int = 100000,
+    decoder: Optional[str] = None
+):
+    """
+    Decodes measurement records written by export_records, without simulating again.
+
+    The records are decoded with the current decoder (correction_rules.py) and the given settings, in
+    batches of batch_shots shots that are spread over workers processes. Every batch is reduced to
+    counts, so nothing but the counts is sent back from the workers.
+
+    Args:
+        directory: Directory with the records and their layout sidecar
+        apply_pauli_frame: Whether to apply Pauli frame corrections
+        only_z_checks: Only check Z₃ and Z₅, default as implied by the recorded encoding mode
+        workers: Number of processes (1 decodes in this process)
+        batch_shots: Shots decoded at a time
+        decoder: Name of a registered decoder (see decoders.py), default as in decode_shots
+
+    Returns:
+        tuple: (ec_accept, logical_shots_passed, average_percentage), as in run_manual_error_correction
+    """
+    if batch_shots <= 0 or workers <= 0:
+        raise ValueError(f"batch_shots and workers must be positive, got {batch_shots} and {workers}")
+
+    layout = open_records(directory).layout
+    if only_z_checks is None:
+        only_z_checks = layout.encoding_mode == '9a'
+    tasks = [(directory, index, start, stop, apply_pauli_frame, only_z_checks, decoder)
+             for index, start, stop in _slices(directory, batch_shots)]
+
+    total = DecodingCounts(0, 0, 0, 0)
+    if workers == 1:
+        for task in tasks:
+            total += _decode_slice(task)
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            for counts in pool.imap_unordered(_decode_slice, tasks):
+                total += counts
+
+    print(f"Re-decoded {total.shots} shots from {directory} (rounds={layout.rounds}, encoding={layout.encoding_mode})")
+    return summarize_decoding_counts(total.shots, total.ec_accept, total.logical_shots_passed,
+                                     total.total_successful_checks, apply_pauli_frame, only_z_checks)
+
+
+def main():
+    # Imported here, as the registry loads the optional JIT decoder
+    from tesseract_sim.error_correction.decoders import DECODERS
+
+    parser = argparse.ArgumentParser(description="Decode stored measurement records again, without re-simulating.")
+    parser.add_argument('directory', type=str, help='Directory written by export_records (run.py --record-dir)')
+    parser.add_argument('--no-apply-pauli-frame', action='store_false', dest='apply_pauli_frame', help='Disable Pauli frame corrections')
+    checks = parser.add_mutually_exclusive_group()
+    checks.add_argument('--only-z-checks', action='store_true', default=None, help='Only check Z3 and Z5')
+    checks.add_argument('--all-checks', action='store_false', dest='only_z_checks', help='Check X4, X6, Z3 and Z5')
+    parser.add_argument('--workers', type=int, default=1, help='Number of decoding processes')
+    parser.add_argument('--batch-shots', type=int, default=100000, help='Shots decoded at a time')
+    parser.add_argument('--decoder', type=str, choices=sorted(DECODERS), default=None, help='Registered decoder to use (default: dedup)')
+    args = parser.parse_args()
+
+    redecode(args.directory, args.apply_pauli_frame, args.only_z_checks, args.workers, args.batch_shots, args.decoder)
+
+
+if __name__ == "__main__":
+    main()
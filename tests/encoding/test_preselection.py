@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from tesseract_sim.encoding.encoding_manual_9a import NUM_FLAG_MEASUREMENTS_9A
+from tesseract_sim.encoding.preselection import PreselectedResult, preselection_checks, preselection_mask, \
+    strip_flag_measurements
+from tesseract_sim.error_correction.decoder_manual import decode_shots
+from tesseract_sim.noise.noise_cfg import NO_NOISE, NoiseCfg
+from tesseract_sim.run import _preselection_checks, build_circuit_ec_experiment, build_encoding_circuit, \
+    run_simulation_ec_experiment
+
+
+@pytest.mark.parametrize("encoding_mode, num_measurements", [('9a', NUM_FLAG_MEASUREMENTS_9A), ('9b', 4)])
+def test_encoding_checks_are_deterministic(encoding_mode, num_measurements):
+    """Every flag and check of the encodings has a fixed outcome without faults."""
+    checks = preselection_checks(build_encoding_circuit(NO_NOISE, encoding_mode, preselect=True))
+    assert checks.num_encoding_measurements == num_measurements
+    assert list(checks.columns) == list(range(num_measurements))
+    assert not checks.expected.any()
+
+
+def test_9a_flags_only_added_with_preselect():
+    plain = build_circuit_ec_experiment(2, NO_NOISE, encoding_mode='9a')
+    preselecting = build_circuit_ec_experiment(2, NO_NOISE, encoding_mode='9a', preselect=True)
+    assert preselecting.num_measurements == plain.num_measurements + NUM_FLAG_MEASUREMENTS_9A
+
+
+def test_mask_rejects_fired_checks():
+    checks = preselection_checks(build_encoding_circuit(NO_NOISE, '9a', preselect=True))
+    records = np.zeros((3, 50), dtype=bool)
+    records[1, 3] = True    # a flag fired
+    records[2, 20] = True   # not an encoding measurement
+    assert preselection_mask(records, checks).tolist() == [True, False, True]
+
+
+def test_stripped_records_decode_like_plain_encoding():
+    circuit = build_circuit_ec_experiment(2, NO_NOISE, encoding_mode='9a', preselect=True)
+    records = strip_flag_measurements(circuit.compile_sampler(seed=3).sample(200), '9a')
+    assert records.shape[1] == build_circuit_ec_experiment(2, NO_NOISE, encoding_mode='9a').num_measurements
+    accepted, successful_checks = decode_shots(records, 2, encoding_mode='9a')
+    assert accepted.all()
+    assert (successful_checks == 2).all()
+
+
+def test_no_noise_preselection_accepts_all():
+    result = run_simulation_ec_experiment(rounds=1, shots=200, cfg=NO_NOISE, encoding_mode='9a', preselect=True)
+    assert result == PreselectedResult(200, 200, 1.0, 200)
+    # EC counts come first, as in every other result
+    assert result[:3] == (200, 200, 1.0)
+
+
+def test_preselection_removes_faulty_preparations():
+    """With a noisy encoding, the EC rounds reject far fewer of the preselected shots than of all shots."""
+    cfg = NoiseCfg(enc_active=True, enc_rate_1q=1e-3, enc_rate_2q=5e-3)
+    rounds = 3
+    circuit = build_circuit_ec_experiment(rounds, cfg, encoding_mode='9a', preselect=True)
+    checks = preselection_checks(build_encoding_circuit(NO_NOISE, '9a', preselect=True))
+    records = circuit.compile_sampler(seed=11).sample(5000)
+
+    mask = preselection_mask(records, checks)
+    assert 0.5 < mask.mean() < 0.99
+    accepted, _ = decode_shots(strip_flag_measurements(records, '9a'), rounds, encoding_mode='9a')
+    rejected = ~accepted
+    assert rejected[mask].mean() < rejected.mean() / 5
+
+
+def test_preselect_cannot_be_written_to_disk(tmp_path):
+    with pytest.raises(ValueError):
+        run_simulation_ec_experiment(rounds=1, shots=10, encoding_mode='9a', preselect=True, record_dir=str(tmp_path))
+
+
+def test_preselect_cannot_use_workers():
+    with pytest.raises(ValueError):
+        run_simulation_ec_experiment(rounds=1, shots=10, encoding_mode='9a', preselect=True, workers=2)
+
+
+def test_preselection_checks_are_found_once():
+    _preselection_checks.cache_clear()
+    for _ in range(3):
+        run_simulation_ec_experiment(rounds=1, shots=10, encoding_mode='9a', preselect=True)
+    assert _preselection_checks.cache_info().misses == 1
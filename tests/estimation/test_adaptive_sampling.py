@@ -0,0 +1,109 @@
+import pytest
+from tesseract_sim.estimation.adaptive import run_adaptive_ec_experiment, AdaptiveResult
+from tesseract_sim.estimation.intervals import (
+    wilson_interval,
+    clopper_pearson_interval,
+    binomial_interval,
+    regularized_incomplete_beta,
+)
+from tesseract_sim.noise.noise_cfg import NoiseCfg, NO_NOISE
+from tesseract_sim.plotting.plot_acceptance_rates import compute_acceptance_rate
+
+
+class TestIntervals:
+    """Test the binomial confidence intervals used by the adaptive sampler."""
+
+    def test_wilson_known_value(self):
+        """Wilson interval for 5/10 at 95% confidence."""
+        lo, hi = wilson_interval(5, 10, 0.95)
+        assert lo == pytest.approx(0.2366, abs=1e-4)
+        assert hi == pytest.approx(0.7634, abs=1e-4)
+
+    def test_clopper_pearson_known_value(self):
+        """Clopper-Pearson interval for 5/10 at 95% confidence."""
+        lo, hi = clopper_pearson_interval(5, 10, 0.95)
+        assert lo == pytest.approx(0.18709, abs=1e-4)
+        assert hi == pytest.approx(0.81291, abs=1e-4)
+
+    def test_clopper_pearson_edges(self):
+        """All-failure and all-success counts give one-sided exact bounds."""
+        lo, hi = clopper_pearson_interval(0, 100, 0.95)
+        assert lo == 0.0
+        assert hi == pytest.approx(1 - 0.025 ** (1 / 100), rel=1e-6)
+        lo, hi = clopper_pearson_interval(100, 100, 0.95)
+        assert hi == 1.0
+        assert lo == pytest.approx(0.025 ** (1 / 100), rel=1e-6)
+
+    @pytest.mark.parametrize("method", ['wilson', 'clopper-pearson'])
+    def test_no_trials_is_uninformative(self, method):
+        assert binomial_interval(0, 0, method=method) == (0.0, 1.0)
+
+    def test_invalid_method(self):
+        with pytest.raises(ValueError):
+            binomial_interval(1, 2, method='normal')
+
+    def test_regularized_incomplete_beta_symmetry(self):
+        """I_x(a, b) = 1 - I_{1-x}(b, a)."""
+        assert regularized_incomplete_beta(3, 7, 0.2) == pytest.approx(1 - regularized_incomplete_beta(7, 3, 0.8))
+
+
+def test_adaptive_no_noise_stops_after_few_batches():
+    """Without noise both rates are exactly 1, so the intervals shrink quickly and sampling stops early."""
+    result = run_adaptive_ec_experiment(
+        rounds=1, shots=100000, cfg=NO_NOISE, encoding_mode='9a',
+        target_width=0.05, batch_shots=100
+    )
+    assert isinstance(result, AdaptiveResult)
+    assert result.converged
+    assert result.shots < 100000
+    assert result.ec_accept == result.shots
+    assert result.logical_shots_passed == result.shots
+    assert result.average_percentage == 1.0
+
+
+def test_adaptive_respects_per_point_maximum():
+    """A target that cannot be reached stops at the per-point maximum."""
+    cfg = NoiseCfg(ec_active=True, ec_rate_1q=0.01, ec_rate_2q=0.01)
+    result = run_adaptive_ec_experiment(
+        rounds=2, shots=250, cfg=cfg, encoding_mode='9a',
+        target_width=1e-4, batch_shots=100
+    )
+    assert result.shots == 250
+    assert not result.converged
+    lo, hi = result.acceptance_interval
+    assert lo <= result.ec_accept / result.shots <= hi
+
+
+def test_adaptive_min_acceptance_stops_early():
+    """Points that are confidently below min_acceptance are resolved without further sampling."""
+    cfg = NoiseCfg(ec_active=True, ec_rate_1q=0.1, ec_rate_2q=0.1)
+    result = run_adaptive_ec_experiment(
+        rounds=5, shots=5000, cfg=cfg, encoding_mode='9a',
+        target_width=1e-4, batch_shots=200, min_acceptance=0.5
+    )
+    assert result.shots < 5000
+    assert result.acceptance_interval[1] < 0.5
+
+
+def test_compute_acceptance_rate_uses_recorded_shots():
+    """Adaptive results carry their own shot count, plain tuples use the shared one."""
+    adaptive_point = AdaptiveResult(50, 40, 0.9, 200, (0.2, 0.3), (0.7, 0.9), True)
+    raw_results = {0.1: [(10, 5, 0.6), adaptive_point]}
+    assert compute_acceptance_rate(raw_results, shots=20) == {0.1: [0.5, 0.25]}
+
+
+def test_plot_passes_min_acceptance(tmp_path, monkeypatch):
+    """The plotting path stops near-zero-acceptance points early as well."""
+    import tesseract_sim.plotting.plot_acceptance_rates as plotting
+    results = []
+
+    def record(*args, **kwargs):
+        results.append(run_adaptive_ec_experiment(*args, **kwargs))
+        return results[-1]
+
+    monkeypatch.setattr(plotting, "run_adaptive_ec_experiment", record)
+    plotting.plot_ec_experiment([5], [0.1], 5000, str(tmp_path), encoding_mode='9a', adaptive=True,
+                                target_width=1e-4, batch_shots=200, min_acceptance=0.5)
+    result, = results
+    assert result.shots < 5000
+    assert result.acceptance_interval[1] < 0.5
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from tesseract_sim.error_correction.decoder_manual import decode_shots
+from tesseract_sim.estimation.channel_lookup import ChannelLookup, run_channel_lookup_experiment, \
+    run_channel_noise_experiment
+from tesseract_sim.noise.fault_locations import FaultInjector
+from tesseract_sim.noise.noise_cfg import NoiseCfg
+from tesseract_sim.run import build_circuit_ec_experiment, run_simulation_ec_experiment
+
+
+@pytest.mark.parametrize("rounds", [0, 1, 3])
+def test_lookup_matches_simulated_patterns(rounds):
+    """Every pattern's outcome equals decoding a full simulation of that pattern, with random gauge."""
+    lookup = ChannelLookup('9a')
+    rng = np.random.default_rng(4)
+    keys = lookup.sample_patterns(300, 0.1, rng)
+    accepted, successful_checks = lookup.evaluate(keys, rounds, apply_pauli_frame=True)
+
+    circuit = build_circuit_ec_experiment(rounds, NoiseCfg(channel_noise_level=0.5), encoding_mode='9a')
+    injector = FaultInjector(circuit)
+    codes = ((keys[:, None] >> (2 * np.arange(16, dtype=np.uint64))) & 3).astype(np.int64)
+    records = injector.sample(np.where(codes > 0, np.arange(16), -1), codes - 1, seed=9)
+    expected_accepted, expected_checks = decode_shots(records, rounds, True, '9a')
+
+    assert (accepted == expected_accepted).all()
+    assert (successful_checks == expected_checks).all()
+
+
+def test_patterns_are_propagated_once():
+    lookup = ChannelLookup('9a')
+    keys = np.array([0, 1, 1, 4, 0], dtype=np.uint64)
+    lookup.evaluate(keys, 2)
+    assert lookup.num_patterns == 3
+    accepted, successful_checks = lookup.evaluate(keys[:1], 5, apply_pauli_frame=False)
+    assert lookup.num_patterns == 3
+    assert accepted.all() and (successful_checks == 2).all()
+
+
+def test_sampled_patterns_follow_the_channel():
+    lookup = ChannelLookup('9a', "X_ERROR")
+    keys = lookup.sample_patterns(20000, 0.05, np.random.default_rng(0))
+    codes = (keys[:, None] >> (2 * np.arange(16, dtype=np.uint64))) & 3
+    assert set(np.unique(codes)) == {0, 1}
+    assert abs(codes.mean() - 0.05) < 0.005
+
+
+def test_experiment_matches_simulation_statistically():
+    cfg = NoiseCfg(channel_noise_level=0.02)
+    ec_accept, logical_pass, _ = run_channel_lookup_experiment(3, 20000, cfg, True, '9a', seed=1)
+    expected_accept, expected_pass, _ = run_simulation_ec_experiment(3, 20000, cfg, True, '9a')
+    # Rates around 0.9, with a standard deviation of 0.002 each
+    assert abs(ec_accept - expected_accept) / 20000 < 0.015
+    assert abs(logical_pass - expected_pass) / 20000 < 0.015
+
+
+def test_only_channel_noise_is_supported():
+    with pytest.raises(ValueError):
+        run_channel_lookup_experiment(1, 10, NoiseCfg(channel_noise_level=0.01, meas_active=True, meas_error_rate=0.01), encoding_mode='9a')
+    with pytest.raises(ValueError):
+        ChannelLookup('9b')
+
+
+def test_expected_patterns_match_sampling():
+    lookup = ChannelLookup('9a')
+    keys = lookup.sample_patterns(20000, 0.05, np.random.default_rng(2))
+    assert abs(len(np.unique(keys)) / lookup.expected_patterns(20000, 0.05) - 1) < 0.05
+    assert lookup.expected_patterns(20000, 0.0) == 1
+
+
+def test_lookup_only_used_at_low_noise(monkeypatch):
+    import tesseract_sim.estimation.channel_lookup as module
+    used = []
+    monkeypatch.setattr(module, "run_channel_lookup_experiment", lambda *args: used.append('lookup') or (0, 0, None))
+    monkeypatch.setattr(module, "run_simulation_ec_experiment", lambda *args: used.append('simulation') or (0, 0, None))
+    for noise in (0.001, 0.3):
+        run_channel_noise_experiment(2, 10000, NoiseCfg(channel_noise_level=noise), True, '9a')
+    run_channel_noise_experiment(2, 10000, NoiseCfg(channel_noise_level=0.001), True, '9b')
+    assert used == ['lookup', 'simulation', 'simulation']
+
+
+def test_cache_grows_over_many_batches():
+    lookup = ChannelLookup('9a')
+    rng = np.random.default_rng(5)
+    batches = [lookup.sample_patterns(200, 0.1, rng) for _ in range(5)]
+    for keys in batches:
+        lookup.evaluate(keys, 2)
+    all_keys = np.concatenate(batches)
+    assert lookup.num_patterns == len(np.unique(all_keys))
+    accepted, successful_checks = lookup.evaluate(all_keys, 2)
+    fresh_accepted, fresh_checks = ChannelLookup('9a').evaluate(all_keys, 2)
+    assert (accepted == fresh_accepted).all() and (successful_checks == fresh_checks).all()
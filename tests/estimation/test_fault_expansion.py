@@ -0,0 +1,81 @@
+import itertools
+import numpy as np
+import pytest
+from tesseract_sim.error_correction.decoder_manual import decode_shots, get_decoding_parameters
+from tesseract_sim.estimation.fault_expansion import expand_fault_probabilities
+from tesseract_sim.noise.fault_locations import FaultInjector
+from tesseract_sim.noise.noise_cfg import NoiseCfg
+from tesseract_sim.run import build_circuit_ec_experiment
+
+NOISE = 1e-3
+CHANNEL_NOISE = NoiseCfg(channel_noise_level=NOISE)
+
+
+def expand(outcome, locations):
+    """Expansion coefficients [c0, c1, c2] of the probability of an outcome given for every fault configuration."""
+    pi = [loc.probability / NOISE for loc in locations]
+    r0 = float(outcome[()])
+    r1 = [sum(w * outcome[((i, s),)] for s, w in enumerate(loc.weights)) for i, loc in enumerate(locations)]
+    c1 = sum(p * (r - r0) for p, r in zip(pi, r1))
+    c2 = 0.0
+    for i, j in itertools.combinations(range(len(locations)), 2):
+        rij = sum(wi * wj * outcome[((i, s), (j, t))]
+                  for s, wi in enumerate(locations[i].weights) for t, wj in enumerate(locations[j].weights))
+        c2 += pi[i] * pi[j] * (rij - r1[i] - r1[j] + r0)
+    return np.array([r0, c1, c2])
+
+
+def brute_force_coefficients(cfg, encoding_mode):
+    """
+    Rejection and logical failure coefficients from explicitly injecting every single fault and pair of faults
+    (reference gauge).
+    """
+    injector = FaultInjector(build_circuit_ec_experiment(1, cfg, encoding_mode=encoding_mode))
+    locations = injector.locations
+    configurations = [[]]
+    configurations += [[(i, s)] for i, loc in enumerate(locations) for s in range(len(loc.paulis))]
+    configurations += [[(i, s), (j, t)] for i, j in itertools.combinations(range(len(locations)), 2)
+                       for s in range(len(locations[i].paulis)) for t in range(len(locations[j].paulis))]
+    fault_locations = np.full((len(configurations), 2), -1)
+    fault_paulis = np.full((len(configurations), 2), -1)
+    for row, faults in enumerate(configurations):
+        for slot, (i, s) in enumerate(faults):
+            fault_locations[row, slot], fault_paulis[row, slot] = i, s
+    records = injector.sample(fault_locations, fault_paulis, randomize_gauge=False)
+    accepted, checks = decode_shots(records, 1, True, encoding_mode)
+    _, _, max_checks = get_decoding_parameters(encoding_mode)
+    keys = list(map(tuple, configurations))
+    rejected = dict(zip(keys, ~accepted))
+    failed = dict(zip(keys, accepted & (checks != max_checks)))
+    return expand(rejected, locations), expand(failed, locations)
+
+
+def test_matches_brute_force_enumeration():
+    # The 9a decoder outcome doesn't depend on the gauge, so a single gauge record is exact
+    expansion = expand_fault_probabilities(1, '9a', cfg=CHANNEL_NOISE, noise=NOISE, gauge_samples=1, seed=0)
+    rejection, logical_failure = brute_force_coefficients(CHANNEL_NOISE, '9a')
+    assert np.allclose(expansion.rejection, rejection)
+    assert np.allclose(expansion.logical_failure, logical_failure)
+
+
+def test_logical_failure_matches_brute_force_enumeration():
+    cfg = NoiseCfg(meas_active=True, meas_error_rate=NOISE)
+    expansion = expand_fault_probabilities(1, '9a', cfg=cfg, noise=NOISE, gauge_samples=1, seed=0)
+    rejection, logical_failure = brute_force_coefficients(cfg, '9a')
+    assert np.any(logical_failure != 0)
+    assert np.allclose(expansion.rejection, rejection)
+    assert np.allclose(expansion.logical_failure, logical_failure)
+
+
+def test_single_faults_are_never_rejected_alone_in_9a():
+    expansion = expand_fault_probabilities(1, '9a', cfg=NoiseCfg(ec_active=True, ec_rate_1q=NOISE), noise=NOISE,
+                                           gauge_samples=1, max_order=1, seed=0)
+    assert expansion.rejection.tolist() == [0.0, 0.0]
+
+
+def test_polynomials_evaluate_at_any_noise_rate():
+    expansion = expand_fault_probabilities(1, '9a', cfg=CHANNEL_NOISE, noise=NOISE, gauge_samples=1, seed=0)
+    p = np.array([0.0, 1e-4, 1e-3])
+    assert np.allclose(expansion.rejection_rate(p), expansion.rejection[2] * p ** 2)
+    assert np.allclose(expansion.acceptance_rate(p), 1 - expansion.rejection_rate(p))
+    assert expansion.conditional_failure_rate(0.0) == pytest.approx(expansion.logical_failure[0])
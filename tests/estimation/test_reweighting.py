@@ -0,0 +1,88 @@
+import math
+import numpy as np
+import pytest
+from tesseract_sim.estimation.reweighting import sample_reference, reweighted_sweep_results
+from tesseract_sim.estimation.threshold import ec_noise_cfg
+from tesseract_sim.run import run_simulation_ec_experiment
+
+
+@pytest.fixture(scope="module")
+def reference():
+    return sample_reference(1, 5000, ec_noise_cfg(0.01), encoding_mode='9a', seed=11)
+
+
+def test_records_faults_per_shot(reference):
+    assert reference.fault_locations.shape[0] == reference.shots == 5000
+    assert reference.classes == [("DEPOLARIZE1", 0.01), ("DEPOLARIZE2", 0.01)]
+    assert np.array_equal((reference.fault_locations >= 0).sum(axis=1), reference.fault_counts.sum(axis=1))
+    # Fault-free shots are always accepted and pass
+    fault_free = reference.fault_counts.sum(axis=1) == 0
+    assert reference.accepted[fault_free].all()
+    assert (reference.successful_checks[fault_free] == reference.max_checks).all()
+
+
+def test_reference_configuration_has_unit_weights(reference):
+    estimate = reference.estimate(ec_noise_cfg(0.01))
+    assert estimate.reliable
+    assert estimate.effective_sample_size == pytest.approx(reference.shots)
+    assert estimate.ec_accept == pytest.approx(reference.accepted.sum())
+
+
+def test_noiseless_target_keeps_only_fault_free_shots(reference):
+    estimate = reference.estimate(ec_noise_cfg(0.0))
+    assert estimate.reliable
+    assert estimate.effective_sample_size == pytest.approx((reference.fault_counts.sum(axis=1) == 0).sum())
+    assert estimate.ec_accept / estimate.shots == pytest.approx(1.0)
+    assert estimate.logical_shots_passed == pytest.approx(estimate.ec_accept)
+
+
+def test_certain_fault_has_no_nan_weights(reference):
+    """A location with target rate 1 keeps exactly the shots that faulted there."""
+    location = np.bincount(reference.fault_locations[reference.fault_locations >= 0]).argmax()
+    target = reference.reference_rates.copy()
+    target[location] = 1.0
+    log_w = reference.log_weights(target)
+    assert not np.isnan(log_w).any()
+    faulted = np.any(reference.fault_locations == location, axis=1)
+    assert np.isfinite(log_w[faulted]).all()
+    assert np.all(log_w[~faulted] == -np.inf)
+    # Each kept shot is weighted by 1 / p for the certain fault
+    assert log_w[faulted] == pytest.approx(np.full(faulted.sum(), -np.log(reference.reference_rates[location])))
+
+
+def test_scaled_estimate_matches_configuration(reference):
+    by_cfg = reference.estimate(ec_noise_cfg(0.005))
+    by_scale = reference.estimate_scaled(0.5)
+    assert by_cfg.ec_accept == pytest.approx(by_scale.ec_accept)
+    assert by_cfg.effective_sample_size == pytest.approx(by_scale.effective_sample_size)
+
+
+def test_refuses_distant_targets(reference):
+    estimate = reference.estimate(ec_noise_cfg(0.1), min_ess_fraction=0.1)
+    assert not estimate.reliable
+    assert math.isnan(estimate.ec_accept)
+    assert estimate.effective_sample_size < 0.1 * reference.shots
+
+
+def test_rejects_noise_outside_the_reference(reference):
+    cfg = ec_noise_cfg(0.005)
+    cfg.meas_active, cfg.meas_error_rate = True, 0.01
+    with pytest.raises(ValueError):
+        reference.estimate(cfg)
+
+
+def test_agrees_with_direct_sampling(reference):
+    estimate = reference.estimate(ec_noise_cfg(0.006))
+    shots = 20000
+    ec_accept, _, _ = run_simulation_ec_experiment(1, shots, ec_noise_cfg(0.006), encoding_mode='9a')
+    direct = ec_accept / shots
+    mc_std = math.sqrt(direct * (1 - direct) / shots)
+    assert abs(estimate.ec_accept / estimate.shots - direct) <= 5 * math.hypot(estimate.acceptance_std, mc_std)
+
+
+def test_sweep_samples_each_round_count_once():
+    results = reweighted_sweep_results([1, 2], [0.002, 0.004], 500, ec_noise_cfg, reference_noise=0.004,
+                                       encoding_mode='9a', seed=0)
+    assert list(results) == [0.002, 0.004]
+    assert all(len(estimates) == 2 for estimates in results.values())
+    assert all(e.shots == 500 for estimates in results.values() for e in estimates)
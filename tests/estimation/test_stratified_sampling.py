@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from tesseract_sim.estimation.stratified import run_stratified_ec_experiment, sample_distinct
+from tesseract_sim.noise.noise_cfg import NoiseCfg, NO_NOISE
+from tesseract_sim.run import run_simulation_ec_experiment
+
+EC_NOISE = NoiseCfg(ec_active=True, ec_rate_1q=0.002, ec_rate_2q=0.002)
+
+
+@pytest.fixture(scope="module")
+def strata():
+    return run_stratified_ec_experiment(1, EC_NOISE, encoding_mode='9a', max_faults=2, shots_per_stratum=500, seed=7)
+
+
+def test_sample_distinct_has_no_repeats():
+    draws = sample_distinct(5, 3, 2000, np.random.default_rng(0))
+    assert draws.shape == (2000, 3)
+    assert all(len(set(row)) == 3 for row in draws)
+
+
+def test_noiseless_circuit_has_single_stratum():
+    strata = run_stratified_ec_experiment(1, NO_NOISE, encoding_mode='9a', shots_per_stratum=50, seed=0)
+    assert strata.classes == []
+    estimate = strata.estimate(1.0)
+    assert estimate.acceptance == 1.0
+    assert estimate.logical_success == 1.0
+    assert estimate.truncation == 0.0
+
+
+def test_strata_cover_all_fault_counts(strata):
+    assert strata.classes == [("DEPOLARIZE1", 0.002), ("DEPOLARIZE2", 0.002)]
+    assert sorted(s.fault_counts for s in strata.strata) == [(0, 0), (0, 1), (0, 2), (1, 0), (1, 1), (2, 0)]
+    # Without faults, every shot is accepted and passes
+    fault_free = next(s for s in strata.strata if s.fault_counts == (0, 0))
+    assert fault_free.accepted == fault_free.logical_passed == fault_free.shots
+
+
+def test_weights_and_truncation_sum_to_one(strata):
+    for scale in [0.01, 1.0, 5.0]:
+        estimate = strata.estimate(scale)
+        assert strata.stratum_weights(scale).sum() + estimate.truncation == pytest.approx(1.0)
+
+
+def test_low_noise_variance_shrinks(strata):
+    """At low rates the exact fault-free stratum dominates, so the uncertainty vanishes with the rate."""
+    high, low = strata.estimate_sweep([1.0, 0.01])
+    assert low.acceptance_std < high.acceptance_std / 50
+    assert low.acceptance == pytest.approx(1.0, abs=1e-3)
+
+
+def test_agrees_with_monte_carlo(strata):
+    estimate = strata.estimate(1.0)
+    shots = 20000
+    ec_accept, _, _ = run_simulation_ec_experiment(1, shots, EC_NOISE, encoding_mode='9a')
+    mc_std = np.sqrt(ec_accept / shots * (1 - ec_accept / shots) / shots)
+    tolerance = 5 * np.hypot(estimate.acceptance_std, mc_std) + estimate.truncation
+    assert abs(estimate.acceptance - ec_accept / shots) <= tolerance
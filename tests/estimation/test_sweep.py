@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from tesseract_sim.error_correction.decoder_manual import decode_shots
+from tesseract_sim.estimation.sweep import SWEEP_DTYPE, canonical_cfg, cartesian_grid, circuit_key, make_points, \
+    run_sweep
+from tesseract_sim.noise.noise_cfg import NO_NOISE, NoiseCfg
+from tesseract_sim.plotting.plot_acceptance_rates import sweep_results
+from tesseract_sim.run import build_circuit_ec_experiment
+
+
+def test_cartesian_grid():
+    grid = cartesian_grid(ec_rate_2q=[1e-3, 2e-3], rounds=[1, 2, 3])
+    assert len(grid) == 6
+    assert grid[0] == {'ec_rate_2q': 1e-3, 'rounds': 1}
+    assert grid[-1] == {'ec_rate_2q': 2e-3, 'rounds': 3}
+
+
+def test_make_points_switches_phases_on():
+    point, = make_points([{'meas_error_rate': 1e-3, 'rounds': 4, 'encoding_mode': '9a'}])
+    assert point.rounds == 4 and point.encoding_mode == '9a'
+    assert point.cfg.meas_active and point.cfg.meas_error_rate == 1e-3
+    assert not point.cfg.ec_active
+    with pytest.raises(ValueError):
+        make_points([{'noise': 1e-3}])
+
+
+def test_canonical_cfg_ignores_settings_without_effect():
+    assert canonical_cfg(NoiseCfg(ec_active=False, ec_rate_1q=0.1)) == NO_NOISE
+    assert canonical_cfg(NoiseCfg(ec_active=True)) == NO_NOISE
+    assert canonical_cfg(NoiseCfg(channel_noise_type="X_ERROR")) == NO_NOISE
+    noisy = NoiseCfg(ec_active=True, ec_rate_2q=1e-3)
+    assert canonical_cfg(noisy) == noisy
+    assert circuit_key(2, NoiseCfg(meas_active=True), '9a') == circuit_key(2, NO_NOISE, '9a')
+    assert circuit_key(2, NO_NOISE, '9a') != circuit_key(3, NO_NOISE, '9a')
+
+
+def test_equal_keys_build_equal_circuits():
+    a = build_circuit_ec_experiment(2, NoiseCfg(ec_active=False, ec_rate_1q=0.1, channel_noise_type="X_ERROR"), '9a')
+    b = build_circuit_ec_experiment(2, NO_NOISE, '9a')
+    assert a == b
+
+
+def test_run_sweep_samples_each_circuit_once():
+    # Two apply_pauli_frame settings and a repeated point share one circuit per rate
+    grid = cartesian_grid(ec_rate_2q=[0.0, 5e-3], apply_pauli_frame=[True, False]) + [{'ec_rate_2q': 0.0}]
+    results = run_sweep(make_points([dict(point, encoding_mode='9a') for point in grid]), shots=500, seed=2)
+
+    assert results.dtype == SWEEP_DTYPE
+    assert len(results) == 5
+    assert len(np.unique(results['circuit'])) == 2
+    noiseless = results['ec_rate_2q'] == 0
+    assert (results['ec_accept'][noiseless] == 500).all()
+    assert (results['logical_shots_passed'][noiseless] == 500).all()
+    assert (results['average_percentage'][noiseless] == 1.0).all()
+
+
+def test_run_sweep_matches_decode_shots():
+    cfg = NoiseCfg(ec_active=True, ec_rate_1q=5e-3, ec_rate_2q=5e-3)
+    grid = [{'ec_rate_1q': 5e-3, 'ec_rate_2q': 5e-3, 'rounds': 2, 'apply_pauli_frame': frame} for frame in (True, False)]
+    results = run_sweep(make_points(grid), shots=800, seed=5)
+
+    shot_data = build_circuit_ec_experiment(2, cfg, '9b').compile_sampler(seed=5).sample(shots=800)
+    for row, frame in zip(results, (True, False)):
+        accepted, successful_checks = decode_shots(shot_data, 2, frame, '9b')
+        assert row['ec_accept'] == accepted.sum()
+        assert row['logical_shots_passed'] == (successful_checks == 4).sum()
+
+
+def test_sweep_results_runs_duplicate_circuits_once():
+    calls = []
+
+    def experiment(**kwargs):
+        calls.append(kwargs)
+        return (1, 1, 1.0)
+
+    fixed = NoiseCfg(ec_active=True, ec_rate_1q=1e-3, ec_rate_2q=1e-3)
+    results = sweep_results(experiment, [1, 2], [0.1, 0.2, 0.3], 10, lambda _: fixed)
+    assert len(calls) == 2
+    assert list(results) == [0.1, 0.2, 0.3]
+    assert all(len(tuples) == 2 for tuples in results.values())
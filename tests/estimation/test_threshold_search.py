@@ -0,0 +1,78 @@
+import pytest
+from tesseract_sim.estimation.threshold import find_pseudo_threshold, ec_noise_cfg
+
+
+def make_fake_experiment(failure_fn, calls=None):
+    """Deterministic stand-in for run_simulation_ec_experiment with a known failure curve."""
+    def fake_experiment(rounds, shots, cfg, apply_pauli_frame, encoding_mode):
+        if calls is not None:
+            calls.append((cfg.ec_rate_1q, shots))
+        failures = round(shots * failure_fn(cfg.ec_rate_1q))
+        return shots, shots - failures, None
+    return fake_experiment
+
+
+def test_finds_pseudo_threshold_of_quadratic_curve():
+    """failure = 50 p^2 crosses the unencoded baseline p at p = 0.02."""
+    result = find_pseudo_threshold(
+        rounds=1, noise_low=1e-3, noise_high=1e-1, initial_shots=1000, max_shots=10**7,
+        relative_tolerance=0.02, experiment_fn=make_fake_experiment(lambda p: 50 * p * p)
+    )
+    assert result.lower <= 0.02 <= result.upper
+    assert result.upper / result.lower - 1 <= 0.02
+    assert result.crossing == pytest.approx(0.02, rel=0.02)
+
+
+def test_fixed_target_and_bracket_expansion():
+    """A crossing above the initial range is found by expanding the bracket."""
+    result = find_pseudo_threshold(
+        rounds=1, target=0.25, noise_low=1e-3, noise_high=1e-2, initial_shots=1000, max_shots=10**7,
+        experiment_fn=make_fake_experiment(lambda p: 10 * p)
+    )
+    assert result.lower <= 0.025 <= result.upper
+    assert result.crossing == pytest.approx(0.025, rel=0.05)
+
+
+def test_no_crossing_in_range():
+    result = find_pseudo_threshold(
+        rounds=1, target=0.9, noise_low=1e-3, noise_high=1e-2, max_expansions=1,
+        experiment_fn=make_fake_experiment(lambda p: p)
+    )
+    assert result.crossing is None
+
+
+def test_shots_grow_as_bracket_narrows():
+    calls = []
+    find_pseudo_threshold(
+        rounds=1, noise_low=1e-3, noise_high=1e-1, initial_shots=1000, max_shots=10**7,
+        experiment_fn=make_fake_experiment(lambda p: 50 * p * p, calls)
+    )
+    # First sample of every bisection midpoint (the bracket edges are excluded)
+    first_shots = {}
+    for noise, shots in calls:
+        if noise not in (1e-3, 1e-1):
+            first_shots.setdefault(noise, shots)
+    bisection_shots = list(first_shots.values())
+    assert bisection_shots == sorted(bisection_shots)
+    assert bisection_shots[-1] > 1000
+
+
+def test_statistically_unresolved_midpoint_ends_search():
+    """With a low shot budget the search stops once the target is within the interval at the midpoint."""
+    result = find_pseudo_threshold(
+        rounds=1, noise_low=1e-3, noise_high=1e-1, initial_shots=200, max_shots=400,
+        relative_tolerance=1e-6, experiment_fn=make_fake_experiment(lambda p: 100 * p * p)
+    )
+    assert result.lower <= 0.01 <= result.upper
+    assert result.upper / result.lower - 1 > 1e-6
+    assert all(e.shots <= 400 for e in result.evaluations)
+
+
+def test_real_experiment_smoke():
+    """The default plumbing runs the real EC experiment and reports pooled evaluations."""
+    result = find_pseudo_threshold(
+        rounds=1, encoding_mode='9a', noise_low=1e-3, noise_high=0.3, initial_shots=200,
+        max_shots=400, max_iterations=2
+    )
+    assert result.total_shots == sum(e.shots for e in result.evaluations)
+    assert all(e.noise == ec_noise_cfg(e.noise).ec_rate_2q for e in result.evaluations)
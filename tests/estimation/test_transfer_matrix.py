@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from tesseract_sim.error_correction.decoder_manual import process_shot, get_decoding_parameters
+from tesseract_sim.estimation.threshold import ec_noise_cfg
+from tesseract_sim.estimation.transfer_matrix import (
+    NUM_FLAG_STATES, NUM_STATES, REJECT, TransferMatrixEstimate, decoder_state_trajectories,
+    estimate_transfer_matrix, state_index,
+)
+from tesseract_sim.noise.noise_cfg import NO_NOISE
+from tesseract_sim.run import build_circuit_ec_experiment
+
+
+def test_trajectories_agree_with_process_shot():
+    rounds = 3
+    offset, _, _ = get_decoding_parameters('9b')
+    shots = build_circuit_ec_experiment(rounds, ec_noise_cfg(0.01), encoding_mode='9b').compile_sampler(seed=3).sample(300)
+    states = decoder_state_trajectories(shots, rounds, offset)
+    assert (states[:, 0] == state_index(-1, -1)).all()
+    for shot, trajectory in zip(shots, states):
+        status, _, _ = process_shot(shot, rounds, measurement_offset=offset)
+        assert (status == "reject") == (trajectory[-1] == REJECT)
+    # Rejection is absorbing
+    rejected = states == REJECT
+    assert (rejected[:, 1:] >= rejected[:, :-1]).all()
+
+
+def test_noiseless_acceptance_is_one():
+    estimate = estimate_transfer_matrix(NO_NOISE, '9a', warmup_rounds=1, sample_rounds=2, shots=200, seed=0)
+    assert np.allclose(estimate.acceptance([0, 1, 5, 1000]), 1.0)
+
+
+def test_matrix_powers_on_known_chain():
+    counts = np.zeros((NUM_FLAG_STATES, NUM_STATES), dtype=np.int64)
+    counts[0, 0], counts[0, REJECT] = 900, 100
+    initial = np.zeros(NUM_STATES, dtype=np.int64)
+    initial[0], initial[REJECT] = 800, 200
+    estimate = TransferMatrixEstimate(warmup_rounds=2, sample_rounds=1, shots=1000, transition_counts=counts,
+                                      initial_counts=initial, warmup_accepted=np.array([1000, 900, 800]))
+    assert np.allclose(estimate.acceptance([0, 1, 2, 3, 12]), [1.0, 0.9, 0.8, 0.8 * 0.9, 0.8 * 0.9 ** 10])
+    matrix = estimate.transition_matrix()
+    assert np.allclose(matrix.sum(axis=1), 1.0)
+    # Unobserved states are sent to reject
+    assert matrix[1, REJECT] == 1.0
+
+
+def test_extrapolation_tracks_direct_sampling():
+    cfg = ec_noise_cfg(0.005)
+    estimate = estimate_transfer_matrix(cfg, '9b', warmup_rounds=2, sample_rounds=3, shots=4000, seed=1)
+    rounds = [1, 2, 4, 8]
+    acceptance = estimate.acceptance(rounds)
+    lower, upper = estimate.acceptance_bounds(rounds, samples=200, seed=0)
+    assert (lower <= acceptance + 1e-12).all() and (acceptance <= upper + 1e-12).all()
+    assert (np.diff(acceptance) <= 0).all()
+
+    offset, _, _ = get_decoding_parameters('9b')
+    shots = build_circuit_ec_experiment(8, cfg, encoding_mode='9b').compile_sampler(seed=2).sample(4000)
+    direct = (decoder_state_trajectories(shots, 8, offset)[:, -1] != REJECT).mean()
+    assert acceptance[-1] == pytest.approx(direct, abs=0.03)
@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+import stim
+from tesseract_sim.noise.fault_locations import (
+    enumerate_fault_locations,
+    group_fault_classes,
+    match_location_rates,
+    gauge_records,
+    FaultInjector,
+)
+from tesseract_sim.noise.noise_cfg import NoiseCfg
+from tesseract_sim.run import build_circuit_ec_experiment
+
+
+def test_enumerates_channels_pairs_and_noisy_measurements():
+    circuit = stim.Circuit("""
+        DEPOLARIZE1(0.1) 0 1
+        CNOT 0 1
+        DEPOLARIZE2(0.2) 0 1
+        X_ERROR(0) 0
+        M(0.05) 0 1
+    """)
+    locations = enumerate_fault_locations(circuit)
+    assert [(loc.gate, loc.targets) for loc in locations] == [
+        ("DEPOLARIZE1", (0,)), ("DEPOLARIZE1", (1,)),
+        ("DEPOLARIZE2", (0, 1)),
+        ("M", (0,)), ("M", (1,)),
+    ]
+    assert len(locations[2].paulis) == 15
+    assert abs(sum(locations[2].weights) - 1.0) < 1e-12
+    assert locations[3].is_measurement_flip
+
+
+def test_repeat_blocks_are_flattened():
+    circuit = stim.Circuit("""
+        REPEAT 3 {
+            DEPOLARIZE1(0.1) 0
+            M 0
+        }
+    """)
+    assert len(enumerate_fault_locations(circuit)) == 3
+
+
+def test_group_fault_classes_by_gate_and_probability():
+    cfg = NoiseCfg(ec_active=True, ec_rate_1q=0.001, ec_rate_2q=0.002)
+    locations = enumerate_fault_locations(build_circuit_ec_experiment(1, cfg, encoding_mode='9a'))
+    classes, class_of_location = group_fault_classes(locations)
+    assert classes == [("DEPOLARIZE1", 0.001), ("DEPOLARIZE2", 0.002)]
+    assert np.bincount(class_of_location).sum() == len(locations)
+
+
+def test_injected_fault_flips_measurement():
+    circuit = stim.Circuit("""
+        R 0 1
+        X_ERROR(0.5) 0
+        CNOT 0 1
+        M 0 1
+    """)
+    injector = FaultInjector(circuit)
+    records = injector.sample([[-1], [0]], [[-1], [0]])
+    assert records.tolist() == [[False, False], [True, True]]
+
+
+def test_measurement_flip_only_affects_the_record():
+    circuit = stim.Circuit("""
+        R 0
+        M(0.5) 0
+        M 0
+    """)
+    injector = FaultInjector(circuit)
+    records = injector.sample([[0]], [[0]])
+    assert records.tolist() == [[True, False]]
+
+
+def test_single_faults_cover_every_pauli():
+    cfg = NoiseCfg(ec_active=True, ec_rate_1q=0.001, ec_rate_2q=0.002)
+    injector = FaultInjector(build_circuit_ec_experiment(1, cfg, encoding_mode='9a'))
+    locations, paulis, probabilities = injector.single_faults()
+    assert len(locations) == sum(len(loc.paulis) for loc in injector.locations)
+    assert np.isclose(probabilities.sum(), sum(loc.probability for loc in injector.locations))
+
+
+def test_no_faults_reproduce_noiseless_statistics():
+    """Without injected faults, deterministic measurements agree with the noiseless circuit."""
+    circuit = build_circuit_ec_experiment(2, NoiseCfg(ec_active=True, ec_rate_1q=0.01, ec_rate_2q=0.01), encoding_mode='9a')
+    noiseless = circuit.without_noise().compile_sampler().sample(200)
+    deterministic = np.all(noiseless == noiseless[0], axis=0)
+    records = FaultInjector(circuit).sample(np.full((200, 1), -1), np.full((200, 1), -1), seed=3)
+    assert np.array_equal(records[:, deterministic], noiseless[:, deterministic])
+
+
+def test_match_location_rates_between_noise_configurations():
+    reference = build_circuit_ec_experiment(1, NoiseCfg(ec_active=True, ec_rate_1q=0.01, ec_rate_2q=0.02), encoding_mode='9a')
+    target = build_circuit_ec_experiment(1, NoiseCfg(ec_active=True, ec_rate_1q=0.0, ec_rate_2q=0.005), encoding_mode='9a')
+    locations = enumerate_fault_locations(reference)
+    rates = match_location_rates(reference, target)
+    for location, rate in zip(locations, rates):
+        assert rate == (0.005 if location.gate == "DEPOLARIZE2" else 0.0)
+
+
+def test_match_location_rates_rejects_locations_missing_from_reference():
+    reference = build_circuit_ec_experiment(1, NoiseCfg(ec_active=True, ec_rate_1q=0.01), encoding_mode='9a')
+    target = build_circuit_ec_experiment(1, NoiseCfg(ec_active=True, ec_rate_1q=0.01, ec_rate_2q=0.01), encoding_mode='9a')
+    with pytest.raises(ValueError):
+        match_location_rates(reference, target)
+
+
+def test_gauge_records_enumerates_small_gauges():
+    circuit = build_circuit_ec_experiment(1, NoiseCfg(channel_noise_level=1e-3), encoding_mode='9a')
+    records, exact = gauge_records(circuit, max_samples=1024, seed=0)
+    assert exact
+    assert len(records) & (len(records) - 1) == 0
+    assert len(np.unique(np.packbits(records, axis=1), axis=0)) == len(records)
+    # Deterministic measurements agree across all gauge records
+    noiseless = circuit.without_noise().compile_sampler().sample(200)
+    deterministic = np.all(noiseless == noiseless[0], axis=0)
+    assert np.all(records[:, deterministic] == noiseless[0, deterministic])
+
+    sampled, exact = gauge_records(circuit, max_samples=2, seed=0)
+    assert not exact and len(sampled) == 2
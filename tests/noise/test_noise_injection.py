@@ -1,6 +1,7 @@
+import pytest
 import stim
 from tesseract_sim.noise.noise_cfg import NoiseCfg, NO_NOISE
-from tesseract_sim.noise.noise_utils import append_1q, append_2q
+from tesseract_sim.noise.noise_utils import append_1q, append_2q, append_final_measurement, append_reset_x
 from tesseract_sim.run import build_circuit_ec_experiment
 
 def count_noise_ops(circuit: stim.Circuit, op_type: str) -> int:
@@ -76,4 +77,56 @@ def test_no_channel_noise_by_default():
     
     # Should have no channel noise since channel_noise_level defaults to 0.0
     assert count_noise_ops(circuit, "DEPOLARIZE1") == 0
-    assert count_noise_ops(circuit, "X_ERROR") == 0 
\ No newline at end of file
+    assert count_noise_ops(circuit, "X_ERROR") == 0
+
+
+def test_meas_phase_uses_noisy_measurements():
+    # Test: Measurements of the 'meas' phase flip their outcome instead of being followed by a channel
+    cfg = NoiseCfg(meas_active=True, meas_error_rate=0.01)
+    circuit = stim.Circuit()
+    append_1q(circuit, "M", 0, phase="meas", cfg=cfg)
+    append_1q(circuit, "H", 1, phase="meas", cfg=cfg)
+    assert circuit == stim.Circuit("M(0.01) 0\nH 1\nDEPOLARIZE1(0.01) 1")
+
+
+def test_readout_measurement_errors_flip_outcomes():
+    cfg = NoiseCfg(meas_active=True, meas_error_rate=0.05)
+    circuit = build_circuit_ec_experiment(rounds=1, cfg=cfg, encoding_mode='9a')
+    noisy = [op for op in circuit if op.name in ("M", "MX") and op.gate_args_copy() == [0.05]]
+    assert sum(len(op.targets_copy()) for op in noisy) == 16
+
+
+def _flip_probability(circuit: stim.Circuit) -> float:
+    """Probability that the last measurement of the circuit is flipped."""
+    circuit = circuit + stim.Circuit("DETECTOR rec[-1]")
+    flip = 0.0
+    for instruction in circuit.detector_error_model():
+        if instruction.type == "error":
+            p = instruction.args_copy()[0]
+            flip = flip + p - 2 * flip * p
+    return flip
+
+
+def test_fused_operations_match_separate_gates():
+    # RX and MX (append_reset_x, append_final_measurement) against R, H, M with noise after each
+    cfg = NoiseCfg(ec_active=True, ec_rate_1q=0.01, meas_active=True, meas_error_rate=0.02)
+    for phase in ("ec", "meas"):
+        separate = stim.Circuit()
+        append_1q(separate, "R", 0, phase="ec", cfg=cfg)
+        append_1q(separate, "H", 0, phase="ec", cfg=cfg)
+        append_1q(separate, "H", 0, phase=phase, cfg=cfg)
+        append_1q(separate, "M", 0, phase=phase, cfg=cfg)
+
+        fused = stim.Circuit()
+        append_reset_x(fused, 0, phase="ec", cfg=cfg)
+        append_final_measurement(fused, 'X', 0, phase=phase, cfg=cfg)
+        assert "H" not in str(fused)
+        assert _flip_probability(fused) == pytest.approx(_flip_probability(separate))
+
+
+def test_ec_round_ancillas_use_rx_and_mx():
+    cfg = NoiseCfg(ec_active=True, ec_rate_1q=0.01, ec_rate_2q=0.01)
+    circuit = build_circuit_ec_experiment(rounds=1, cfg=cfg, encoding_mode='9a')
+    ancilla_h = [op for op in circuit.flattened() if op.name == "H" and 16 in [t.value for t in op.targets_copy()]]
+    assert not ancilla_h
+    assert any(op.name == "RX" for op in circuit.flattened())
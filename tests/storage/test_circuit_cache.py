@@ -0,0 +1,53 @@
+import os
+
+from tesseract_sim.noise.noise_cfg import NO_NOISE, NoiseCfg
+from tesseract_sim.run import build_circuit_ec_experiment, run_simulation_ec_experiment
+from tesseract_sim.storage import circuit_cache
+from tesseract_sim.storage.circuit_cache import cached_circuit_ec_experiment, circuit_path, code_version
+
+CFG = NoiseCfg(ec_active=True, ec_rate_1q=1e-3, ec_rate_2q=2e-3, channel_noise_level=0.01)
+
+
+def test_first_call_writes_and_later_calls_load(tmp_path, monkeypatch):
+    circuit = cached_circuit_ec_experiment(3, CFG, '9a', directory=str(tmp_path))
+    path = circuit_path(str(tmp_path), 3, CFG, '9a')
+    assert os.path.exists(path)
+    assert circuit == build_circuit_ec_experiment(3, CFG, '9a')
+    assert [name for name in os.listdir(os.path.dirname(path)) if name.endswith(".tmp")] == []
+
+    def fail(*args, **kwargs):
+        raise AssertionError("circuit built although it's cached")
+
+    monkeypatch.setattr("tesseract_sim.run.build_circuit_ec_experiment", fail)
+    assert cached_circuit_ec_experiment(3, CFG, '9a', directory=str(tmp_path)) == circuit
+
+
+def test_paths_differ_by_parameters_and_code_version(tmp_path, monkeypatch):
+    directory = str(tmp_path)
+    paths = {circuit_path(directory, 3, CFG, '9a'), circuit_path(directory, 4, CFG, '9a'),
+             circuit_path(directory, 3, NO_NOISE, '9a'), circuit_path(directory, 3, CFG, '9b'),
+             circuit_path(directory, 3, CFG, '9a', preselect=True)}
+    assert len(paths) == 5
+    assert os.path.basename(os.path.dirname(circuit_path(directory, 3, CFG))) == code_version()
+
+    monkeypatch.setattr(circuit_cache, "code_version", lambda: "changed")
+    assert circuit_path(directory, 3, CFG, '9a') not in paths
+
+
+def test_rates_that_dont_round_trip_are_not_cached(tmp_path):
+    cfg = NoiseCfg(channel_noise_level=0.0123456789)
+    circuit = cached_circuit_ec_experiment(2, cfg, '9a', directory=str(tmp_path))
+    assert circuit == build_circuit_ec_experiment(2, cfg, '9a')
+    assert not os.path.exists(circuit_path(str(tmp_path), 2, cfg, '9a'))
+
+
+def test_default_directory_from_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv(circuit_cache.CACHE_DIR_ENV, str(tmp_path))
+    cached_circuit_ec_experiment(1, NO_NOISE, '9b', directory='')
+    assert os.path.exists(circuit_path(str(tmp_path), 1, NO_NOISE, '9b'))
+
+
+def test_simulation_with_circuit_cache(tmp_path):
+    result = run_simulation_ec_experiment(rounds=2, shots=100, encoding_mode='9a', circuit_cache=str(tmp_path))
+    assert result == (100, 100, 1.0)
+    assert os.path.exists(circuit_path(str(tmp_path), 2, NO_NOISE, '9a'))
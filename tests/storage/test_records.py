@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+import pytest
+import stim
+
+from tesseract_sim.common.record_layout import RecordLayout
+from tesseract_sim.error_correction.decoder_manual import decode_shots
+from tesseract_sim.estimation.threshold import ec_noise_cfg
+from tesseract_sim.run import build_circuit_ec_experiment, run_simulation_ec_experiment
+from tesseract_sim.storage.records import LAYOUT_FILE, export_records, open_records
+
+
+@pytest.mark.parametrize("format", ['b8', '01', 'r8'])
+def test_records_read_back_like_stim(tmp_path, format):
+    cfg = ec_noise_cfg(1e-2)
+    circuit = build_circuit_ec_experiment(2, cfg, encoding_mode='9a')
+    layout = export_records(str(tmp_path), circuit, 250, 2, '9a', cfg, format, chunk_shots=100, seed=1)
+
+    assert [c.shots for c in layout.chunks] == [100, 100, 50]
+    records = open_records(str(tmp_path))
+    assert len(records) == 250
+    assert records.layout == layout
+
+    expected = np.concatenate([
+        stim.read_shot_data_file(path=os.path.join(tmp_path, c.file), format=format,
+                                 num_measurements=circuit.num_measurements)
+        for c in layout.chunks
+    ])
+    np.testing.assert_array_equal(np.concatenate(list(records.batches(30))), expected)
+    np.testing.assert_array_equal(records.chunk(1), expected[100:200])
+
+
+def test_layout_sidecar_round_trip(tmp_path):
+    cfg = ec_noise_cfg(1e-3)
+    circuit = build_circuit_ec_experiment(3, cfg, encoding_mode='9b')
+    layout = export_records(str(tmp_path), circuit, 10, 3, '9b', cfg)
+
+    with open(tmp_path / LAYOUT_FILE) as f:
+        loaded = RecordLayout.from_json(f.read())
+    assert loaded == layout
+    assert loaded.cfg == cfg
+    assert loaded.measurement_offset == 2
+    assert loaded.num_measurements == circuit.num_measurements
+
+
+def test_b8_chunks_are_memory_mapped(tmp_path):
+    circuit = build_circuit_ec_experiment(1, encoding_mode='9a')
+    export_records(str(tmp_path), circuit, 20, 1, '9a')
+    raw = open_records(str(tmp_path)).raw_chunk(0)
+
+    assert isinstance(raw, np.memmap)
+    assert raw.shape == (20, (circuit.num_measurements + 7) // 8)
+
+
+def test_simulation_decodes_written_records(tmp_path):
+    cfg = ec_noise_cfg(5e-3)
+    ec_accept, logical_shots_passed, _ = run_simulation_ec_experiment(
+        2, 300, cfg, encoding_mode='9a', record_dir=str(tmp_path), chunk_shots=128)
+
+    records = open_records(str(tmp_path))
+    accepted, successful_checks = decode_shots(np.concatenate(list(records.batches())), 2, encoding_mode='9a')
+    assert ec_accept == accepted.sum()
+    assert logical_shots_passed == (successful_checks == 2).sum()
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from tesseract_sim.error_correction.decoder_manual import decode_shots
+from tesseract_sim.estimation.threshold import ec_noise_cfg
+from tesseract_sim.run import build_circuit_ec_experiment
+from tesseract_sim.storage.records import export_records, open_records
+from tesseract_sim.storage.redecode import redecode
+
+
+@pytest.fixture
+def record_dir(tmp_path):
+    cfg = ec_noise_cfg(5e-3)
+    circuit = build_circuit_ec_experiment(2, cfg, encoding_mode='9a')
+    export_records(str(tmp_path), circuit, 500, 2, '9a', cfg, chunk_shots=200, seed=7)
+    return str(tmp_path)
+
+
+def _expected(directory, apply_pauli_frame, only_z_checks):
+    shot_data = np.concatenate(list(open_records(directory).batches()))
+    accepted, successful_checks = decode_shots(shot_data, 2, apply_pauli_frame, '9a', only_z_checks=only_z_checks)
+    max_checks = 2 if only_z_checks else 4
+    ec_accept = int(accepted.sum())
+    return (ec_accept, int((successful_checks == max_checks).sum()),
+            successful_checks.sum() / max_checks / ec_accept)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("apply_pauli_frame", [True, False])
+def test_redecode_matches_decoding_in_memory(record_dir, workers, apply_pauli_frame):
+    result = redecode(record_dir, apply_pauli_frame, workers=workers, batch_shots=150)
+    assert result == pytest.approx(_expected(record_dir, apply_pauli_frame, True))
+
+
+def test_redecode_with_other_checks(record_dir):
+    result = redecode(record_dir, only_z_checks=False)
+    assert result == pytest.approx(_expected(record_dir, True, False))
+
+
+def test_redecode_rejects_invalid_batches(record_dir):
+    with pytest.raises(ValueError):
+        redecode(record_dir, batch_shots=0)
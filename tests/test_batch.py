@@ -0,0 +1,99 @@
+import json
+import os
+
+import pytest
+
+from tesseract_sim.noise.noise_cfg import NO_NOISE
+from tesseract_sim.plotting.batch import load_job_spec, resolve_jobs, run_batch
+from tesseract_sim.run import run_simulation_ec_experiment, share_circuits
+
+
+def write_spec(tmp_path, spec, name="jobs.json"):
+    path = tmp_path / name
+    path.write_text(json.dumps(spec))
+    return str(path)
+
+
+def test_defaults_apply_to_every_job(tmp_path):
+    jobs = load_job_spec(write_spec(tmp_path, {
+        'defaults': {'shots': 50, 'encoding_mode': '9a'},
+        'jobs': [{'name': 'a', 'rounds': [1]}, {'rounds': [2], 'shots': 70}],
+    }))
+    assert [(job['name'], job['shots'], job['encoding_mode']) for job in jobs] == [('a', 50, '9a'), ('job01', 70, '9a')]
+
+
+def test_yaml_spec(tmp_path):
+    pytest.importorskip("yaml")
+    path = tmp_path / "jobs.yaml"
+    path.write_text("defaults:\n  shots: 50\njobs:\n  - name: a\n    rounds: [1, 2]\n")
+    job, = load_job_spec(str(path))
+    assert job['rounds'] == [1, 2] and job['shots'] == 50
+
+
+def test_yaml_exponent_notation(tmp_path):
+    """YAML 1.1 reads 1e-3 as a string, the settings are converted to numbers before any job runs."""
+    pytest.importorskip("yaml")
+    path = tmp_path / "jobs.yaml"
+    path.write_text("jobs:\n  - noise_levels: [1e-3, 0.005]\n    ec_rate_1q: 1e-4\n    shots: 1e3\n")
+    job, = load_job_spec(str(path))
+    assert job['noise_levels'] == [0.001, 0.005] and job['ec_rate_1q'] == 1e-4 and job['shots'] == 1000
+
+
+def test_settings_are_converted():
+    job, = resolve_jobs([{'noise_levels': ['1e-3'], 'rounds': ['2'], 'shots': '100', 'meas_error_rate': 0}])
+    assert job['noise_levels'] == [0.001] and job['rounds'] == [2] and job['shots'] == 100
+    assert isinstance(job['meas_error_rate'], float)
+
+
+@pytest.mark.parametrize("settings", [{'shots': 1.5}, {'shots': True}, {'noise_levels': 0.001},
+                                      {'noise_levels': ['low']}, {'encoding_mode': '9c'},
+                                      {'comparison_mode': 'yes'}])
+def test_bad_settings_fail_before_running(settings):
+    with pytest.raises(ValueError):
+        resolve_jobs([{'name': 'good'}, settings])
+
+
+def test_invalid_specs(tmp_path):
+    with pytest.raises(ValueError):
+        resolve_jobs([{'roundz': [1]}])
+    with pytest.raises(ValueError):
+        resolve_jobs([{'name': 'a'}, {'name': 'a'}])
+    with pytest.raises(ValueError):
+        load_job_spec(write_spec(tmp_path, {'jobs': {'name': 'a'}}))
+    with pytest.raises(ValueError):
+        load_job_spec(write_spec(tmp_path, {'jobs': [], 'extra': 1}))
+
+
+def test_shared_circuits_are_built_once(monkeypatch):
+    builds = []
+    import tesseract_sim.run as run
+    original = run.build_circuit_ec_experiment
+    monkeypatch.setattr(run, "build_circuit_ec_experiment", lambda *args, **kwargs: builds.append(args) or original(*args, **kwargs))
+
+    with share_circuits():
+        for apply_pauli_frame in (True, False):
+            assert run_simulation_ec_experiment(2, 50, NO_NOISE, apply_pauli_frame, '9a') == (50, 50, 1.0)
+    assert len(builds) == 1
+    run_simulation_ec_experiment(2, 50, NO_NOISE, True, '9a')
+    assert len(builds) == 2
+
+
+def test_run_batch_writes_one_directory_per_job(tmp_path):
+    jobs = resolve_jobs([{'name': 'ec', 'noise_levels': [0.0, 0.005]},
+                         {'name': 'comparison', 'noise_levels': [0.005], 'comparison_mode': True}],
+                        defaults={'rounds': [1, 2], 'shots': 100, 'encoding_mode': '9a', 'out_dir': str(tmp_path)})
+    summaries = run_batch(jobs)
+    assert [summary['name'] for summary in summaries] == ['ec', 'comparison']
+    for summary in summaries:
+        assert os.path.dirname(summary['out_dir']) == os.path.join(str(tmp_path), summary['name'])
+        assert os.path.exists(os.path.join(summary['out_dir'], 'acceptance_rates_ec_experiment.png'))
+        assert os.path.exists(os.path.join(summary['out_dir'], 'performance_metrics.json'))
+
+
+def test_run_batch_on_workers(tmp_path):
+    jobs = resolve_jobs([{'name': name} for name in ('a', 'b', 'c')],
+                        defaults={'rounds': [1], 'noise_levels': [0.0], 'shots': 50, 'encoding_mode': '9a',
+                                  'out_dir': str(tmp_path)})
+    summaries = run_batch(jobs, workers=2)
+    assert [summary['name'] for summary in summaries] == ['a', 'b', 'c']
+    assert all(os.path.isdir(summary['out_dir']) for summary in summaries)
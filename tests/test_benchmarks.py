@@ -0,0 +1,39 @@
+import importlib.util
+import json
+import os
+
+BENCHMARKS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "bench_hot_paths.py")
+spec = importlib.util.spec_from_file_location("bench_hot_paths", BENCHMARKS)
+bench = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(bench)
+
+
+def test_benchmark_results_have_every_metric():
+    results = bench.run_benchmarks(rounds=[1, 2], encoding_modes=['9a'], noise_levels=[1e-3], shots=100, repeats=1)
+    assert set(results['versions']) == {'code_version', 'stim', 'numpy', 'python'}
+    assert [result['rounds'] for result in results['results']] == [1, 2]
+    for result in results['results']:
+        assert all(result[metric] > 0 for metric in bench.METRICS)
+
+
+def test_compare_flags_slowdowns_only():
+    point = {'rounds': 1, 'encoding_mode': '9a', 'noise': 0.0, 'shots': 100, 'build_seconds': 1.0,
+             'compile_seconds': 1.0, 'sample_shots_per_second': 100.0, 'decode_shots_per_second': 100.0,
+             'end_to_end_seconds': 1.0}
+    baseline = {'results': [point]}
+    faster = dict(point, build_seconds=0.5, decode_shots_per_second=200.0)
+    assert bench.compare({'results': [faster]}, baseline) == []
+    slower = dict(point, build_seconds=2.0, decode_shots_per_second=50.0, end_to_end_seconds=1.1)
+    regressions = bench.compare({'results': [slower]}, baseline, tolerance=0.25)
+    assert len(regressions) == 2
+    assert bench.compare({'results': [dict(slower, rounds=5)]}, baseline) == []
+
+
+def test_main_saves_and_compares_baseline(tmp_path):
+    baseline = str(tmp_path / "baseline.json")
+    args = ['--rounds', '1', '--encoding-mode', '9a', '--noise', '0', '--shots', '50', '--repeats', '1',
+            '--baseline', baseline]
+    assert bench.main(args + ['--save-baseline']) == 0
+    with open(baseline) as f:
+        assert len(json.load(f)['results']) == 1
+    assert bench.main(args + ['--tolerance', '1000']) == 0
@@ -0,0 +1,37 @@
+import pytest
+
+from tesseract_sim.common.circuit_base import channel
+from tesseract_sim.error_correction.measurement_rounds import error_correct_manual, measure_logical_operators_tesseract
+from tesseract_sim.noise.noise_cfg import NO_NOISE, NoiseCfg
+from tesseract_sim.run import build_circuit_ec_experiment, build_encoding_circuit
+
+NOISY = NoiseCfg(enc_active=True, enc_rate_1q=1e-3, enc_rate_2q=2e-3, ec_active=True, ec_rate_1q=1e-3,
+                 ec_rate_2q=3e-3, meas_active=True, meas_error_rate=1e-3, channel_noise_level=0.01)
+
+
+@pytest.mark.parametrize("cfg", [NO_NOISE, NOISY])
+@pytest.mark.parametrize("encoding_mode", ['9a', '9b'])
+@pytest.mark.parametrize("rounds", [1, 3])
+def test_assembled_circuit_matches_gate_by_gate_construction(cfg, encoding_mode, rounds):
+    expected = build_encoding_circuit(cfg, encoding_mode)
+    if cfg.channel_noise_level > 0:
+        channel(expected, cfg.channel_noise_level, noise_type=cfg.channel_noise_type)
+    error_correct_manual(expected, rounds=rounds, cfg=cfg)
+    measure_logical_operators_tesseract(expected, cfg=cfg)
+
+    assert build_circuit_ec_experiment(rounds, cfg, encoding_mode).flattened() == expected
+
+
+def test_rounds_share_one_repeat_block():
+    few = build_circuit_ec_experiment(2, NO_NOISE, '9a')
+    many = build_circuit_ec_experiment(50, NO_NOISE, '9a')
+    assert len(many) == len(few)
+    assert many.num_measurements == few.num_measurements + 48 * 16
+
+
+def test_cached_fragments_are_not_modified_by_callers():
+    circuit = build_encoding_circuit(NO_NOISE, '9a')
+    circuit.append("X", [0])
+    assert build_encoding_circuit(NO_NOISE, '9a') != circuit
+    build_circuit_ec_experiment(2, NO_NOISE, '9a').append("X", [0])
+    assert build_circuit_ec_experiment(2, NO_NOISE, '9a') == build_circuit_ec_experiment(2, NO_NOISE, '9a')
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from tesseract_sim.error_correction.decoder_manual import (
+    canonical_syndromes,
+    decode_shots,
+    get_decoding_parameters,
+    process_shot,
+    verify_final_state,
+    verify_final_states,
+)
+from tesseract_sim.estimation.threshold import ec_noise_cfg
+from tesseract_sim.noise.noise_cfg import NO_NOISE
+from tesseract_sim.run import build_circuit_ec_experiment
+
+
+def _sample(rounds, cfg, encoding_mode, shots=2000, seed=11):
+    circuit = build_circuit_ec_experiment(rounds, cfg, encoding_mode=encoding_mode)
+    return circuit.compile_sampler(seed=seed).sample(shots=shots)
+
+
+@pytest.mark.parametrize("encoding_mode", ['9a', '9b'])
+@pytest.mark.parametrize("apply_pauli_frame", [True, False])
+@pytest.mark.parametrize("noise", [1e-3, 1e-2])
+def test_deduplicated_decoding_matches_per_shot(encoding_mode, apply_pauli_frame, noise):
+    """Decoding each distinct syndrome once gives exactly the per-shot results."""
+    rounds = 3
+    shot_data = _sample(rounds, ec_noise_cfg(noise), encoding_mode)
+
+    accepted, checks = decode_shots(shot_data, rounds, apply_pauli_frame, encoding_mode, deduplicate=True)
+    expected_accepted, expected_checks = decode_shots(shot_data, rounds, apply_pauli_frame, encoding_mode,
+                                                      deduplicate=False)
+
+    np.testing.assert_array_equal(accepted, expected_accepted)
+    np.testing.assert_array_equal(checks, expected_checks)
+
+
+@pytest.mark.parametrize("encoding_mode", ['9a', '9b'])
+def test_canonical_syndromes_decode_like_raw_records(encoding_mode):
+    rounds = 2
+    measurement_offset, _, _ = get_decoding_parameters(encoding_mode)
+    shot_data = _sample(rounds, ec_noise_cfg(1e-2), encoding_mode, shots=300)
+
+    for raw, canonical in zip(shot_data, canonical_syndromes(shot_data, rounds, measurement_offset)):
+        status, frameX, frameZ = process_shot(raw, rounds, measurement_offset=measurement_offset)
+        canonical_status, canonical_frameX, canonical_frameZ = process_shot(canonical, rounds)
+        assert status == canonical_status
+        if status == "accept":
+            np.testing.assert_array_equal(frameX, canonical_frameX)
+            np.testing.assert_array_equal(frameZ, canonical_frameZ)
+
+
+def test_noiseless_syndromes_are_trivial():
+    """Raw outcomes are random without noise, but every group of four agrees."""
+    rounds = 2
+    measurement_offset, _, _ = get_decoding_parameters('9a')
+    shot_data = _sample(rounds, NO_NOISE, '9a', shots=200)
+
+    assert shot_data[:, measurement_offset:measurement_offset + 16 * rounds].any()
+    assert not canonical_syndromes(shot_data, rounds, measurement_offset).any()
+
+
+@pytest.mark.parametrize("only_z_checks", [True, False])
+def test_vectorized_final_state_verification(only_z_checks):
+    rng = np.random.default_rng(5)
+    tails = rng.integers(2, size=(200, 16), dtype=np.uint8)
+    frameX = rng.integers(2, size=(200, 16), dtype=np.uint8)
+    frameZ = rng.integers(2, size=(200, 16), dtype=np.uint8)
+
+    checks = verify_final_states(tails, frameX, frameZ, True, only_z_checks)
+    expected = [verify_final_state(t, fX, fZ, True, only_z_checks) for t, fX, fZ in zip(tails, frameX, frameZ)]
+    np.testing.assert_array_equal(checks, expected)
+
+    unframed = verify_final_states(tails, None, None, True, only_z_checks)
+    expected = [verify_final_state(t, None, None, True, only_z_checks) for t in tails]
+    np.testing.assert_array_equal(unframed, expected)
@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from tesseract_sim.error_correction.decoder_manual import decode_shots
+from tesseract_sim.error_correction.decoders import DECODERS, DecodingLayout, check_decoders, get_decoder, \
+    register_decoder
+from tesseract_sim.estimation.threshold import ec_noise_cfg
+from tesseract_sim.run import build_circuit_ec_experiment
+
+
+@pytest.mark.parametrize("name", sorted(DECODERS))
+def test_registered_decoders_conform(name):
+    for result in check_decoders([name], rounds=3, shots=2000, noise=1e-2, seed=2):
+        assert result.conforms, result
+
+
+@pytest.mark.parametrize("name", sorted(DECODERS))
+@pytest.mark.parametrize("encoding_mode", ['9a', '9b'])
+def test_decode_shots_with_registered_decoder(name, encoding_mode):
+    circuit = build_circuit_ec_experiment(2, ec_noise_cfg(5e-3), encoding_mode=encoding_mode)
+    shot_data = circuit.compile_sampler(seed=4).sample(shots=1000)
+
+    accepted, successful_checks = decode_shots(shot_data, 2, encoding_mode=encoding_mode, decoder=name)
+    expected_accepted, expected_checks = decode_shots(shot_data, 2, encoding_mode=encoding_mode, deduplicate=False)
+    np.testing.assert_array_equal(accepted, expected_accepted)
+    np.testing.assert_array_equal(successful_checks, expected_checks)
+
+
+def test_empty_batch():
+    shot_data = np.zeros((0, 48), dtype=bool)
+    for name in DECODERS:
+        accepted, frameX, frameZ = get_decoder(name).decode(shot_data, DecodingLayout.for_encoding(2, '9a'))
+        assert accepted.shape == (0,)
+        assert frameX.shape == frameZ.shape == (0, 16)
+
+
+def test_registry():
+    with pytest.raises(ValueError):
+        get_decoder('no-such-decoder')
+    with pytest.raises(ValueError):
+        register_decoder('manual')(object)
+
+    @register_decoder('accept-all')
+    class AcceptAll:
+        def decode(self, shot_data_all, layout):
+            zeros = np.zeros((len(shot_data_all), 16), dtype=np.uint8)
+            return np.ones(len(shot_data_all), dtype=bool), zeros, zeros.copy()
+
+    try:
+        results = check_decoders(['accept-all'], encoding_modes=['9a'], rounds=2, shots=500, noise=5e-2, seed=1)
+        assert not results[0].conforms
+    finally:
+        del DECODERS['accept-all']
+
+
+def test_decoding_does_not_import_the_experiment_runner():
+    code = ("import sys\n"
+            "import numpy as np\n"
+            "from tesseract_sim.error_correction.decoder_manual import decode_shots\n"
+            "decode_shots(np.zeros((2, 100), dtype=bool), 2, decoder='table')\n"
+            "print('tesseract_sim.run' in sys.modules)\n")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=root)
+    assert output.stdout.strip() == "False"
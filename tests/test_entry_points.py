@@ -0,0 +1,91 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_in_fresh_interpreter(module):
+    """Imports module in a new interpreter, returns the import time and which heavy modules got loaded."""
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "seconds = time.perf_counter() - start\n"
+        "print(json.dumps({'seconds': seconds, 'loaded': [m for m in ('numpy', 'stim', 'matplotlib') if m in sys.modules]}))\n"
+    )
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env, cwd=ROOT)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def test_package_import_loads_nothing_heavy():
+    result = import_in_fresh_interpreter("tesseract_sim")
+    assert result['loaded'] == []
+
+
+@pytest.mark.parametrize("module", ["tesseract_sim.run", "tesseract_sim.estimation.sweep",
+                                    "tesseract_sim.plotting.plot_acceptance_rates", "tesseract_sim.plotting.batch"])
+def test_entry_point_modules_import_without_matplotlib(module):
+    result = import_in_fresh_interpreter(module)
+    assert 'matplotlib' not in result['loaded']
+    # Generous bound, matplotlib alone used to take a few hundred ms
+    assert result['seconds'] < 2.0, f"{module} imported in {result['seconds'] * 1e3:.0f} ms"
+
+
+def run_in_fresh_interpreter(code):
+    env = {key: value for key, value in os.environ.items() if key != "MPLBACKEND"}
+    env["PYTHONPATH"] = ROOT + os.pathsep + os.environ.get("PYTHONPATH", "")
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env, cwd=ROOT)
+    return output.stdout.strip().splitlines()[-1]
+
+
+def test_plotting_selects_agg_when_first_to_load_pyplot():
+    code = (
+        "from tesseract_sim.plotting.plot_acceptance_rates import _pyplot\n"
+        "import matplotlib\n"
+        "_pyplot()\n"
+        "print(matplotlib.get_backend().lower())\n"
+    )
+    assert run_in_fresh_interpreter(code) == "agg"
+
+
+def test_plotting_keeps_the_session_backend():
+    """A session that chose its backend and loaded pyplot keeps both, with its open figures."""
+    code = (
+        "import matplotlib\n"
+        "matplotlib.use('svg')\n"
+        "import matplotlib.pyplot as plt\n"
+        "figure = plt.figure()\n"
+        "from tesseract_sim.plotting.plot_acceptance_rates import _pyplot\n"
+        "_pyplot()\n"
+        "print(matplotlib.get_backend().lower(), plt.fignum_exists(figure.number))\n"
+    )
+    assert run_in_fresh_interpreter(code) == "svg True"
+
+
+def test_lazy_export():
+    from tesseract_sim import run_simulation_ec_experiment
+    from tesseract_sim.run import run_simulation_ec_experiment as direct
+    assert run_simulation_ec_experiment is direct
+    with pytest.raises(AttributeError):
+        import tesseract_sim
+        tesseract_sim.no_such_name
+
+
+def test_console_scripts_declared():
+    metadata = pytest.importorskip("importlib.metadata")
+    try:
+        scripts = {entry.name: entry.value for entry in metadata.distribution("tesseract_sim").entry_points
+                   if entry.group == "console_scripts"}
+    except metadata.PackageNotFoundError:
+        pytest.skip("tesseract_sim is not installed")
+    assert scripts == {
+        "tesseract-simulate": "tesseract_sim.run:main",
+        "tesseract-sweep": "tesseract_sim.estimation.sweep:main",
+        "tesseract-plot": "tesseract_sim.plotting.plot_acceptance_rates:main",
+        "tesseract-batch": "tesseract_sim.plotting.batch:main",
+    }
@@ -0,0 +1,52 @@
+import pytest
+from tesseract_sim.error_correction.fault_tolerance import verify_single_faults, verification_noise_cfg, location_phases
+from tesseract_sim.noise.fault_locations import enumerate_fault_locations
+from tesseract_sim.run import build_circuit_ec_experiment
+
+
+@pytest.fixture(scope="module")
+def report_9a():
+    return verify_single_faults('9a', rounds=1)
+
+
+def test_every_location_gets_a_phase():
+    cfg = verification_noise_cfg()
+    phases = location_phases(cfg, 1, '9a')
+    locations = enumerate_fault_locations(build_circuit_ec_experiment(1, cfg, encoding_mode='9a'))
+    assert len(phases) == len(locations)
+    # Phases appear in experiment order, each of them non-empty
+    assert sorted(set(phases), key=phases.index) == ['enc', 'channel', 'ec', 'meas']
+    assert phases == sorted(phases, key=['enc', 'channel', 'ec', 'meas'].index)
+
+
+def test_covers_every_single_fault(report_9a):
+    locations = enumerate_fault_locations(build_circuit_ec_experiment(1, verification_noise_cfg(), encoding_mode='9a'))
+    assert len(report_9a.cases) == sum(len(loc.paulis) for loc in locations)
+    assert report_9a.exact_gauge
+
+
+def test_single_channel_faults_are_tolerated_in_9a(report_9a):
+    """A single error on the encoded state, before error correction, never causes an accepted logical error."""
+    channel_cases = [case for case in report_9a.cases if case.phase == 'channel']
+    assert channel_cases
+    assert not any(case.logical_error for case in channel_cases)
+    assert all(case.accepted for case in channel_cases)
+
+
+def test_reports_readout_faults(report_9a):
+    """Faults during the final logical readout are not corrected and are reported."""
+    assert report_9a.failures_by_phase().get('meas', 0) > 0
+    assert not report_9a.is_fault_tolerant
+    summary = report_9a.summary()
+    assert f"{len(report_9a.failures)} accepted logical errors" in summary
+
+
+def test_phase_selection():
+    report = verify_single_faults('9a', rounds=1, phases=['channel'])
+    assert {case.phase for case in report.cases} == {'channel'}
+    assert report.is_fault_tolerant
+
+
+def test_unknown_phase_raises():
+    with pytest.raises(ValueError):
+        verify_single_faults('9a', rounds=1, phases=['decoding'])
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from tesseract_sim.error_correction.decoder_manual import decode_shots
+from tesseract_sim.error_correction.jit_decoder import NUMBA_AVAILABLE, decode_kernel, jit_decode_shots
+from tesseract_sim.estimation.threshold import ec_noise_cfg
+from tesseract_sim.run import build_circuit_ec_experiment
+
+
+def syndrome_corpus():
+    """
+    Two-round records covering every (flag, row pattern, column pattern) of both syndrome types.
+
+    The rules for X syndromes (flagX) and Z syndromes (flagZ) never interact, so each type is enumerated on
+    its own: the first round leaves its flag at -1 or 0..3 (a single column outcome set), the second round
+    goes through all 16 x 16 row and column patterns. The Z syndromes use a permutation of the X cases, and
+    the final measurements are random.
+    """
+    cases = [(first, row, column) for first in range(5) for row in range(16) for column in range(16)]
+    permutation = np.random.default_rng(0).permutation(len(cases))
+    records = np.zeros((len(cases), 2 * 16 + 16), dtype=bool)
+    for i, (x_case, z_case) in enumerate(zip(cases, (cases[j] for j in permutation))):
+        for parity, (first, row, column) in ((0, x_case), (1, z_case)):
+            for k in range(4):
+                records[i, 8 + parity + 2 * k] = first > 0 and k == first - 1
+                records[i, 16 + parity + 2 * k] = (row >> k) & 1
+                records[i, 24 + parity + 2 * k] = (column >> k) & 1
+    records[:, 32:] = np.random.default_rng(1).random((len(cases), 16)) < 0.5
+    return records
+
+
+@pytest.mark.parametrize("apply_pauli_frame", [True, False])
+@pytest.mark.parametrize("only_z_checks", [True, False])
+def test_kernel_matches_reference_on_exhaustive_corpus(apply_pauli_frame, only_z_checks):
+    records = syndrome_corpus()
+    accepted, successful_checks = jit_decode_shots(records, 2, apply_pauli_frame, '9a', only_z_checks=only_z_checks)
+    expected_accepted, expected_checks = decode_shots(records, 2, apply_pauli_frame, '9a', deduplicate=False,
+                                                      only_z_checks=only_z_checks)
+    assert 0 < accepted.sum() < len(records)
+    np.testing.assert_array_equal(accepted, expected_accepted)
+    np.testing.assert_array_equal(successful_checks, expected_checks)
+
+
+@pytest.mark.parametrize("encoding_mode", ['9a', '9b'])
+def test_kernel_matches_reference_on_sampled_records(encoding_mode):
+    circuit = build_circuit_ec_experiment(3, ec_noise_cfg(1e-2), encoding_mode=encoding_mode)
+    shot_data = circuit.compile_sampler(seed=6).sample(shots=1000)
+    accepted, successful_checks = jit_decode_shots(shot_data, 3, encoding_mode=encoding_mode)
+    expected_accepted, expected_checks = decode_shots(shot_data, 3, encoding_mode=encoding_mode, deduplicate=False)
+    np.testing.assert_array_equal(accepted, expected_accepted)
+    np.testing.assert_array_equal(successful_checks, expected_checks)
+
+
+@pytest.mark.skipif(not NUMBA_AVAILABLE, reason="Numba is not installed")
+def test_kernel_is_compiled():
+    assert hasattr(decode_kernel, "signatures")
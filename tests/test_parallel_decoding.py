@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from tesseract_sim.error_correction.decoder_manual import DecodingCounts, decode_shots, run_manual_error_correction
+from tesseract_sim.error_correction.parallel_decoding import decode_shared_records, run_parallel_error_correction, \
+    sample_to_shared_memory
+from tesseract_sim.noise.noise_cfg import NoiseCfg
+from tesseract_sim.run import build_circuit_ec_experiment
+
+CFG = NoiseCfg(ec_active=True, ec_rate_1q=2e-3, ec_rate_2q=5e-3)
+
+
+def test_shared_records_unpack_to_sampled_records():
+    circuit = build_circuit_ec_experiment(2, CFG, '9a')
+    memory, shape = sample_to_shared_memory(circuit, 300, chunk_shots=128, seed=4)
+    try:
+        packed = np.ndarray(shape, dtype=np.uint8, buffer=memory.buf)
+        records = np.unpackbits(packed, axis=1, count=circuit.num_measurements, bitorder='little').astype(bool)
+        expected = circuit.compile_sampler(seed=4).sample(128)
+        assert (records[:128] == expected).all()
+        del packed
+    finally:
+        memory.close()
+        memory.unlink()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parallel_counts_match_decode_shots(workers):
+    circuit = build_circuit_ec_experiment(2, CFG, '9b')
+    shots = 1000
+    memory, shape = sample_to_shared_memory(circuit, shots, seed=8)
+    try:
+        packed = np.ndarray(shape, dtype=np.uint8, buffer=memory.buf)
+        records = np.unpackbits(packed, axis=1, count=circuit.num_measurements, bitorder='little').astype(bool)
+        del packed
+        counts = decode_shared_records(memory, shape, circuit.num_measurements, 2, encoding_mode='9b',
+                                       workers=workers, batch_shots=300)
+    finally:
+        memory.close()
+        memory.unlink()
+
+    accepted, successful_checks = decode_shots(records, 2, encoding_mode='9b')
+    assert counts == DecodingCounts(shots, int(accepted.sum()), int((successful_checks == 4).sum()),
+                                    int(successful_checks.sum()))
+
+
+def test_parallel_run_without_noise_passes_all():
+    circuit = build_circuit_ec_experiment(3, encoding_mode='9a')
+    assert run_parallel_error_correction(circuit, 500, 3, encoding_mode='9a', workers=2, batch_shots=200) == \
+        DecodingCounts(500, 500, 500, 1000)
+    assert run_manual_error_correction(circuit, 500, 3, encoding_mode='9a', workers=2) == (500, 500, 1.0)
+
+
+def test_invalid_workers():
+    circuit = build_circuit_ec_experiment(1, encoding_mode='9a')
+    with pytest.raises(ValueError):
+        run_parallel_error_correction(circuit, 10, 1, encoding_mode='9a', workers=-1)
@@ -1,3 +1,5 @@
+import math
+
 import pytest
 from tesseract_sim.plotting.plot_acceptance_rates import compute_logical_success_rate, compute_average_fidelity
 
@@ -30,6 +32,17 @@ class TestPlottingHelpers:
         # When accepted=0, should return 0.0, not division by zero
         assert result[0.5] == [0.0, 0.5]
 
+    def test_compute_logical_success_rate_nan_accepted(self):
+        """Points without an estimate (refused reweighting) stay NaN."""
+        raw_results = {
+            0.5: [(math.nan, math.nan, None), (10, 5, 0.8)]
+        }
+
+        result = compute_logical_success_rate(raw_results)
+
+        assert math.isnan(result[0.5][0])
+        assert result[0.5][1] == 0.5
+
     def test_compute_average_fidelity_basic(self):
         """Test average fidelity extraction with basic data."""
         raw_results = {
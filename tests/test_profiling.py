@@ -0,0 +1,84 @@
+import json
+import os
+import pstats
+import tracemalloc
+
+import numpy as np
+
+from tesseract_sim.common.profiling import PipelineMetrics, stage
+from tesseract_sim.noise.noise_cfg import NO_NOISE
+from tesseract_sim.plotting.plot_acceptance_rates import plot_ec_experiment
+from tesseract_sim.run import run_simulation_ec_experiment
+
+
+def test_stages_outside_points_are_not_recorded():
+    metrics = PipelineMetrics()
+    with stage('sample'):
+        pass
+    assert metrics.points == []
+
+
+def test_point_records_pipeline_stages():
+    metrics = PipelineMetrics()
+    with metrics.point(rounds=2, shots=200):
+        run_simulation_ec_experiment(rounds=2, shots=200, cfg=NO_NOISE, encoding_mode='9a')
+    point, = metrics.points
+    assert point['params'] == {'rounds': 2, 'shots': 200}
+    assert set(point['stages']) == {'build_circuit', 'compile_sampler', 'sample', 'decode', 'verify'}
+    assert sum(point['stages'].values()) <= point['total_seconds']
+    assert point['shots_per_second'] > 0
+    assert point['peak_memory_mb'] is None
+    assert set(metrics.stage_totals()) == set(point['stages'])
+
+
+def test_peak_memory_is_measured_per_point():
+    metrics = PipelineMetrics(trace_memory=True)
+    with metrics.point(size='large'):
+        large = np.ones(50 * 2 ** 20, dtype=np.uint8)
+        del large
+    with metrics.point(size='small'):
+        small = np.ones(2 ** 20, dtype=np.uint8)
+        del small
+    large_peak, small_peak = (point['peak_memory_mb'] for point in metrics.points)
+    assert large_peak >= 50
+    assert 1 <= small_peak < 10
+
+
+def test_memory_is_not_traced_by_default():
+    metrics = PipelineMetrics()
+    with metrics.point():
+        with stage('sample'):
+            assert not tracemalloc.is_tracing()
+    assert metrics.points[0]['peak_memory_mb'] is None
+
+
+def test_nested_stages_count_towards_outer_stage():
+    metrics = PipelineMetrics()
+    with metrics.point():
+        with stage('outer'):
+            with stage('inner'):
+                pass
+    assert list(metrics.points[0]['stages']) == ['outer']
+
+
+def test_profile_writes_stats_per_stage(tmp_path):
+    metrics = PipelineMetrics(profile_dir=str(tmp_path))
+    with metrics.point(shots=100):
+        run_simulation_ec_experiment(rounds=1, shots=100, cfg=NO_NOISE, encoding_mode='9a')
+    profiles = metrics.points[0]['profiles']
+    assert profiles['decode'] == "point000_decode.prof"
+    for name in profiles.values():
+        pstats.Stats(os.path.join(tmp_path, name))
+
+
+def test_plot_ec_experiment_saves_metrics(tmp_path):
+    plot_ec_experiment([1, 2], [0.0], 100, str(tmp_path), encoding_mode='9a', profile=True)
+    out_dir, = [os.path.join(tmp_path, name) for name in os.listdir(tmp_path)]
+    with open(os.path.join(out_dir, "performance_metrics.json")) as f:
+        saved = json.load(f)
+    assert set(saved['versions']) == {'code_version', 'stim', 'numpy', 'python'}
+    assert [point['params']['rounds'] for point in saved['points']] == [1, 2]
+    assert all(point['peak_memory_mb'] is not None for point in saved['points'])
+    assert os.path.isdir(os.path.join(out_dir, "profiles"))
+    with open(os.path.join(out_dir, "experiment_metadata.txt")) as f:
+        assert "Performance:" in f.read()
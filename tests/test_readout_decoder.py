@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from tesseract_sim.error_correction.decoder_manual import decode_shots, verify_final_states
+from tesseract_sim.error_correction.readout_decoder import BLOCK_LOGICALS, block_checks, block_error_prior, \
+    build_readout_tables, default_readout_tables
+from tesseract_sim.noise.noise_cfg import NO_NOISE, NoiseCfg
+from tesseract_sim.run import build_circuit_ec_experiment
+
+
+@pytest.mark.parametrize("encoding_mode", ['9a', '9b'])
+def test_noiseless_outcomes_satisfy_block_checks(encoding_mode):
+    tails = build_circuit_ec_experiment(1, NO_NOISE, encoding_mode).compile_sampler(seed=1).sample(500)[:, -16:]
+    for block, columns in (('X', slice(0, 8)), ('Z', slice(8, 16))):
+        checks = block_checks(block).astype(np.uint8)
+        assert checks.shape == (4, 8)
+        assert not ((tails[:, columns].astype(np.uint8) @ checks.T) % 2).any()
+
+
+def test_tables_agree_with_parities_without_syndrome():
+    """Outcomes that satisfy every block check are decoded exactly like the direct parity checks."""
+    rng = np.random.default_rng(2)
+    tables = default_readout_tables()
+    tails = build_circuit_ec_experiment(1, NO_NOISE, '9b').compile_sampler(seed=3).sample(200)[:, -16:]
+    # Flip logical operators (weight-4 faces of each block) without creating a syndrome
+    faces = np.array([[1, 1, 0, 0, 1, 1, 0, 0], [0, 1, 1, 0, 0, 1, 1, 0], [1, 0, 0, 1, 1, 0, 0, 1]], dtype=np.uint8)
+    flips = np.concatenate([rng.integers(2, size=(200, 3)) @ faces % 2, rng.integers(2, size=(200, 3)) @ faces % 2], axis=1)
+    tails = tails ^ flips.astype(bool)
+
+    np.testing.assert_array_equal(tables.successful_checks(tails), verify_final_states(tails))
+    assert (verify_final_states(tails) < 4).any()
+
+
+@pytest.mark.parametrize("block", ['X', 'Z'])
+def test_single_flips_are_corrected(block):
+    tables = default_readout_tables()
+    table = tables.x_block if block == 'X' else tables.z_block
+    for q in range(8):
+        assert table[1 << q] == 0, f"flip of qubit {q} in block {block} decoded as {table[1 << q]}"
+    # A logical operator of the block is decoded as such
+    (_, (a, b)), = [entry for entry in BLOCK_LOGICALS[block] if entry[0] in ('X4', 'Z3')]
+    assert table[(1 << a) | (1 << b)] != 0
+
+
+def test_prior_from_measurement_noise():
+    cfg = NoiseCfg(meas_active=True, meas_error_rate=1e-2)
+    prior = block_error_prior('Z', cfg, '9a')
+    assert prior.sum() == pytest.approx(1.0)
+    assert prior[0] == prior.max()
+    # Without readout faults, outcomes flip independently
+    weights = np.array([bin(e).count('1') for e in range(256)])
+    np.testing.assert_allclose(block_error_prior('Z', None, bit_flip_rate=0.1), 0.1 ** weights * 0.9 ** (8 - weights))
+
+
+def test_ml_readout_improves_logical_success():
+    cfg = NoiseCfg(meas_active=True, meas_error_rate=1e-2)
+    shot_data = build_circuit_ec_experiment(1, cfg, '9a').compile_sampler(seed=5).sample(20000)
+
+    accepted, parity_checks = decode_shots(shot_data, 1, encoding_mode='9a')
+    _, ml_checks = decode_shots(shot_data, 1, encoding_mode='9a', readout=build_readout_tables(cfg, '9a'))
+    _, default_checks = decode_shots(shot_data, 1, encoding_mode='9a', readout='ml')
+    assert (ml_checks[accepted] == 2).mean() > (parity_checks[accepted] == 2).mean() + 0.005
+    assert (default_checks[accepted] == 2).mean() > (parity_checks[accepted] == 2).mean() + 0.005
+
+    with pytest.raises(ValueError):
+        decode_shots(shot_data, 1, encoding_mode='9a', readout='unknown')
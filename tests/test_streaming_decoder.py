@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+import stim
+
+from tesseract_sim.error_correction.correction_rules import correct_column_Z
+from tesseract_sim.error_correction.decoder_manual import decode_shots, get_decoding_parameters, process_shot
+from tesseract_sim.error_correction.streaming import LatencyHistogram, StreamingDecoder, load_records, replay_records
+from tesseract_sim.error_correction.transition_tables import REJECT_FLAG, build_transition_table, pattern_bits
+from tesseract_sim.estimation.threshold import ec_noise_cfg
+from tesseract_sim.run import build_circuit_ec_experiment
+
+
+def _sample(rounds, encoding_mode, noise=1e-2, shots=500, seed=3):
+    circuit = build_circuit_ec_experiment(rounds, ec_noise_cfg(noise), encoding_mode=encoding_mode)
+    return circuit, circuit.compile_sampler(seed=seed).sample(shots=shots)
+
+
+def test_transition_table_matches_rule():
+    table = build_transition_table('correct_column_Z', 'X', correct_column_Z)
+    for flag in range(-1, 4):
+        for pattern in range(16):
+            frame = np.zeros(16, dtype=np.int64)
+            result = correct_column_Z(flag, pattern_bits(pattern), frame)
+            if isinstance(result, str):
+                assert table.next_flag[flag + 1, pattern] == REJECT_FLAG
+            else:
+                assert table.next_flag[flag + 1, pattern] == result[0]
+                np.testing.assert_array_equal(table.frame_flips[flag + 1, pattern], result[2] & 1)
+
+
+@pytest.mark.parametrize("encoding_mode", ['9a', '9b'])
+def test_streaming_decoder_matches_process_shot(encoding_mode):
+    rounds = 3
+    measurement_offset, _, _ = get_decoding_parameters(encoding_mode)
+    _, shot_data = _sample(rounds, encoding_mode)
+
+    decoder = StreamingDecoder(len(shot_data))
+    for r in range(rounds):
+        start = measurement_offset + 16 * r
+        decoder.push_round(shot_data[:, start:start + 16])
+
+    for i, shot in enumerate(shot_data):
+        status, frameX, frameZ = process_shot(shot, rounds, measurement_offset=measurement_offset)
+        assert decoder.accepted[i] == (status == "accept")
+        if status == "accept":
+            np.testing.assert_array_equal(decoder.frameX[i], frameX & 1)
+            np.testing.assert_array_equal(decoder.frameZ[i], frameZ & 1)
+    assert decoder.latency.count == rounds
+
+
+def test_single_shot_rejection_is_incremental():
+    rounds = 3
+    measurement_offset, _, _ = get_decoding_parameters('9a')
+    _, shot_data = _sample(rounds, '9a', noise=5e-2)
+
+    rejected = [i for i, shot in enumerate(shot_data) if process_shot(shot, rounds, measurement_offset)[0] == "reject"]
+    shot = shot_data[rejected[0]]
+    decoder = StreamingDecoder()
+    decisions = [bool(decoder.push_round(shot[measurement_offset + 16 * r:measurement_offset + 16 * (r + 1)])[0])
+                 for r in range(rounds)]
+    # Once rejected, a shot stays rejected, and the shot is rejected by the last round
+    assert decisions[-1] is False
+    assert decisions == sorted(decisions, reverse=True)
+
+
+@pytest.mark.parametrize("batch_shots", [1, 64])
+def test_replay_matches_batch_decoding(tmp_path, batch_shots):
+    rounds = 2
+    circuit, shot_data = _sample(rounds, '9b', shots=200)
+    path = str(tmp_path / "records.01")
+    stim.write_shot_data_file(data=shot_data, path=path, format='01', num_measurements=circuit.num_measurements)
+
+    records = load_records(path, circuit.num_measurements, '01')
+    report = replay_records(records, rounds, '9b', batch_shots=batch_shots)
+    accepted, successful_checks = decode_shots(shot_data, rounds, encoding_mode='9b')
+
+    np.testing.assert_array_equal(report.accepted, accepted)
+    np.testing.assert_array_equal(report.successful_checks, successful_checks)
+    assert report.rounds == rounds * report.batches
+    assert report.latency.count == report.rounds
+
+
+def test_latency_histogram_quantiles():
+    histogram = LatencyHistogram(min_seconds=1e-6, max_seconds=1e-2, bins_per_decade=10)
+    for seconds in [2e-6] * 90 + [5e-4] * 10:
+        histogram.record(seconds)
+    assert histogram.count == 100
+    assert 2e-6 <= histogram.quantile(0.5) < 3e-6
+    assert 5e-4 <= histogram.quantile(0.99) < 7e-4
+    histogram.record(1.0)
+    assert histogram.quantile(1.0) == 1.0